@@ -0,0 +1,103 @@
+"""
+Simulation benchmark of the matchmaking queue, reporting queue wait percentiles and pairing pass time
+at different population sizes.
+Players alternate between idle, queueing and playing a match, and the queue is paired every pass interval.
+Run from the repository root, eg: python -m benchmarks.matchmaking --populations 50 200 1000 --hours 12
+
+Default run, for reference:
+ players  matches  queued  p50 wait  p90 wait  p99 wait       pass   max pass
+      20       90       0      128s      799s     1936s        3us       47us
+     100      458       2       53s      275s      909s        4us       54us
+     500     2369       3       15s       94s      335s        9us      139us
+    2000     9571       3       11s       32s      115s       32us     1405us
+"""
+
+# External Imports
+import argparse
+import heapq
+import random
+import statistics
+import time
+
+# Internal Imports
+from modules.matchmaker import Matchmaker, QueueEntry
+
+FACTIONS = ("VS", "NC", "TR")
+SKILL_LEVELS = range(1, 7)
+
+
+def make_entry_factory(player_id: int, rng: random.Random):
+    """Create a simulated player, returning a function building their queue entry at a given time"""
+    elo = rng.gauss(1000, 150)
+    skill_level = min(max(int((elo - 700) / 100) + 1, 1), 6)
+    factions = frozenset(FACTIONS) if rng.random() < 0.6 else frozenset(rng.sample(FACTIONS, rng.choice((1, 2))))
+    req_levels = frozenset() if rng.random() < 0.7 else \
+        frozenset(level for level in SKILL_LEVELS if abs(level - skill_level) <= 1)
+    return lambda now: QueueEntry(player_id, elo, now, skill_level, req_levels, factions)
+
+
+def simulate(population: int, hours: float, pass_interval: int, idle_minutes: float, match_minutes: float,
+             seed: int) -> dict:
+    rng = random.Random(seed)
+    players = [make_entry_factory(p_id, rng) for p_id in range(population)]
+    matchmaker = Matchmaker()
+    events = [(rng.expovariate(1 / (idle_minutes * 60)), p_id) for p_id in range(population)]  # (queue at, player)
+    heapq.heapify(events)
+    waits, pass_times = [], []
+    end = hours * 3600
+
+    now = 0
+    while now < end:
+        now += pass_interval
+        while events and events[0][0] <= now:
+            queue_at, p_id = heapq.heappop(events)
+            matchmaker.add(players[p_id](queue_at))
+
+        start = time.perf_counter()
+        pairs = matchmaker.pair(now)
+        pass_times.append(time.perf_counter() - start)
+
+        for pair in pairs:
+            for entry in pair:
+                waits.append(now - entry.queued_at)
+                idle = rng.expovariate(1 / (idle_minutes * 60))
+                heapq.heappush(events, (now + match_minutes * 60 + idle, entry.key))
+
+    if not waits:
+        return {'matches': 0, 'queued': len(matchmaker)}
+    quantiles = statistics.quantiles(waits, n=100)
+    return {
+        'matches': len(waits) // 2,
+        'queued': len(matchmaker),
+        'p50': quantiles[49],
+        'p90': quantiles[89],
+        'p99': quantiles[98],
+        'pass_us': statistics.mean(pass_times) * 1e6,
+        'pass_max_us': max(pass_times) * 1e6,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--populations', default=[20, 100, 500, 2000], type=int, nargs='+',
+                    help="Numbers of players using the matchmaker")
+    ap.add_argument('--hours', default=12, type=float, help="Simulated hours")
+    ap.add_argument('--pass-interval', default=15, type=int, help="Seconds between pairing passes")
+    ap.add_argument('--idle', default=60, type=float, help="Mean minutes a player waits before queueing again")
+    ap.add_argument('--match', default=15, type=float, help="Minutes a match lasts")
+    ap.add_argument('--seed', default=1, type=int)
+    args = ap.parse_args()
+
+    print(f"{'players':>8} {'matches':>8} {'queued':>7} {'p50 wait':>9} {'p90 wait':>9} {'p99 wait':>9} "
+          f"{'pass':>10} {'max pass':>10}")
+    for population in args.populations:
+        r = simulate(population, args.hours, args.pass_interval, args.idle, args.match, args.seed)
+        if not r['matches']:
+            print(f"{population:>8} {0:>8} {r['queued']:>7}")
+            continue
+        print(f"{population:>8} {r['matches']:>8} {r['queued']:>7} {r['p50']:>8.0f}s {r['p90']:>8.0f}s "
+              f"{r['p99']:>8.0f}s {r['pass_us']:>8.0f}us {r['pass_max_us']:>8.0f}us")
+
+
+if __name__ == '__main__':
+    main()
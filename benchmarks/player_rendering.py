@@ -0,0 +1,102 @@
+"""
+Micro-benchmark of Player / ActivePlayer attribute access, through dashboard and match embed rendering,
+and memory used per Player.
+Run from the repository root, eg: python -m benchmarks.player_rendering --players 20000
+Run against two commits to compare before / after a change.
+
+Figures for the __slots__ change (Python 3.11, --players 20000 --number 500), before -> after:
+    duel_dashboard: ~125us -> ~100us per render
+    match_info: ~205us -> ~118us per render
+    ActivePlayer forwarded reads: ~150us -> ~50us per pass
+    Memory: 1218 -> 1154 bytes per player, excluding the search index added later (~3300 bytes per player)
+"""
+
+# External Imports
+import argparse
+import gc
+import timeit
+import tracemalloc
+from types import SimpleNamespace
+from enum import Enum
+
+# Internal Imports
+import modules.accounts_handler  # noqa: F401, imported before classes as in main.py, to resolve circular imports
+from classes.players import Player, ActivePlayer, SkillLevel
+from display import embeds
+from modules import search_index
+
+
+class _Status(Enum):
+    PLAYING = "Playing"
+
+
+def make_players(count: int, start_id: int = 1) -> list[Player]:
+    """Create registered players with characters, as loaded from the database"""
+    players = []
+    for p_id in range(start_id, start_id + count):
+        player = Player(p_id, f"Player{p_id}")
+        player.skill_level = SkillLevel.HARMLESS
+        player.pref_factions = ["VS", "TR"]
+        player.req_skill_levels = [SkillLevel.HARMLESS]
+        player.online_id = p_id * 10
+        player._Player__ig_ids = [p_id * 10, p_id * 10 + 1, p_id * 10 + 2, 0]
+        player._Player__ig_names = [f"Char{p_id}VS", f"Char{p_id}NC", f"Char{p_id}TR", "N/A"]
+        players.append(player)
+    return players
+
+
+def memory_per_player(count: int) -> tuple[float, float]:
+    """Bytes allocated per Player, including its attribute containers, and per player in the name search index.
+    The players are removed from the player registry and search index afterwards."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    players = make_players(count, start_id=10_000_000)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    index_used, used = 0, 0
+    for stat in after.compare_to(before, 'filename'):
+        if stat.traceback[0].filename == search_index.__file__:
+            index_used += stat.size_diff
+        else:
+            used += stat.size_diff
+    for p in players:
+        p.remove()
+    return used / count, index_used / count
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--players', default=20000, type=int, help="Players in the user table, for the memory figure")
+    ap.add_argument('--lobbied', default=20, type=int, help="Players shown in the dashboard / match")
+    ap.add_argument('--number', default=2000, type=int, help="Renders per timing")
+    args = ap.parse_args()
+
+    players = make_players(args.lobbied)
+    for p in players:
+        p.on_lobby_add(None, 0)
+    active = [ActivePlayer(p) for p in players]
+    for a_p in active:
+        a_p.assigned_faction_id = 1
+
+    lobby = SimpleNamespace(name="casual", lobbied=players, warned=[], matches=[], logs_recent=[],
+                            queued=())
+    match = SimpleNamespace(id_str="0001", status=_Status.PLAYING, owner=players[0], start_stamp=0, end_stamp=None,
+                            timeout_at=None, voice_channel=None, invited=[], players=active,
+                            online_players=active, get_log_fields=lambda max_fields: [])
+
+    dashboard = timeit.timeit(lambda: embeds.duel_dashboard(lobby), number=args.number)
+    match_embed = timeit.timeit(lambda: embeds.match_info(match), number=args.number)
+    forwarded = timeit.timeit(lambda: [(a_p.name, a_p.mention, a_p.ig_names, a_p.assigned_char_display)
+                                       for a_p in active], number=args.number)
+
+    print(f"duel_dashboard, {args.lobbied} players: {dashboard / args.number * 1e6:.1f}us per render")
+    print(f"match_info, {args.lobbied} players: {match_embed / args.number * 1e6:.1f}us per render")
+    print(f"ActivePlayer forwarded reads, {args.lobbied} players: {forwarded / args.number * 1e6:.1f}us per pass")
+    player_memory, index_memory = memory_per_player(args.players)
+    print(f"Memory, {args.players} players: {player_memory:.0f} bytes per player, "
+          f"{index_memory:.0f} bytes per player in the search index")
+
+
+if __name__ == '__main__':
+    main()
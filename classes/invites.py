@@ -1,36 +1,92 @@
-"""This class is used to represent individual invites between players to a match
-It inherits from FSBotView so that the invite class itself can be used as the view attached to the message."""
-
+"""Registry of invitations between players to a match, indexed both by inviting player and by invited player,
+with each invite expiring on its own timer."""
 
 # External Imports
+from __future__ import annotations
+import asyncio
 import discord
-
+from logging import getLogger
+from typing import Callable, Coroutine
 
 # Internal Imports
-from display.views import FSBotView
-from modules import discord_obj as d_obj, tools
-from . import Player
-from .match import BaseMatch, RankedMatch
-from .lobby import Lobby
-# TODO will need to adjust to avoid circular imports
+from modules import tools
+from .players import Player
+
+log = getLogger('fs_bot')
 
+INVITE_TIMEOUT = 300  # seconds before an invite expires
 
-class MatchInvite(FSBotView):
-    """Class to represent an invitation to a match"""
-    _all_invites = dict()  
 
-    def __init__(self,
-                 invited: Player,
-                 inviting: Player,
-                 match: BaseMatch | RankedMatch | None = None,
-                 timeout: int = 300):
+class MatchInvite:
+    """Class to represent an invitation to a match, from owner to invited.
+    match is None until the owner has a match, view is the view attached to the invite message."""
+    __slots__ = ('owner', 'invited', 'match', 'view', 'expires_at', 'timer')
 
+    def __init__(self, owner: Player, invited: Player, match=None, view: discord.ui.View | None = None,
+                 timeout: int = INVITE_TIMEOUT):
+        self.owner = owner
         self.invited = invited
-        self.inviting = inviting
         self.match = match
+        self.view = view
+        self.expires_at = tools.timestamp_now() + timeout
+        self.timer: asyncio.TimerHandle | None = None
+
+
+class InviteRegistry:
+    """
+    Invites indexed by owner id and by invited player id, so lookups, removals and expiry are O(1).
+
+    :param on_expire: Coroutine function called with an invite when it expires, after it has been removed.
+    """
+
+    def __init__(self, on_expire: Callable[[MatchInvite], Coroutine] | None = None):
+        self.__on_expire = on_expire
+        self.__by_owner: dict[int, dict[int, MatchInvite]] = {}  # owner id: {invited id: invite}
+        self.__by_invited: dict[int, dict[int, MatchInvite]] = {}  # invited id: {owner id: invite}
+
+    def add(self, owner: Player, invited: Player, match=None, view=None, timeout: int = INVITE_TIMEOUT) -> MatchInvite:
+        """Add an invite, replacing any existing invite from owner to invited, and start its expiry timer"""
+        self.remove(owner, invited)
+        invite = MatchInvite(owner, invited, match, view, timeout)
+        self.__by_owner.setdefault(owner.id, {})[invited.id] = invite
+        self.__by_invited.setdefault(invited.id, {})[owner.id] = invite
+        invite.timer = tools.call_at_stamp(invite.expires_at, self.__expire, invite)
+        return invite
+
+    def get(self, owner: Player, invited: Player) -> MatchInvite | None:
+        return self.__by_owner.get(owner.id, {}).get(invited.id)
+
+    def remove(self, owner: Player, invited: Player) -> MatchInvite | None:
+        """Remove an invite and cancel its timer, returns the invite if there was one"""
+        if not (invite := self.__by_owner.get(owner.id, {}).pop(invited.id, None)):
+            return None
+        if not self.__by_owner[owner.id]:
+            del self.__by_owner[owner.id]
+        del self.__by_invited[invited.id][owner.id]
+        if not self.__by_invited[invited.id]:
+            del self.__by_invited[invited.id]
+        if invite.timer:
+            invite.timer.cancel()
+        return invite
+
+    def from_owner(self, owner: Player) -> list[MatchInvite]:
+        """Invites sent by owner"""
+        return list(self.__by_owner.get(owner.id, {}).values())
 
-        self.__invite_message: discord.Message | None = None
+    def for_invited(self, invited: Player) -> list[MatchInvite]:
+        """Invites received by invited"""
+        return list(self.__by_invited.get(invited.id, {}).values())
 
-        super().__init__(timeout=timeout)
+    def __len__(self):
+        return sum(len(invites) for invites in self.__by_owner.values())
 
-        # MatchInvite._all_invites[#TODO FIND AN ID] = self
+    async def __expire(self, invite: MatchInvite):
+        if self.get(invite.owner, invite.invited) is not invite:
+            return  # Replaced or removed since the timer was set
+        invite.timer = None
+        self.remove(invite.owner, invite.invited)
+        if self.__on_expire:
+            try:
+                await self.__on_expire(invite)
+            except Exception as e:
+                log.error("Error expiring invite from %s to %s", invite.owner.id, invite.invited.id, exc_info=e)
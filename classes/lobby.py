@@ -3,10 +3,12 @@
 # External Imports
 from __future__ import annotations
 import asyncio
+import heapq
 import discord
-from datetime import datetime as dt, timedelta
+from collections import deque
+from itertools import chain, islice, takewhile
 from logging import getLogger
-from typing import Coroutine
+from pymongo import InsertOne
 
 # Internal Imports
 import modules.config as cfg
@@ -14,20 +16,35 @@ import modules.discord_obj as d_obj
 import modules.database as db
 from classes.players import Player
 from classes.match import BaseMatch
+from classes.invites import InviteRegistry, MatchInvite, INVITE_TIMEOUT
 from display import AllStrings as disp, embeds, views
 import modules.tools as tools
+from modules.matchmaker import Matchmaker, QueueEntry
+from modules.dm_fanout import dms
+import modules.routing as routing
 
 log = getLogger('fs_bot')
 
 RECENT_LOG_LENGTH: int = 8
 RECENT_LOG_TIMEOUT: int = 10800  # three hours
-LONGER_LOG_LENGTH: int = 30
+LONGER_LOG_LENGTH: int = 30  # logs per page of extended history
+LOG_CAPACITY: int = 200  # logs kept in memory per lobby, older logs are archived to the database
+ARCHIVE_DELAY: int = 10  # seconds to wait for further logs to archive, before writing them in one batch
+ARCHIVE_PENDING_CAPACITY: int = 2000  # logs kept waiting for the archive, oldest are dropped while it is unreachable
+TIMEOUT_WARNING: int = 300  # seconds before a lobby timeout that the player is warned
+PURGE_AFTER: int = 300  # seconds after which non admin messages in the lobby channel are deleted
+TEMP_MESSAGE_AFTER: int = 5  # seconds before lobby notices are deleted
+LONG_MESSAGE_AFTER: int = 30  # seconds before longer lobby notices are deleted
+CLEANUP_BATCH_WINDOW: int = 2  # seconds to wait for other messages due, to delete them in the same batch
+MATCHMAKING_INTERVAL: int = 15  # seconds between matchmaking passes, while at least two players are queued
 
 
 class DashboardView(views.FSBotView):
     def __init__(self, lobby):
         super().__init__(timeout=None)
         self.lobby: Lobby = lobby
+        if not self.lobby.matchmaking:
+            self.remove_item(self.matchmaking_button)
         if self.lobby.disabled:
             self.disable_all_items()
             return
@@ -37,20 +54,7 @@ class DashboardView(views.FSBotView):
             self.leave_lobby_button.disabled = True
             self.reset_lobby_button.disabled = True
             self.custom_timeout_lobby_button.disabled = True
-
-    def update(self):
-        if self.lobby.disabled:
-            self.disable_all_items()
-            return self
-        self.enable_all_items()
-        if self.lobby.lobbied:
-
-            self.add_item(self.ChallengeDropdown(self.lobby))
-        else:
-            self.leave_lobby_button.disabled = True
-            self.reset_lobby_button.disabled = True
-            self.custom_timeout_lobby_button.disabled = True
-        return self
+            self.matchmaking_button.disabled = True
 
     class ChallengeDropdown(discord.ui.Select):
         def __init__(self, lobby):
@@ -91,7 +95,8 @@ class DashboardView(views.FSBotView):
                 if not await self.lobby.send_invite(owner, invited):
                     no_dms.append(invited)
             if no_dms:
-                await disp.LOBBY_NO_DM.send_temp(inter.channel, ','.join([p.mention for p in no_dms]))
+                msg = await disp.LOBBY_NO_DM.send(inter.channel, ','.join([p.mention for p in no_dms]))
+                self.lobby.delete_later(msg, TEMP_MESSAGE_AFTER)
                 self.lobby.lobby_log(
                     f'{",".join([p.name for p in no_dms])} could not be invited, as they are not accepting DM\'s')
             remaining = [p for p in invited_players if p not in no_dms]
@@ -111,7 +116,7 @@ class DashboardView(views.FSBotView):
             else:
                 await disp.LOBBY_NO_DM_ALL.send_priv(inter, owner.mention)
 
-            self.lobby.update_now()
+            self.lobby.request_update()
 
     @discord.ui.button(label="Join Lobby", style=discord.ButtonStyle.green)
     async def join_lobby_button(self, button: discord.Button, inter: discord.Interaction):
@@ -125,7 +130,7 @@ class DashboardView(views.FSBotView):
             self.enable_all_items()
             await disp.LOBBY_JOIN.send_temp(inter, player.mention)
             self.lobby.lobby_join(player)
-            self.lobby.update_now()
+            self.lobby.request_update()
 
         else:
             await disp.LOBBY_ALREADY_IN.send_priv(inter, player.mention)
@@ -153,10 +158,26 @@ class DashboardView(views.FSBotView):
 
     @discord.ui.button(label="Extended History", style=discord.ButtonStyle.blurple)
     async def history_lobby_button(self, button: discord.Button, inter: discord.Interaction):
-        if len(self.lobby.logs) <= len(self.lobby.logs_recent):
+        logs = await self.lobby.logs_page(0)
+        if len(logs) <= len(self.lobby.logs_recent):
             await disp.LOBBY_NO_HISTORY.send_priv(inter, inter.user.mention)
             return
-        await disp.LOBBY_LONGER_HISTORY.send_priv(inter, inter.user.mention, logs=self.lobby.logs_longer)
+        await disp.LOBBY_LONGER_HISTORY.send_priv(inter, inter.user.mention, logs=logs,
+                                                  view=HistoryView(self.lobby, 0, len(logs) == LONGER_LOG_LENGTH))
+
+    @discord.ui.button(label="Matchmaking", style=discord.ButtonStyle.green)
+    async def matchmaking_button(self, button: discord.Button, inter: discord.Interaction):
+        player: Player = Player.get(inter.user.id)
+        if not await d_obj.registered_check(inter, player):
+            return
+        elif player not in self.lobby.lobbied:
+            await disp.LOBBY_NOT_IN.send_priv(inter, player.mention)
+        elif self.lobby.queue_leave(player):
+            await disp.LOBBY_QUEUE_LEAVE.send_priv(inter, player.mention)
+        else:
+            await inter.response.defer(ephemeral=True)
+            await self.lobby.queue_join(player)
+            await disp.LOBBY_QUEUE_JOIN.send_priv(inter, player.mention)
 
     @discord.ui.button(label="Leave Lobby", style=discord.ButtonStyle.red)
     async def leave_lobby_button(self, button: discord.Button, inter: discord.Interaction):
@@ -169,16 +190,50 @@ class DashboardView(views.FSBotView):
             await disp.LOBBY_NOT_IN.send_temp(inter, player.mention)
 
 
+class HistoryView(views.FSBotView):
+    """Pages through a lobbies extended history, page 0 being the most recent logs"""
+
+    def __init__(self, lobby, page, has_older):
+        super().__init__(timeout=300)
+        self.lobby: Lobby = lobby
+        self.page = page
+        self.newer_button.disabled = page == 0
+        self.older_button.disabled = not has_older
+
+    async def _show_page(self, inter: discord.Interaction, page):
+        logs = await self.lobby.logs_page(page)
+        if not logs:
+            self.older_button.disabled = True
+            return await inter.response.edit_message(view=self)
+        await disp.LOBBY_LONGER_HISTORY.edit(inter, inter.user.mention, logs=logs,
+                                             view=HistoryView(self.lobby, page, len(logs) == LONGER_LOG_LENGTH))
+
+    @discord.ui.button(label="Newer", style=discord.ButtonStyle.blurple)
+    async def newer_button(self, button: discord.Button, inter: discord.Interaction):
+        await self._show_page(inter, self.page - 1)
+
+    @discord.ui.button(label="Older", style=discord.ButtonStyle.blurple)
+    async def older_button(self, button: discord.Button, inter: discord.Interaction):
+        await self._show_page(inter, self.page + 1)
+
+
 class Lobby:
+    """
+    Lobby of players looking for matches, with its dashboard.
+    Updates are driven by state changes, and timers for real deadlines (player timeout warnings and timeouts,
+    recent logs expiring, messages to delete), so an idle lobby does no work.
+    Transient messages in the lobby channel are tracked by id and deleted in batches as they age out, the
+    channel history is only scanned on startup.
+    """
     all_lobbies = {}
-    UPDATE_DELAY = 10  # seconds to wait between automatic updates
+    UPDATE_INTERVAL = 1  # minimum seconds between dashboard updates, requests in between are coalesced
 
     @classmethod
-    async def create_lobby(cls, name, channel, match_type=BaseMatch, timeout_minutes=30):
+    async def create_lobby(cls, name, channel, match_type=BaseMatch, timeout_minutes=30, matchmaking=False):
         if name in Lobby.all_lobbies:
             raise tools.UnexpectedError("%s lobby already exists!")
 
-        obj = cls(name, channel, match_type, timeout_minutes)
+        obj = cls(name, channel, match_type, timeout_minutes, matchmaking)
         await obj.update()
 
         return obj
@@ -189,13 +244,10 @@ class Lobby:
 
     @staticmethod
     def channel_to_lobby(channel: discord.TextChannel) -> Lobby | None:
-        channel_dict = {lobby.channel: lobby for lobby in Lobby.all_lobbies.values()}
-        try:
-            return channel_dict[channel]
-        except KeyError:
-            return None
+        lobby = routing.get(channel.id)
+        return lobby if isinstance(lobby, Lobby) else None
 
-    def __init__(self, name, channel, match_type, timeout_minutes):
+    def __init__(self, name, channel, match_type, timeout_minutes, matchmaking=False):
         # vars
         self.name = name
         self.channel: discord.TextChannel = channel
@@ -203,10 +255,28 @@ class Lobby:
         self.timeout_minutes = timeout_minutes
         self.__disabled = False
 
+        # Opt-in ELO matchmaking queue, for lobbied players
+        self.__matchmaker: Matchmaker | None = Matchmaker() if matchmaking else None
+        self.__matchmaking_timer: asyncio.TimerHandle | None = None
+
         # update
         self.__update_lock = asyncio.Lock()
-        self.__next_update_task: asyncio.Task | None = None
-        self.__next_update: Coroutine | None = None
+        self.__version = 0  # lobby state version, bumped on every change shown by the dashboard
+        self.__dashboard_version = -1  # version the dashboard embed was built at
+        self.__view_version = -1  # version the dashboard view was built at
+        self.__update_task: asyncio.Task | None = None
+        self.__update_requested = False
+        self.__last_update = 0.0  # loop time the last update finished
+
+        # Deadline timers
+        self.__timeout_timers: dict[Player, asyncio.TimerHandle] = {}  # next timeout warning / timeout per player
+        self.__log_expiry_timer: asyncio.TimerHandle | None = None
+        self.__cleanup_timer: asyncio.TimerHandle | None = None
+        self.__cleanup_at = 0  # timestamp the cleanup timer is set for
+
+        # Transient messages to delete, message_id: timestamp to delete at, and heap of (timestamp, message_id)
+        self.__transient: dict[int, int] = {}
+        self.__transient_heap: list[tuple[int, int]] = []
 
         # Lobby Ping
         self.__lobby_ping_task: asyncio.Task | None = None
@@ -221,18 +291,29 @@ class Lobby:
 
         #  Containers
         self.__lobbied_players: list[Player] = []  # List of players currently in lobby
-        self.__invites: dict[Player, list[Player]] = {}  # list of invites by owner.id: list[invited players]
+        self.__invites = InviteRegistry(on_expire=self._invite_expired)  # invites by owner and by invited player
         # self.__warned_players: list[Player] = []  # list of players that have been warned of impending timeout
-        self.__warned_players: dict[
-            Player, discord.Message] = {}  # dict of (Player, warning_message) for players warned of impending timeout
+        # dict of (Player, warning_message) for players warned of impending timeout, message None while being sent
+        self.__warned_players: dict[Player, discord.Message | None] = {}
         self.__matches: list[BaseMatch] = []  # list of matches created by this lobby
-        self.__logs: list[(int, str)] = []  # lobby logs recorded as a list of tuples, (timestamp, message)
+        # lobby logs recorded as tuples, (timestamp, message), in a ring buffer of the last LOG_CAPACITY logs
+        self.__logs: deque[tuple[int, str]] = deque(maxlen=LOG_CAPACITY)
+        self.__archive_pending: list[tuple[int, str]] = []  # logs dropped from the ring buffer, not yet archived
+        self.__archive_timer: asyncio.TimerHandle | None = None
 
         Lobby.all_lobbies[self.name] = self
+        routing.register(self.channel.id, self)
 
     def lobby_log(self, message):
+        if len(self.__logs) == LOG_CAPACITY:
+            self.__archive_pending.append(self.__logs[0])
+            self._trim_archive_pending()
+            if not self.__archive_timer:
+                self.__archive_timer = tools.call_at_stamp(tools.timestamp_now() + ARCHIVE_DELAY,
+                                                           self._archive_logs)
         self.__logs.append((tools.timestamp_now(), message))
         log.info(f'[{self.name}]Lobby Log: {message}')
+        self.state_changed()
 
     @property
     def logs(self):
@@ -240,12 +321,60 @@ class Lobby:
 
     @property
     def logs_recent(self):
-        return [item for item in self.__logs if
-                item[0] > tools.timestamp_now() - RECENT_LOG_TIMEOUT][-RECENT_LOG_LENGTH:]
+        """Last RECENT_LOG_LENGTH logs within RECENT_LOG_TIMEOUT, walking back from the newest log"""
+        cutoff = tools.timestamp_now() - RECENT_LOG_TIMEOUT
+        recent = list(takewhile(lambda item: item[0] > cutoff, islice(reversed(self.__logs), RECENT_LOG_LENGTH)))
+        recent.reverse()
+        return recent
 
     @property
     def logs_longer(self):
-        return self.__logs[-LONGER_LOG_LENGTH:]
+        return self.__logs_newest(0, LONGER_LOG_LENGTH)[::-1]
+
+    def __logs_newest(self, start, stop) -> list[tuple[int, str]]:
+        """In memory logs, including those waiting to be archived, indexed from the newest log"""
+        return list(islice(chain(reversed(self.__logs), reversed(self.__archive_pending)), start, stop))
+
+    async def logs_page(self, page: int) -> list[tuple[int, str]]:
+        """Page of LONGER_LOG_LENGTH logs, oldest first, page 0 being the most recent.
+        Pages past the in memory logs are read from the archive."""
+        start = page * LONGER_LOG_LENGTH
+        logs = self.__logs_newest(start, start + LONGER_LOG_LENGTH)
+        if len(logs) < LONGER_LOG_LENGTH:
+            in_memory = len(self.__logs) + len(self.__archive_pending)
+            try:
+                archived = await db.async_db_call(db.find_page, 'lobby_logs', {'lobby': self.name},
+                                                  [('stamp', -1), ('_id', -1)], max(start - in_memory, 0),
+                                                  LONGER_LOG_LENGTH - len(logs))
+            except db.ERRORS as e:
+                log.error("Could not read %s lobby archived logs: %s", self.name, e)
+                archived = []
+            logs.extend((doc['stamp'], doc['message']) for doc in archived)
+        return logs[::-1]
+
+    async def _archive_logs(self):
+        """Write logs dropped from the ring buffer to the archive collection, in one batch"""
+        self.__archive_timer = None
+        batch, self.__archive_pending = self.__archive_pending, []
+        requests = [InsertOne({'lobby': self.name, 'stamp': stamp, 'message': message}) for stamp, message in batch]
+        try:
+            await db.async_db_background_call(db.bulk_write, 'lobby_logs', requests)
+        except db.ERRORS as e:
+            log.error("Could not archive %s %s lobby logs, retrying: %s", len(batch), self.name, e)
+            self.__archive_pending[:0] = batch  # logs added while writing stay newest
+            self._trim_archive_pending()
+            if not self.__archive_timer:
+                self.__archive_timer = tools.call_at_stamp(tools.timestamp_now() + ARCHIVE_DELAY,
+                                                           self._archive_logs)
+            return
+        if self.__archive_pending and not self.__archive_timer:
+            self.__archive_timer = tools.call_at_stamp(tools.timestamp_now() + ARCHIVE_DELAY, self._archive_logs)
+
+    def _trim_archive_pending(self):
+        """Drop the oldest logs waiting for the archive past ARCHIVE_PENDING_CAPACITY"""
+        if (excess := len(self.__archive_pending) - ARCHIVE_PENDING_CAPACITY) > 0:
+            del self.__archive_pending[:excess]
+            log.warning("Dropped %s %s lobby logs waiting for the archive", excess, self.name)
 
     @property
     def lobbied(self):
@@ -255,6 +384,15 @@ class Lobby:
     def matches(self):
         return self.__matches
 
+    @property
+    def matchmaking(self) -> bool:
+        return self.__matchmaker is not None
+
+    @property
+    def queued(self):
+        """Players in the matchmaking queue"""
+        return self.__matchmaker.queued if self.__matchmaker else ()
+
     @property
     def warned(self):
         return self.__warned_players
@@ -280,16 +418,18 @@ class Lobby:
 
     def view(self, new=False):
         """Either return the current view, or create a new view from the set view_function
-        New param will force a new view, otherwise one will only be created if required"""
-        if not new and self.__view:
-            return self.__view.update()
-        return self.__view_func(self)
+        New param will force a new view, otherwise one will only be created if the lobby state changed"""
+        if new or not self.__view or self.__view_version != self.__version:
+            self.__view = self.__view_func(self)
+            self.__view_version = self.__version
+        return self.__view
 
     async def update_dashboard_message(self, action="send", force=False):
-        """Either sends a new dashboard message, or edits the existing message if required."""
-        new_embed = self._new_embed()
-        if not tools.compare_embeds(new_embed, self.dashboard_embed):
-            self.dashboard_embed = new_embed
+        """Either sends a new dashboard message, or edits the existing message if required.
+        The embed is only rebuilt if the lobby state changed since it was last built."""
+        if not self.dashboard_embed or self.__dashboard_version != self.__version:
+            self.dashboard_embed = self._new_embed()
+            self.__dashboard_version = self.__version
             force = True
 
         match action:
@@ -309,7 +449,7 @@ class Lobby:
             msg_id = msg_ids[self.name]
             self.dashboard_msg = await self.channel.fetch_message(msg_id)
             self.dashboard_msg = await self.update_dashboard_message(action='edit', force=True)
-        except (KeyError, discord.NotFound, AttributeError):
+        except (KeyError, TypeError, discord.NotFound, AttributeError):
             log.info('No previous embed found for %s, creating new message...', self.name)
             self.dashboard_msg = await self.update_dashboard_message()
         finally:
@@ -318,15 +458,11 @@ class Lobby:
             await self.channel.purge(check=self.dashboard_purge_check)
 
     async def update_dashboard(self):
-        """Checks if dashboard exists and either creates one, or updates the current dashboard and purges messages
-        older than 5 minutes """
+        """Checks if dashboard exists and either creates one, or updates the current dashboard"""
         if not self.dashboard_msg:
             await self.create_dashboard()
             return
 
-        await self.channel.purge(before=(dt.now() - timedelta(minutes=5)),
-                                 check=self.dashboard_purge_check)
-
         # Edit dashboard message if required, if not editable, send new message
         try:
             await self.update_dashboard_message('edit')
@@ -338,6 +474,61 @@ class Lobby:
         """Schedules a dashboard update"""
         d_obj.bot.loop.create_task(self.update_dashboard())
 
+    def on_channel_message(self, message: discord.Message):
+        """Schedule deletion of a message posted in the lobby channel, once it is older than PURGE_AFTER.
+        The bots own messages are skipped, the dashboard may arrive before dashboard_msg is set, and other bot notices
+        are scheduled for deletion when sent."""
+        if message.author != d_obj.bot.user and self.dashboard_purge_check(message):
+            self.delete_later(message, int(message.created_at.timestamp()) + PURGE_AFTER - tools.timestamp_now())
+
+    def delete_later(self, message: discord.Message, delay: int = 0):
+        """Schedule deletion of a message in the lobby channel after delay seconds, batched with other deletions.
+        If the message is already scheduled, the earlier deletion is kept."""
+        delete_at = tools.timestamp_now() + delay
+        if message.id in self.__transient and self.__transient[message.id] <= delete_at:
+            return
+        self.__transient[message.id] = delete_at
+        heapq.heappush(self.__transient_heap, (delete_at, message.id))
+        self._schedule_cleanup()
+
+    def _schedule_cleanup(self):
+        """Set the cleanup timer for the next message due, if earlier than the current timer"""
+        if not self.__transient_heap:
+            return
+        cleanup_at = self.__transient_heap[0][0] + CLEANUP_BATCH_WINDOW
+        if self.__cleanup_timer and self.__cleanup_at <= cleanup_at:
+            return
+        if self.__cleanup_timer:
+            self.__cleanup_timer.cancel()
+        self.__cleanup_at = cleanup_at
+        self.__cleanup_timer = tools.call_at_stamp(cleanup_at, self._cleanup_deadline)
+
+    async def _cleanup_deadline(self):
+        """Delete all transient messages that are due, in bulk"""
+        self.__cleanup_timer = None
+        now = tools.timestamp_now()
+        due = []
+        while self.__transient_heap and self.__transient_heap[0][0] <= now:
+            delete_at, msg_id = heapq.heappop(self.__transient_heap)
+            if self.__transient.get(msg_id) == delete_at:  # otherwise superseded by an earlier deletion
+                del self.__transient[msg_id]
+                due.append(discord.Object(msg_id))
+        self._schedule_cleanup()
+
+        for i in range(0, len(due), 100):  # bulk deletes are limited to 100 messages
+            batch = due[i:i + 100]
+            try:
+                await self.channel.delete_messages(batch, reason="Lobby cleanup")
+            except discord.HTTPException as e:
+                log.info("Bulk delete failed in %s lobby, deleting individually: %s", self.name, e)
+                for msg in batch:
+                    try:
+                        await self.channel.get_partial_message(msg.id).delete()
+                    except discord.NotFound:
+                        pass
+                    except discord.HTTPException as e:
+                        log.warning("Could not delete message %s in %s lobby: %s", msg.id, self.name, e)
+
     async def check_player_timeout_status(self, player: Player) -> bool:
         """Checks if a player should have timeout_stamp updated based on Player discord Status.
         Updates players timestamp if necessary, returns whether timestamp was updated"""
@@ -354,45 +545,79 @@ class Lobby:
 
         if player in self.__lobbied_players:
             player.set_lobby_timeout(timeout_at)
-            if msg := self.__warned_players.pop(player, None):
-                try:
-                    await msg.delete()
-                except discord.NotFound:
-                    pass
+            if player in self.__warned_players:
+                if msg := self.__warned_players.pop(player):
+                    self.delete_later(msg)
                 self.lobby_log(f"{player.name} reset their lobby timeout.")
-                await self.update()
+            self._schedule_timeout(player)
             return True
         return False
 
-    async def update_timeouts(self):
-        """Check all lobbied players for timeouts, send timeout messages"""
-        for p in self.lobbied:
-            # Update timeout stamps
+    async def on_presence_change(self, player: Player):
+        """A lobbied players Discord activity changed, their timeout counts from their last activity"""
+        if player in self.__lobbied_players:
+            await self.lobby_timeout_set(player)
+
+    def _schedule_timeout(self, player: Player):
+        """Set the players timer to their timeout warning, or their timeout if already warned"""
+        self._cancel_timeout(player)
+        deadline = player.lobby_timeout_stamp
+        if player not in self.__warned_players:
+            deadline -= TIMEOUT_WARNING
+        self.__timeout_timers[player] = tools.call_at_stamp(deadline, self._timeout_deadline, player)
+
+    def _cancel_timeout(self, player: Player):
+        if timer := self.__timeout_timers.pop(player, None):
+            timer.cancel()
+
+    async def _timeout_deadline(self, player: Player):
+        """Warn or time out a player when their timer expires, unless they are active on Discord"""
+        self.__timeout_timers.pop(player, None)
+        if player not in self.__lobbied_players or await self.check_player_timeout_status(player):
+            return
 
-            if await self.check_player_timeout_status(p):
-                pass
+        # Timeout if current time greater than timeout stamp
+        if player.lobby_timeout_stamp <= tools.timestamp_now():
+            await self.lobby_leave(player, reason="timeout")
+            return
 
-            # Timeout if current time greater than timeout stamp
-            elif p.lobby_timeout_stamp < tools.timestamp_now():
-                await self.lobby_leave(p, reason="timeout")
+        # Warn if current time less than TIMEOUT_WARNING seconds before timeout stamp
+        if player not in self.__warned_players:
+            # Recorded before logging, so the dashboard rebuilt for the log shows the warning
+            self.__warned_players[player] = None
+            self.lobby_log(f'{player.name} will soon be timed out of the lobby.')
+            msg = await disp.LOBBY_TIMEOUT_SOON.send(
+                self.channel, player.mention, tools.format_time_from_stamp(player.lobby_timeout_stamp, 'R'))
+            if player in self.__warned_players:
+                self.__warned_players[player] = msg
+            else:  # Left the lobby or reset their timeout while the warning was sent
+                if msg:
+                    self.delete_later(msg)
+                return
+        self._schedule_timeout(player)
 
-            # Warn if current time less than 5 minutes (300 s) before timeout stamp
-            elif p.lobby_timeout_stamp - 300 < tools.timestamp_now() and p not in self.__warned_players:
-                self.lobby_log(f'{p.name} will soon be timed out of the lobby.')
-                self.__warned_players[p] = await disp.LOBBY_TIMEOUT_SOON.send(self.channel, p.mention,
-                                                                              tools.format_time_from_stamp(
-                                                                                  p.lobby_timeout_stamp, 'R'))
+    def _schedule_log_expiry(self):
+        """Update the dashboard when the oldest recent log expires"""
+        if self.__log_expiry_timer:
+            self.__log_expiry_timer.cancel()
+            self.__log_expiry_timer = None
+        if recent := self.logs_recent:
+            self.__log_expiry_timer = tools.call_at_stamp(recent[0][0] + RECENT_LOG_TIMEOUT + 1,
+                                                          self.state_changed)
 
     def remove_match(self, match):
         """Remove a match from the lobby"""
         if match in self.__matches:
             self.__matches.remove(match)
+            self.state_changed()
 
     def update_matches(self):
         """Remove matches from match list if ended"""
-        for match in self.__matches:
-            if match.is_ended:
-                self.__matches.remove(match)
+        ended = [match for match in self.__matches if match.is_ended]
+        for match in ended:
+            self.__matches.remove(match)
+        if ended:
+            self.__version += 1
 
     def _schedule_pings(self, player):
         """Schedule a Ping task after a player joins a lobby"""
@@ -414,83 +639,72 @@ class Lobby:
 
     async def _send_lobby_pings(self, *players):
         """Gets list of players that could potentially be pinged, checks online status pursuant to preferences.
-        Pings passing players, and marks them as pinged."""
-        # TODO This can be refactored to be more efficient, but it's not a priority.
-        # Could use new Player.member to avoid the extra dict mapping
-
+        Pings passing players through the DM fan-out, and marks them as pinged."""
         # Collect set of all players requesting these skill levels, if they haven't already been pinged
         players_to_ping = set()
-        for joined in players:
-            players_to_ping.update(Player.get_players_to_ping(joined.skill_level))
+        for level in {joined.skill_level for joined in players}:
+            players_to_ping.update(Player.get_players_to_ping(level))
         if not players_to_ping:
             return
 
-        # Map discord member objects to player objects, ensure Member object exists.
-        player_membs_dict = {d_obj.guild.get_member(to_ping.id): to_ping for to_ping in players_to_ping
-                             if d_obj.guild.get_member(to_ping.id) is not None}
-        # Actually check online Status if pref requires it
-        to_remove = []
-        for p_m in player_membs_dict:
-            if player_membs_dict[p_m].lobby_ping_pref == 1 and p_m.status != discord.Status.online:
-                to_remove.append(p_m)
-        for p_m in to_remove:
-            player_membs_dict.pop(p_m)
-
-        # build list of ping coroutines to execute
-        ping_coros = []
-        for p_m in player_membs_dict:
-            player_membs_dict[p_m].lobby_last_ping = tools.timestamp_now()  # mark players as pinged
-            ping_coros.append(disp.LOBBY_PING.send(p_m, ', '.join([joined.mention for joined in players]), self.mention,
-                                                   player_membs_dict[p_m].lobby_ping_freq))
-        # Actually send all pings
-        sent_pings = await asyncio.gather(*ping_coros, return_exceptions=True)
+        # Ensure Member object exists, and check online status if pref requires it
+        joined_str = ', '.join([joined.mention for joined in players])
+        to_ping, sends = [], []
+        now = tools.timestamp_now()
+        for p in players_to_ping:
+            if not (memb := d_obj.guild.get_member(p.id)):
+                continue
+            if p.lobby_ping_pref == 1 and memb.status != discord.Status.online:
+                continue
+            p.lobby_last_ping = now  # mark players as pinged
+            to_ping.append(p)
+            sends.append((memb, disp.LOBBY_PING, (joined_str, self.mention, p.lobby_ping_freq)))
+
+        # Actually send all pings, within DM rate limits
+        sent_pings = await dms.fan_out(f"{self.name} lobby pings", sends)
 
         # Log Which Users were Pinged
-        pinged = []
-        for message in sent_pings:
-            if isinstance(message, Exception):
-                log.info(f"Error sending lobby ping: {message}")
-                continue
-            if isinstance(message, discord.Message):
-                pinged.append(Player.get(message.channel.recipient.id).name)
+        pinged = [p.name for p, message in zip(to_ping, sent_pings) if message]
         if pinged:
             log.info(f"{', '.join(pinged)} pinged.")
 
     async def update(self):
-        """Updates Lobby, including timeouts, displays and attached matches."""
+        """Updates Lobby, including displays and attached matches."""
 
         try:
             async with self.__update_lock:
 
                 self.update_matches()
-                await self.update_timeouts()
                 await self.update_dashboard()
+                self._schedule_log_expiry()
         except asyncio.CancelledError:
             pass
         finally:
-            # schedule next update
-            d_obj.bot.loop.call_later(0.01, self._schedule_update_task)
-
-    def update_now(self):
-        """Schedule an update to run, without the update_task delay"""
-        self._cancel_update()
-        self.__next_update_task = d_obj.bot.loop.create_task(self.update(), name=f"Lobby [{self.name}] Updater")
+            self.__last_update = d_obj.bot.loop.time()
 
-    async def _update_task(self):
-        """Task that runs the lobby update loop, after a set delay"""
-        await asyncio.sleep(self.UPDATE_DELAY)
-        await self.update()
+    @property
+    def version(self) -> int:
+        return self.__version
 
-    def _schedule_update_task(self):
-        """Schedules new update task, removes previous task"""
-        self._cancel_update()
+    def state_changed(self):
+        """Bump the lobby state version, and request an update to display the change"""
+        self.__version += 1
+        self.request_update()
 
-        self.__next_update_task = d_obj.bot.loop.create_task(self._update_task(), name=f"Lobby [{self.name}] Updater")
+    def request_update(self):
+        """Request a lobby update after a state change.  Runs immediately if the lobby has been idle, otherwise
+        requests are coalesced into one update at most every UPDATE_INTERVAL seconds."""
+        self.__update_requested = True
+        if not self.__update_task or self.__update_task.done():
+            self.__update_task = d_obj.bot.loop.create_task(self._update_task(), name=f"Lobby [{self.name}] Updater")
 
-    def _cancel_update(self):
-        """Cancel the next upcoming update, if it hasn't completed"""
-        if self.__next_update_task and not self.__next_update_task.done():
-            self.__next_update_task.cancel()
+    async def _update_task(self):
+        """Task that runs requested updates, until no more have been requested"""
+        while self.__update_requested:
+            if (wait := self.__last_update + self.UPDATE_INTERVAL - d_obj.bot.loop.time()) > 0:
+                await asyncio.sleep(wait)
+            self.__update_requested = False
+            await self.update()
 
     async def disable(self):
         """Disable the Lobby"""
@@ -499,7 +713,6 @@ class Lobby:
         self.__disabled = True
         await asyncio.gather(*[self.lobby_leave(p) for p in self.lobbied])
         self.lobby_log("Lobby Disabled")
-        self._schedule_update_task()
         return True
 
     async def enable(self):
@@ -508,7 +721,6 @@ class Lobby:
             return False
         self.__disabled = False
         self.lobby_log("Lobby Enabled")
-        self._schedule_update_task()
         return True
 
     @property
@@ -521,21 +733,21 @@ class Lobby:
         if player in self.__lobbied_players:
             player.on_lobby_leave()
             self.__lobbied_players.remove(player)
+            self._cancel_timeout(player)
+            if self.__matchmaker:
+                self.__matchmaker.remove(player)
             if msg := self.__warned_players.pop(player, None):
-                try:
-                    await msg.delete()
-                except discord.NotFound:
-                    pass
+                self.delete_later(msg)
 
             if reason:
                 self.lobby_log(f'{player.name} left the lobby due to {reason}.')
-                await disp.LOBBY_LEAVE_REASON.send_long(self.channel, player.mention, reason)
+                self.delete_later(await disp.LOBBY_LEAVE_REASON.send(self.channel, player.mention, reason),
+                                  LONG_MESSAGE_AFTER)
             elif match:
                 self.lobby_log(f'{player.name} joined Match: {match.id_str}')
             else:
                 self.lobby_log(f'{player.name} left the lobby.')
-                await disp.LOBBY_LEAVE.send_temp(self.channel, player.mention)
-            self.update_now()
+                self.delete_later(await disp.LOBBY_LEAVE.send(self.channel, player.mention), TEMP_MESSAGE_AFTER)
             return True
         else:
             return False
@@ -548,6 +760,7 @@ class Lobby:
             timeout_at = timeout_at or tools.timestamp_now() + self.timeout_minutes * 60
             player.on_lobby_add(self, timeout_at)
             self.__lobbied_players.append(player)
+            self._schedule_timeout(player)
             self.lobby_log(f'{player.name} joined the lobby.')
 
             # schedule lobby ping task, to avoid pinging if a player leaves the lobby before the ping is sent
@@ -557,39 +770,105 @@ class Lobby:
         else:
             return False
 
+    async def queue_join(self, player: Player) -> bool:
+        """Add a lobbied player to the matchmaking queue, at their current ELO.  Returns True if added"""
+        if not self.__matchmaker or player not in self.__lobbied_players or player in self.__matchmaker:
+            return False
+        stats = await player.get_or_fetch_stats()
+        factions = frozenset(player.pref_factions) or frozenset(cfg.teams.values())
+        self.__matchmaker.add(QueueEntry(player, stats.elo, tools.timestamp_now(), player.skill_level,
+                                         frozenset(player.req_skill_levels or ()), factions))
+        self.lobby_log(f'{player.name} joined the matchmaking queue.')
+        self._schedule_matchmaking(0)
+        return True
+
+    def queue_leave(self, player: Player) -> bool:
+        """Remove a player from the matchmaking queue.  Returns True if removed"""
+        if not self.__matchmaker or not self.__matchmaker.remove(player):
+            return False
+        self.lobby_log(f'{player.name} left the matchmaking queue.')
+        return True
+
+    def _schedule_matchmaking(self, delay=MATCHMAKING_INTERVAL):
+        if not self.__matchmaking_timer:
+            self.__matchmaking_timer = tools.call_at_stamp(tools.timestamp_now() + delay, self._matchmaking_pass)
+
+    def _can_matchmake(self, player: Player) -> bool:
+        """Whether a queued player can be paired: still in the lobby, not in a match, registered and not timed out"""
+        return player.lobby is self and not player.match and player.is_registered and not player.is_timeout
+
+    async def _matchmaking_pass(self):
+        """Pair queued players, and create their matches as if the longest waiting player invited the other"""
+        self.__matchmaking_timer = None
+        if ineligible := [player for player in self.__matchmaker.queued if not self._can_matchmake(player)]:
+            for player in ineligible:
+                self.__matchmaker.remove(player)
+            self.state_changed()
+        for entry, other in self.__matchmaker.pair(tools.timestamp_now()):
+            owner, player = entry.key, other.key
+            if not (self._can_matchmake(owner) and self._can_matchmake(player)):
+                # Changed while an earlier match of the pass was created, re-queue whoever can still be paired
+                for still_queued in (e for e in (entry, other) if self._can_matchmake(e.key)):
+                    self.__matchmaker.add(still_queued)
+                self.state_changed()
+                continue
+            self.lobby_log(f'Matchmaking paired {owner.name} [{int(entry.elo)}] with {player.name} [{int(other.elo)}]')
+            try:
+                await self.accept_invite(owner, player)
+            except Exception as e:
+                log.error("Error creating matchmaking match for %s and %s", owner.id, player.id, exc_info=e)
+        if len(self.__matchmaker) >= 2:
+            self._schedule_matchmaking()
+
     async def send_invite(self, owner, invited) -> BaseMatch | bool:
         """Send an invitation to a player, and invite them to a match if sent"""
-        for _ in range(3):
-            try:
-                memb = invited.member or await invited.get_user()
-                view = views.InviteView(self, owner, invited)
-                name_str = f'{owner.mention}({owner.name})[{owner.skill_level.rank}]'
-                invite_timeout = tools.format_time_from_stamp(tools.timestamp_now() + view.timeout, "R")
-                await disp.DM_INVITED.send(memb, invited.mention, name_str, invite_timeout, view=view)
-                return self.invite(owner, invited)
-            except (discord.Forbidden, tools.UnexpectedError):
-                return False
-
-    def invite(self, owner: Player, invited: Player):
-        """Invite Player to match, if match already existed returns match.  Returns False if player couldn't be DM'd"""
+        try:
+            memb = invited.member or await invited.get_user()
+        except (discord.HTTPException, tools.UnexpectedError):
+            return False
+        view = views.InviteView(self, owner, invited)
+        name_str = f'{owner.mention}({owner.name})[{owner.skill_level.rank}]'
+        invite_timeout = tools.format_time_from_stamp(tools.timestamp_now() + INVITE_TIMEOUT, "R")
+        if not await dms.send(memb, disp.DM_INVITED, invited.mention, name_str, invite_timeout, view=view):
+            return False
+        return self.invite(owner, invited, view)
+
+    def invite(self, owner: Player, invited: Player, view=None):
+        """Invite Player to match, if match already existed returns match.  Returns False if player couldn't be DM'd
+        The invite expires after INVITE_TIMEOUT, view is the invites view to expire with it."""
         if owner.match:
             if owner.match.owner == owner:
                 owner.match.invite(invited)
+                self.__invites.add(owner, invited, match=owner.match, view=view)
                 return owner.match
             else:
                 raise tools.UnexpectedError("Non match owner attempted to invite player")
 
         else:
-            try:
-                self.__invites[owner.id].append(invited)
-                return True
-            except KeyError:
-                self.__invites[owner.id] = [invited]
-                return True
+            self.__invites.add(owner, invited, view=view)
+            return True
+
+    async def _invite_expired(self, invite: MatchInvite):
+        """Withdraw an expired invite from its match, and expire its view"""
+        if invite.match:
+            invite.match.decline_invite(invite.invited)
+        if invite.view:
+            await invite.view.expire()
+
+    @staticmethod
+    def can_accept(owner: Player, player: Player) -> bool:
+        """Whether player can accept an invite from owner: both registered and not timed out, player not already in
+        a match, and owner either not in a match or owning it"""
+        if not (owner.is_registered and player.is_registered) or owner.is_timeout or player.is_timeout:
+            return False
+        if player.match:
+            return False
+        return not owner.match or owner.match.owner == owner
 
     async def accept_invite(self, owner, player):
         """Accepts invite from owner to player, if match doesn't exist then creates it and returns match.
         If owner has since joined a different match, returns false."""
+        invite = self.__invites.remove(owner, player)
         if owner.match and owner.match.owner == owner:
             match = owner.match
             if not await match.join_match(player):
@@ -597,18 +876,17 @@ class Lobby:
             await self.lobby_leave(player, match)
             return match
         elif owner.active:
-            self.decline_invite(owner, player)
+            if invite and invite.match:
+                invite.match.decline_invite(player)
             return False
         else:
 
             match = await self.__match_type.create(owner, player, lobby=self)
             self.__matches.append(match)
 
-            if owner.id in self.__invites:
-                self.__invites[owner.id].remove(player)
-                for other_player in self.__invites[owner.id]:
-                    match.invite(other_player)
-                del self.__invites[owner.id]
+            for other_invite in self.__invites.from_owner(owner):
+                other_invite.match = match
+                match.invite(other_invite.invited)
             await asyncio.gather(self.lobby_leave(player, match),
                                  self.lobby_leave(owner, match))
             return match
@@ -617,19 +895,11 @@ class Lobby:
         """Decline an invitation from owner to player"""
         if owner.match and owner.match.owner == owner:
             owner.match.decline_invite(player)
-        if owner.id in self.__invites:
-            self.__invites[owner.id].remove(player)
-            if not self.__invites[owner.id]:
-                del self.__invites[owner.id]
+        if (invite := self.__invites.remove(owner, player)) and invite.match:
+            invite.match.decline_invite(player)
 
     def already_invited(self, owner, invited_players):
         """Check which players in a given list the owner has already invited to a match"""
-        already_invited_list = []
-        for match in self.__matches:
-            if match.owner.id == owner.id:
-                already_invited_list.extend(
-                    [p for p in invited_players if p in match.invited])  # check matches for already invited players
-        if owner.id in self.__invites:
-            already_invited_list.extend(  # check invites for already invited players
-                [p for p in invited_players if p in self.__invites[owner.id]])
-        return already_invited_list
+        owned_match = owner.match if owner.match and owner.match.owner == owner else None
+        return [p for p in invited_players
+                if self.__invites.get(owner, p) or (owned_match and owned_match.is_invited(p))]
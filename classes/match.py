@@ -16,6 +16,10 @@ from display import AllStrings as disp, embeds, views
 import modules.tools as tools
 from classes.players import Player, ActivePlayer
 import modules.database as db
+import modules.match_summary as match_summary
+from modules.id_allocator import IdAllocator
+from modules.dm_fanout import dms
+import modules.routing as routing
 import modules.accounts_handler as accounts
 from classes.player_stats import PlayerStats
 
@@ -23,7 +27,6 @@ log = getLogger('fs_bot')
 
 MATCH_TIMEOUT_TIME = 900
 MATCH_WARN_TIME = 600
-_match_id_counter = 0
 
 
 class Round(NamedTuple):
@@ -70,6 +73,7 @@ class EndCondition(Enum):
 class BaseMatch:
     _active_matches = dict()
     _recent_matches = dict()
+    match_ids = IdAllocator('matches', seed_collection='matches')  # Shared by all match types
     UPDATE_DELAY = 15  # number of seconds to delay updates by
     MAX_PLAYERS = 10
     TYPE = "Casual"
@@ -184,11 +188,9 @@ class BaseMatch:
             await inter.response.defer(ephemeral=True)
             await self.match.toggle_voice_lock()
 
-    def __init__(self, owner: Player, player: Player, lobby):
+    def __init__(self, match_id: int, owner: Player, player: Player, lobby):
         # Vars
-        global _match_id_counter
-        _match_id_counter += 1
-        self.__id = _match_id_counter
+        self.__id = match_id
         self.owner = owner
         self.__lobby = lobby
         self.start_stamp = tools.timestamp_now()
@@ -220,7 +222,7 @@ class BaseMatch:
         self.__players: list[ActivePlayer] = [owner.on_playing(self),
                                               player.on_playing(self)]  # List of ActivePlayer, add owners active_player
         self.__previous_players: list[Player] = list()  # list of Player objects, who have left the match
-        self.__invited = list()
+        self.__invited: dict[Player, None] = dict()  # invited players, as an insertion ordered set
         self.match_log = list()  # logs recorded as list of tuples, (timestamp, message, Public)
 
         self.__account_check_tasks = [asyncio.create_task(
@@ -235,10 +237,6 @@ class BaseMatch:
     def active_matches_dict(cls):
         return BaseMatch._active_matches
 
-    @classmethod
-    def active_match_thread_ids(cls):
-        return {match.thread.id: match for match in BaseMatch._active_matches.values()}
-
     @classmethod
     def get(cls, match_id: int) -> BaseMatch | RankedMatch:
         return cls._active_matches.get(match_id)
@@ -247,7 +245,8 @@ class BaseMatch:
     def get_by_thread(cls, thread: discord.Thread | int) -> BaseMatch | RankedMatch:
         if isinstance(thread, discord.Thread):
             thread = thread.id
-        return cls.active_match_thread_ids().get(thread)
+        match = routing.get(thread)
+        return match if isinstance(match, BaseMatch) else None
 
     @classmethod
     async def end_all_matches(cls):
@@ -257,16 +256,9 @@ class BaseMatch:
 
     @classmethod
     async def create(cls, owner: Player, invited: Player, *, base_class=None, lobby=None) -> RankedMatch | BaseMatch:
-        # init _match_id_counter if first match created
-        global _match_id_counter
-        if not _match_id_counter:
-            last_match = await db.async_db_call(db.get_last_element, 'matches')
-            if last_match:
-                _match_id_counter = last_match['_id']
-
         # Create Match Object, init channels + first update
         base_class = base_class or cls
-        obj = base_class(owner, invited, lobby)
+        obj = base_class(await BaseMatch.match_ids.next_id(), owner, invited, lobby)
         obj.log(f'{owner.name} created the match with {invited.name}')
 
         await obj._make_channels()  # Make thread ahd voice channel
@@ -293,6 +285,7 @@ class BaseMatch:
             self.thread: discord.Thread = await self.__lobby.channel.create_thread(
                 name=f'{self.TYPE}┊{self.id_str}┊'
             )
+            routing.register(self.thread.id, self)
             # Stop players from manually adding users to the thread
             await self.thread.edit(invitable=False)
 
@@ -375,12 +368,13 @@ class BaseMatch:
         if len(self.__players) >= self.MAX_PLAYERS:
             return False
         #  Joins player to match and updates permissions
-        if player in self.__invited:
-            self.__invited.remove(player)
+        self.__invited.pop(player, None)
         self.__players.append(player.on_playing(self))
         await self._channel_update(player, True)
         await disp.MATCH_JOIN.send(self.thread, player.mention)
         self.log(f'{player.name} joined the match')
+        if self.__lobby:
+            self.__lobby.state_changed()
         if player.account:
             accounts.account_timeout_delay(player, player.account, accounts.MAX_TIME)
         self.__account_check_tasks.append(asyncio.create_task(self._check_accounts_delay(player)))
@@ -407,6 +401,8 @@ class BaseMatch:
             self.__players.remove(player)
         self.__previous_players.append(player.on_quit())
         self.log(f'{player.name} left the match')
+        if self.__lobby:
+            self.__lobby.state_changed()
 
         #  If Player was assigned an account, start delayed termination
         if player.account:
@@ -430,6 +426,8 @@ class BaseMatch:
             return False
 
         self.owner = player.player
+        if self.__lobby:
+            self.__lobby.state_changed()
         await disp.MATCH_NEW_OWNER.send(self.thread, player.mention)
         await self.update()
         return player
@@ -461,8 +459,13 @@ class BaseMatch:
                 self.update_match_log()
             )
 
-            # Update DB with current players, then remove players
-            await db.async_db_call(db.set_element, 'matches', self.id, self.get_end_data())
+            # Update DB with current players and player match summaries, then remove players
+            end_data = self.get_end_data()
+            await db.async_db_call(db.set_element, 'matches', self.id, end_data)
+            try:
+                await match_summary.record_match(end_data)
+            except Exception as e:  # Summaries can be rebuilt from the matches collection, don't strand the players
+                log.error("Failed to record match summaries for match %s", self.id, exc_info=e)
             with self.thread.typing():
                 leave_coroutines = [self.leave_match(player) for player in self.__players]
                 await asyncio.gather(*leave_coroutines)
@@ -470,6 +473,8 @@ class BaseMatch:
 
             # Store match object, trim _recent_matches if it is too large
             BaseMatch._recent_matches[self.id] = BaseMatch._active_matches.pop(self.id)
+            if self.thread:
+                routing.unregister(self.thread.id, self)
             if len(BaseMatch._recent_matches) > 50:
                 keys = list(BaseMatch._recent_matches.keys())
                 for i in range(20):
@@ -716,8 +721,9 @@ class BaseMatch:
 
     @id.setter
     def id(self, value):
-        if not value >= _match_id_counter:
-            raise ValueError('Match ID\'s must be equal to / higher than the Match Id Counter, %s', _match_id_counter)
+        if not value >= BaseMatch.match_ids.last_id:
+            raise ValueError('Match ID\'s must be equal to / higher than the Match Id Counter, %s',
+                             BaseMatch.match_ids.last_id)
         self.__id = value
 
     @property
@@ -742,7 +748,10 @@ class BaseMatch:
 
     @property
     def invited(self):
-        return self.__invited
+        return list(self.__invited)
+
+    def is_invited(self, player: Player) -> bool:
+        return player in self.__invited
 
     @property
     def status(self):
@@ -808,12 +817,10 @@ class BaseMatch:
         return True if self.timeout_stamp + MATCH_TIMEOUT_TIME <= tools.timestamp_now() else False
 
     def invite(self, player: Player):
-        if player not in self.__invited:
-            self.__invited.append(player)
+        self.__invited[player] = None
 
     def decline_invite(self, player: Player):
-        if player in self.__invited:
-            self.__invited.remove(player)
+        self.__invited.pop(player, None)
 
 
 class RankedMatch(BaseMatch):
@@ -949,8 +956,8 @@ class RankedMatch(BaseMatch):
         async def round_lost_button(self, button: discord.Button, inter: discord.Interaction):
             await self.match.submit_score_callback(won=False, ctx=inter)
 
-    def __init__(self, owner: Player, invited: Player, lobby):
-        super().__init__(owner, invited, lobby)
+    def __init__(self, match_id: int, owner: Player, invited: Player, lobby):
+        super().__init__(match_id, owner, invited, lobby)
 
         # Set Initial Status
         self.status = MatchState.PICKING_FACTIONS
@@ -1605,10 +1612,9 @@ class RankedMatch(BaseMatch):
             await stats_handler.update_elo(self)
 
             # Send players Elo Changes
-            await asyncio.gather(
-                disp.ELO_DM_UPDATE.send(self.player1, match=self, player=self.player1),
-                disp.ELO_DM_UPDATE.send(self.player2, match=self, player=self.player2)
-            )
+            await dms.fan_out(f"match {self.id} ELO updates", [
+                (p, disp.ELO_DM_UPDATE, (), {'match': self, 'player': p}) for p in (self.player1, self.player2)
+            ])
 
         else:
             # Nonstandard Ending, warn of no elo saving
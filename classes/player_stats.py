@@ -6,6 +6,7 @@ import asyncio
 
 # Internal Imports
 import modules.database as db
+import modules.write_buffer as write_buffer
 import modules.config as cfg
 import modules.tools as tools
 
@@ -47,7 +48,8 @@ class PlayerStats:
         """Update all PlayerStats objects from database if required, return all PlayerStats objects"""
         from . import Player
         stats_from_db = []
-        await db.async_db_call(db.get_all_elements, stats_from_db.append, cfg.database['collections']['user_stats'])
+        await db.async_db_background_call(db.get_all_elements, stats_from_db.append,
+                                          cfg.database['collections']['user_stats'])
         for data in stats_from_db:
             if not cls.get(data['_id']):
                 cls(data['_id'], Player.get(data['_id']).name, data=data)
@@ -94,6 +96,9 @@ class PlayerStats:
             self.__last_rank = 'Unranked'  # Last rank of player
             self.__last_rank_update = 0  # Last time rank was updated
 
+        # Changes not yet pushed to the database, as a mongo update document
+        self.__delta: dict = dict()
+
         self._all_player_stats[self.__id] = self
 
     def __repr__(self):
@@ -119,7 +124,13 @@ class PlayerStats:
         return data
 
     async def push_to_db(self):
-        await db.async_db_call(db.set_element, cfg.database['collections']['user_stats'], self.__id, self._get_data())
+        """Queue changes made since the last push for writing to the database, through the write buffer.
+        Changes are sent as a single $set / $addToSet update, so write size doesn't grow with match history, and the
+        update is idempotent, so the write buffer can safely retry it"""
+        if not self.__delta:
+            return
+        delta, self.__delta = self.__delta, dict()
+        write_buffer.queue_update(cfg.database['collections']['user_stats'], self.__id, delta, upsert=True)
 
     @property
     def id(self):
@@ -242,32 +253,49 @@ class PlayerStats:
             log.error(f'Player {self.__id} not in match {match.id}')
             return
 
-        self.__match_ids.append(str(match.id))
-        self.__elo_history[str(match.id)] = elo_delta
+        match_id = str(match.id)
+        self.__match_ids.append(match_id)
+        self.__elo_history[match_id] = elo_delta
         self.__elo = self.__elo + elo_delta
 
+        counters = dict()
         for match_round in match.round_history:
             if match_round.winner_faction == 'NC':
-                if match_round.winner_id == self.__id:
-                    self.__nc_round_wins += 1
-                else:
-                    self.__tr_round_losses += 1
+                counter = 'nc_round_wins' if match_round.winner_id == self.__id else 'tr_round_losses'
             elif match_round.winner_faction == 'TR':
-                if match_round.winner_id == self.__id:
-                    self.__tr_round_wins += 1
-                else:
-                    self.__nc_round_losses += 1
+                counter = 'tr_round_wins' if match_round.winner_id == self.__id else 'nc_round_losses'
+            else:
+                continue
+            counters[counter] = counters.get(counter, 0) + 1
 
         if result > 0.5:
-            self.__match_wins += 1
+            counters['match_wins'] = 1
         elif result == 0.5:
-            self.__match_draws += 1
+            counters['match_draws'] = 1
         elif result < 0.5:
-            self.__match_losses += 1
+            counters['match_losses'] = 1
+
+        self.__nc_round_wins += counters.get('nc_round_wins', 0)
+        self.__tr_round_wins += counters.get('tr_round_wins', 0)
+        self.__nc_round_losses += counters.get('nc_round_losses', 0)
+        self.__tr_round_losses += counters.get('tr_round_losses', 0)
+        self.__match_wins += counters.get('match_wins', 0)
+        self.__match_draws += counters.get('match_draws', 0)
+        self.__match_losses += counters.get('match_losses', 0)
+
+        # Absolute counters and $addToSet, so the update is idempotent and can be retried by the write buffer
+        totals = {counter: getattr(self, counter) for counter in counters}
+        write_buffer.merge_update(self.__delta, {
+            '$addToSet': {'matches': match_id},
+            '$set': {f'elo_history.{match_id}': elo_delta, 'elo': self.__elo, **totals}
+        })
 
     def update_rank(self, new_rank):
         """Update the rank of a player.  Return whether the rank changed or not"""
         self.__last_rank = self.__current_rank
         self.__current_rank = new_rank
         self.__last_rank_update = tools.timestamp_now()
+        write_buffer.merge_update(self.__delta, {'$set': {'current_rank': self.__current_rank,
+                                                          'last_rank': self.__last_rank,
+                                                          'last_rank_update': self.__last_rank_update}})
         return not (self.__current_rank == self.__last_rank)
@@ -3,13 +3,15 @@ Player Classes, representing registered users, and related methods
 '''
 # Internal Imports
 import modules.config as cfg
-import modules.database as db
+import modules.write_buffer as write_buffer
 import modules.census as census
+from modules.search_index import NGramIndex
 from classes.accounts import Account
 import modules.tools as tools
 
 # External Imports
 from logging import getLogger
+import heapq
 import re
 from enum import Enum
 from datetime import datetime
@@ -18,6 +20,8 @@ from discord import Status
 log = getLogger("fs_bot")
 
 WORLD_ID = 19  # Jaeger ID
+# Fields shown on lobby dashboards, updating them changes the players lobby state
+LOBBY_DISPLAYED_FIELDS = ('name', 'skill_level', 'req_skill_levels', 'pref_factions')
 
 
 class SkillLevel(tools.AutoNumber):
@@ -98,6 +102,21 @@ class Player:
 
     _all_players = dict()
     _name_checking = [dict(), dict(), dict(), dict()]
+    _players_by_char: dict[int, 'Player'] = dict()  # All registered char_id: Player, across factions
+    _search_index = NGramIndex()  # Player names and character names, to player id
+    # Lobby ping index, min-heaps of (next eligible ping stamp, player id, ping version), by requested skill level.
+    # Players without requested skill levels are under None.  Only players with lobby_ping_pref > 0 are indexed,
+    # entries are invalidated lazily by bumping the players ping version.
+    _ping_index: dict['SkillLevel | None', list[tuple[int, int, int]]] = dict()
+
+    __slots__ = ('__name', '__id', '__has_own_account', '__account', '__ig_names', '__ig_ids', 'online_id',
+                 '__is_registered', '__hidden', '__timeout', '__is_timeout', '__lobby_timeout_stamp', '__lobbied_stamp',
+                 '__active', '__match', '__lobby', 'skill_level', 'pref_factions', '__req_skill_levels', '__lobby_ping_pref',
+                 '__lobby_ping_freq', '__lobby_last_ping', '__ping_version')
+
+    #: Fields of a users document read by :meth:`new_from_data`, used as projection when loading players
+    DB_FIELDS = ('name', 'is_registered', 'skill_level', 'ig_ids', 'ig_names', 'timeout', 'hidden',
+                 'pref_factions', 'req_skill_levels', 'lobby_ping_pref', 'lobby_ping_freq')
 
     @classmethod
     def get(cls, p_id) -> 'Player':
@@ -107,12 +126,15 @@ class Player:
     def remove(self):
         if self.__has_own_account:
             Player.name_check_remove(self)
+        Player._search_index.remove(self.__id, self.__name)
         del Player._all_players[self.__id]
 
     @classmethod
     def name_check_add(cls, p):
         for i in range(4 if p.has_ns_character else 3):
             cls._name_checking[i][p.ig_ids[i]] = p
+            cls._players_by_char[p.ig_ids[i]] = p
+            cls._search_index.add(p.id, p.ig_names[i])
 
     @classmethod
     def name_check_remove(cls, p):
@@ -121,6 +143,9 @@ class Player:
                 del cls._name_checking[i][p.ig_ids[i]]
             except KeyError:
                 log.warning(f"name_check_remove KeyError for player [id={p.id}], [key={p.ig_ids[i]}]")
+            if cls._players_by_char.get(p.ig_ids[i]) is p:
+                del cls._players_by_char[p.ig_ids[i]]
+            cls._search_index.remove(p.id, p.ig_names[i])
 
     @classmethod
     def get_all_players(cls):
@@ -132,28 +157,50 @@ class Player:
 
     @classmethod
     def get_players_to_ping(cls, level) -> set:
+        """Players that could be pinged for a lobby join at the given skill level.
+        Only walks index entries whose ping interval has elapsed."""
+        now = tools.timestamp_now()
         could_ping = set()
-        for p in list(cls.get_all_players().values()):
-
-            #  Cases where a player should never be pinged:
-            #  ping_pref == 0, category hidden, on timeout, or in lobby/match already.
-            if p.lobby_ping_pref == 0 or p.hidden or p.is_timeout or p.lobby or p.match:
-                continue
-
-            # Check player hasn't been pinged within ping_freq
-            if not p.lobby_last_ping or (p.lobby_last_ping and
-                                         p.lobby_last_ping + p.lobby_ping_freq * 60 < tools.timestamp_now()):
-                # if no req skill levels or a matching level in the lobby levels
-                if not p.req_skill_levels or level in p.req_skill_levels:
+        for bucket in (level, None):
+            heap = cls._ping_index.get(bucket, [])
+            eligible = []
+            while heap and heap[0][0] < now:
+                entry = heapq.heappop(heap)
+                p = cls._all_players.get(entry[1])
+                if not p or entry[2] != p.__ping_version:
+                    continue  # Stale entry, dropped
+                eligible.append(entry)
+
+                #  Cases where a player should never be pinged:
+                #  category hidden, on timeout, or in lobby/match already.
+                if not (p.hidden or p.is_timeout or p.lobby or p.match):
                     could_ping.add(p)
+            # Entries stay indexed until the player is pinged or changes preferences
+            for entry in eligible:
+                heapq.heappush(heap, entry)
         return could_ping
 
+    def _ping_index_update(self):
+        """Re-index the player for lobby pings after a ping preference changed"""
+        self.__ping_version += 1
+        if not self.__lobby_ping_pref:
+            return
+        entry = (self.__lobby_last_ping + self.__lobby_ping_freq * 60, self.__id, self.__ping_version)
+        for level in self.__req_skill_levels or [None]:
+            heapq.heappush(Player._ping_index.setdefault(level, []), entry)
+
     @classmethod
-    def map_chars_to_players(cls):
-        dct = {}
-        for i in cls._name_checking:
-            dct.update(i)
-        return dct
+    def search(cls, query: str, k: int = 25) -> list[tuple[str, 'Player']]:
+        """Find players whose name or a character name contains query.
+        Returns up to k (matched name, Player), best matches first."""
+        return [(text, cls._all_players[p_id]) for text, p_id in cls._search_index.search(query, k)
+                if p_id in cls._all_players]
+
+    @classmethod
+    def map_chars_to_players(cls) -> dict[int, 'Player']:
+        """Return the live char_id: Player index, kept up to date by name_check_add / name_check_remove.
+        Not a copy, don't modify it."""
+        return cls._players_by_char
 
     def __init__(self, p_id, name):
         if not re.match(cfg.name_regex, name):
@@ -168,6 +215,7 @@ class Player:
         self.__is_registered = False
         self.__hidden = False
         self.__timeout: dict = {'stamp': 0, "msg_id": 0, "reason": "", "mod_id": 0}  # this should be a named tuple
+        self.__is_timeout = False  # Cached, cleared when modules.timeouts lifts the timeout
         self.__lobby_timeout_stamp = 0
         self.__lobbied_stamp = 0
         self.__active = None
@@ -175,14 +223,16 @@ class Player:
         self.__lobby = None
         self.skill_level: SkillLevel = SkillLevel.HARMLESS
         self.pref_factions: list[str] = []
-        self.req_skill_levels = None
+        self.__req_skill_levels = None
 
         # Integers to represent ping preferences. {0: No Ping, 1: Ping if Online, 2: Ping Always}
-        self.lobby_ping_pref = 0
-        self.lobby_ping_freq = 30  # Minutes to wait in between pings
-        self.lobby_last_ping = 0  # Timestamp of last time the player was pinged
+        self.__lobby_ping_pref = 0
+        self.__lobby_ping_freq = 30  # Minutes to wait in between pings
+        self.__lobby_last_ping = 0  # Timestamp of last time the player was pinged
+        self.__ping_version = 0  # Bumped when ping preferences change, invalidating lobby ping index entries
 
         Player._all_players[p_id] = self  # adding to all players dictionary
+        Player._search_index.add(p_id, name)
 
     def __repr__(self):
         return f'<Player ID:{self.__id}, name:{self.__name}>'
@@ -204,16 +254,18 @@ class Player:
             obj.__ig_ids = [0, 0, 0, 0]
         if 'timeout' in data:
             obj.__timeout = data['timeout']
+            obj.__is_timeout = obj.__timeout['stamp'] > datetime.now().timestamp()
         if 'hidden' in data:
             obj.__hidden = data['hidden']
         if 'pref_factions' in data:
             obj.pref_factions = data['pref_factions']
         if 'req_skill_levels' in data:
-            obj.req_skill_levels = [SkillLevel[level] for level in data['req_skill_levels']]
+            obj.__req_skill_levels = [SkillLevel[level] for level in data['req_skill_levels']]
         if 'lobby_ping_pref' in data:
-            obj.lobby_ping_pref = data['lobby_ping_pref']
+            obj.__lobby_ping_pref = data['lobby_ping_pref']
         if 'lobby_ping_freq' in data:
-            obj.lobby_ping_freq = data['lobby_ping_freq']
+            obj.__lobby_ping_freq = data['lobby_ping_freq']
+        obj._ping_index_update()  # Index once all ping preferences are set
 
     def get_data(self):  # get data for database push
         data = {'_id': self.id, 'name': self.__name,
@@ -239,35 +291,37 @@ class Player:
 
     async def db_update(self, arg):
         """Update a specific users database element.  Options are name, register, account, timeout,
-         skill_level, req_skill_levels, pref_factions, pref_factions, hidden: """
+         skill_level, req_skill_levels, pref_factions, pref_factions, hidden.
+         Updates are buffered, and written alongside other pending updates.  Unlike a direct db.set_field, a missing
+         user document doesn't raise DatabaseError here, the write buffer logs a warning when the update matches
+         nothing at flush time.  Player objects are only created for existing documents or alongside their insert."""
         match arg:
             case 'name':
-                await db.async_db_call(db.set_field, 'users', self.id, {'name': self.__name})
+                update = {'$set': {'name': self.__name}}
             case 'register':
-                await db.async_db_call(db.set_field, 'users', self.id, {'is_registered': self.__is_registered})
+                update = {'$set': {'is_registered': self.__is_registered}}
             case 'account':
                 doc = {'ig_ids': self.__ig_ids, 'ig_names': self.__ig_names}
-                if self.has_own_account:
-                    await db.async_db_call(db.set_field, 'users', self.id, doc)
-                else:
-                    await db.async_db_call(db.unset_field, 'users', self.id, doc)
+                update = {'$set': doc} if self.has_own_account else {'$unset': doc}
             case 'timeout':
-                await db.async_db_call(db.set_field, 'users', self.id, {'timeout': self.__timeout})
+                update = {'$set': {'timeout': self.__timeout}}
             case 'skill_level':
-                await db.async_db_call(db.set_field, 'users', self.id, {'skill_level': self.skill_level.name})
+                update = {'$set': {'skill_level': self.skill_level.name}}
             case 'req_skill_levels':
-                await db.async_db_call(db.set_field, 'users', self.id,
-                                       {'req_skill_levels': [level.name for level in self.req_skill_levels]})
+                update = {'$set': {'req_skill_levels': [level.name for level in self.req_skill_levels]}}
             case 'pref_factions':
-                await db.async_db_call(db.set_field, 'users', self.id, {'pref_factions': self.pref_factions})
+                update = {'$set': {'pref_factions': self.pref_factions}}
             case 'hidden':
-                await db.async_db_call(db.set_field, 'users', self.id, {'hidden': self.__hidden})
+                update = {'$set': {'hidden': self.__hidden}}
             case 'lobby_ping_pref':
-                await db.async_db_call(db.set_field, 'users', self.id, {'lobby_ping_pref': self.lobby_ping_pref})
+                update = {'$set': {'lobby_ping_pref': self.lobby_ping_pref}}
             case 'lobby_ping_freq':
-                await db.async_db_call(db.set_field, 'users', self.id, {'lobby_ping_freq': self.lobby_ping_freq})
+                update = {'$set': {'lobby_ping_freq': self.lobby_ping_freq}}
             case _:
                 raise KeyError(f"No field {arg} found")
+        write_buffer.queue_update('users', self.id, update)
+        if self.__lobby and arg in LOBBY_DISPLAYED_FIELDS:
+            self.__lobby.state_changed()
 
     @property
     def name(self):
@@ -277,6 +331,8 @@ class Player:
         """Update a players name if it matches the name regex, and update the database"""
         if not re.match(cfg.name_regex, name):
             return False
+        Player._search_index.remove(self.__id, self.__name)
+        Player._search_index.add(self.__id, name)
         self.__name = name
         await self.db_update('name')
         log.info(f"{self.id} renamed to {name}")
@@ -348,7 +404,7 @@ class Player:
 
     @property
     def is_timeout(self) -> bool:
-        return self.__timeout['stamp'] > datetime.now().timestamp()
+        return self.__is_timeout
 
     @property
     def timeout_until(self):
@@ -377,10 +433,12 @@ class Player:
         """
 
         timeout_dict = {'stamp': timeout_until, 'msg_id': timeout_msg_id, 'reason': reason, 'mod_id': mod_id}
-        if self.is_timeout and timeout_until != 0:
+        # Checked against the stamp, a timeout that expired but hasn't been lifted yet is replaced
+        if self.__timeout['stamp'] > datetime.now().timestamp() and timeout_until != 0:
             self.__timeout['stamp'] = timeout_until
         else:
             self.__timeout.update(timeout_dict)
+        self.__is_timeout = self.__timeout['stamp'] > datetime.now().timestamp()
         await self.db_update('timeout')
 
     @property
@@ -391,6 +449,43 @@ class Player:
     def hidden(self, value):
         self.__hidden = value
 
+    # Ping preferences, setters keep the lobby ping index up to date
+    @property
+    def req_skill_levels(self):
+        return self.__req_skill_levels
+
+    @req_skill_levels.setter
+    def req_skill_levels(self, value):
+        self.__req_skill_levels = value
+        self._ping_index_update()
+
+    @property
+    def lobby_ping_pref(self):
+        return self.__lobby_ping_pref
+
+    @lobby_ping_pref.setter
+    def lobby_ping_pref(self, value):
+        self.__lobby_ping_pref = value
+        self._ping_index_update()
+
+    @property
+    def lobby_ping_freq(self):
+        return self.__lobby_ping_freq
+
+    @lobby_ping_freq.setter
+    def lobby_ping_freq(self, value):
+        self.__lobby_ping_freq = value
+        self._ping_index_update()
+
+    @property
+    def lobby_last_ping(self):
+        return self.__lobby_last_ping
+
+    @lobby_last_ping.setter
+    def lobby_last_ping(self, value):
+        self.__lobby_last_ping = value
+        self._ping_index_update()
+
     @property
     def match(self):
         return self.__match
@@ -551,8 +646,10 @@ class Player:
         new_names = ["N/A", "N/A", "N/A", "N/A"]
         new_ids = [0, 0, 0, 0]
 
+        # Resolve all characters in one Census query
+        chars_info = await census.get_chars_info(char_list)
         for char in char_list:
-            char_info = await census.get_char_info(char)
+            char_info = chars_info.get(char.lower())
             if not char_info:
                 if "NS" == char[-2:]:  # skip CharNotFound if char is NS
                     continue
@@ -601,9 +698,13 @@ class Player:
 class ActivePlayer:
     """
     ActivePlayer class has added attributes and methods relevant to their current match.
-    Called after a player starts a match
+    Called after a player starts a match.
+    Player attributes listed in FORWARDED_ATTRIBUTES and FORWARDED_WRITABLE_ATTRIBUTES are forwarded through
+    properties generated below the class.
     """
 
+    __slots__ = ('__player', 'assigned_faction_id')
+
     @classmethod
     async def get(cls, p_id):
         """Returns a Players ActivePlayer instance from ID.
@@ -664,9 +765,37 @@ class ActivePlayer:
         return f"{self.name}({self.assigned_faction_abv}" + \
             f"{cfg.emojis[self.assigned_faction_abv]}{self.assigned_faction_char})"
 
-    def __getattr__(self, item):
-        """Passes all other attributes to Player"""
-        try:
-            return getattr(self.__player, item)
-        except AttributeError:
-            raise AttributeError(f"'ActivePlayer' object has no attribute '{item}'")
+
+#: Player attributes readable through an ActivePlayer
+FORWARDED_ATTRIBUTES = (
+    'id', 'name', 'mention', 'member', 'account', 'active', 'match', 'lobby', 'lobbied_stamp', 'lobby_timeout_stamp',
+    'is_registered', 'has_own_account', 'has_ns_character', 'ig_ids', 'ig_names', 'current_ig_id',
+    'current_faction', 'online_name', 'discord_active', 'is_timeout', 'timeout_until', 'timeout_msg_id',
+    'timeout_reason', 'timeout_mod_id', 'char_id_by_name', 'char_name_by_id', 'get_data', 'get_stats',
+    'get_or_fetch_stats', 'get_user', 'db_update', 'set_timeout', 'set_lobby_timeout', 'on_lobby_add',
+    'on_lobby_leave', 'on_playing', 'on_quit', 'rename', 'register', 'set_account', 'clean', 'remove',
+)
+#: Player attributes readable and writable through an ActivePlayer
+FORWARDED_WRITABLE_ATTRIBUTES = (
+    'online_id', 'skill_level', 'pref_factions', 'req_skill_levels', 'hidden', 'lobby_ping_pref', 'lobby_ping_freq',
+    'lobby_last_ping',
+)
+
+
+def _forward_to_player(name, writable):
+    """Property forwarding an ActivePlayer attribute to its Player"""
+
+    def fget(self):
+        return getattr(self.player, name)
+
+    def fset(self, value):
+        setattr(self.player, name, value)
+
+    return property(fget, fset if writable else None, doc=f"Forwarded to Player.{name}")
+
+
+for _name in FORWARDED_ATTRIBUTES:
+    setattr(ActivePlayer, _name, _forward_to_player(_name, writable=False))
+for _name in FORWARDED_WRITABLE_ATTRIBUTES:
+    setattr(ActivePlayer, _name, _forward_to_player(_name, writable=True))
+del _name
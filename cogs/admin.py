@@ -13,7 +13,8 @@ from pytz import timezone
 import modules.config as cfg
 import modules.accounts_handler as accounts
 import modules.discord_obj as d_obj
-from modules import census, tools, loader, elo_ranks_handler
+from modules import census, tools, loader, elo_ranks_handler, match_summary, executors
+from modules import database as db
 
 from classes import Player
 from classes.lobby import Lobby
@@ -30,11 +31,17 @@ def player_chars_autocomplete(ctx: discord.AutocompleteContext = None, member_id
     value = value.lower() or ctx.value.lower()
     if user_id and (p := Player.get(int(user_id))):
         if p.account or p.has_own_account:
-            options = [char for char in p.ig_names if char.lower().find(value) > 0]
+            options = [char for char in p.ig_names if char.lower().find(value) >= 0]
             return options or p.ig_names
     return ["No Characters Found"]
 
 
+def player_search_autocomplete(ctx: discord.AutocompleteContext):
+    """Return players whose name or a character name contains the typed value, valued by player id"""
+    return [discord.OptionChoice(name=f"{text} ({p.name})"[:100], value=str(p.id))
+            for text, p in Player.search(ctx.value, k=25)]
+
+
 class AdminCog(commands.Cog):
     def __init__(self, bot):
         self.bot: discord.Bot = bot
@@ -71,6 +78,36 @@ class AdminCog(commands.Cog):
         else:
             await disp.UNEXPECTED_ERROR.send_priv(ctx)
 
+    @admin.command(name="rebuild_match_summary")
+    async def rebuild_match_summary(self, ctx: discord.ApplicationContext):
+        """Rebuild player match summaries (used by /stats) from match history"""
+        await ctx.defer(ephemeral=True)
+        match_count, player_count = await match_summary.rebuild()
+        await d_obj.d_log(f"Rebuilt match summaries for {player_count} players from {match_count} matches")
+        await ctx.respond(f"Rebuilt match summaries for {player_count} players from {match_count} matches",
+                          ephemeral=True)
+
+    @admin.command(name="executors")
+    async def executors_info(self, ctx: discord.ApplicationContext,
+                             reset: discord.Option(bool, "Reset stats after displaying them", default=False)):
+        """Show blocking I/O executor queue stats and database round trips"""
+        lines = []
+        for pool in executors.get_all():
+            lines.append(f"[{pool.name}] workers: {pool.max_workers}, active: {pool.active}, queued: {pool.queued}, "
+                         f"peak queued: {pool.peak_queued}, saturated calls: {pool.saturations}")
+            # Top call sites by total execution time
+            for site, stats in sorted(pool.sites.items(), key=lambda x: x[1].exec_total, reverse=True)[:8]:
+                lines.append(f"  {site}: {stats.calls} calls, "
+                             f"wait avg/max {stats.wait_total / stats.calls * 1000:.0f}/{stats.wait_max * 1000:.0f}ms, "
+                             f"exec avg/max {stats.exec_total / stats.calls * 1000:.0f}/{stats.exec_max * 1000:.0f}ms")
+        round_trips = ", ".join(f"{coll}: {count}" for coll, count in db.get_round_trips().items())
+        lines.append(f"Round trips: {round_trips or 'None'}")
+        if reset:
+            executors.reset_all()
+            db.reset_round_trips()
+        text = "\n".join(lines)[:1900]  # Stay under discords message length limit
+        await ctx.respond(f"```\n{text}\n```", ephemeral=True)
+
     @admin.command(name="spamfilter")
     async def spam_filter_control(self, ctx: discord.ApplicationContext,
                                   action: discord.Option(str, "Enable or Disable the Spam Filter",
@@ -158,6 +195,15 @@ class AdminCog(commands.Cog):
         ran = await self.census_rest()
         await disp.MANUAL_CENSUS.send_priv(ctx, "successful." if ran else "failed.")
 
+    @census_group.command(name="cache")
+    async def census_cache(self, ctx: discord.ApplicationContext,
+                           clear: discord.Option(bool, "Clear the cache after displaying stats", default=False)):
+        """Show Census character cache stats"""
+        stats = census.chars_cache.stats()
+        if clear:
+            census.chars_cache.clear()
+        await ctx.respond(f"Census character cache: {stats}", ephemeral=True)
+
     @census_group.command(name='rest')
     async def census_control(self, ctx: discord.ApplicationContext,
                              action: discord.Option(str, "Enable, Disable, or check status of the Census Loop",
@@ -199,9 +245,7 @@ class AdminCog(commands.Cog):
         p = Player.get(member.id)
         match_channel = match_channel or ctx.channel
 
-        try:
-            match = BaseMatch.active_match_thread_ids()[match_channel.id]
-        except KeyError:
+        if not (match := BaseMatch.get_by_thread(match_channel.id)):
             await disp.MATCH_NOT_FOUND.send_priv(ctx, match_channel.mention)
             return
         if p.match:
@@ -265,8 +309,7 @@ class AdminCog(commands.Cog):
                         match_id: discord.Option(int, "Match ID to end", required=False)):
         """End a given match forcibly.  Uses current channel if no ID provided"""
         await ctx.defer(ephemeral=True)
-        match = BaseMatch.active_matches_dict().get(match_id) or BaseMatch.active_match_thread_ids().get(
-            ctx.channel_id)
+        match = BaseMatch.get(match_id) or BaseMatch.get_by_thread(ctx.channel_id)
 
         if not match:
             return await disp.MATCH_NOT_FOUND.send_priv(ctx, (match_id or ctx.channel.mention))
@@ -558,6 +601,20 @@ class AdminCog(commands.Cog):
 
         await disp.REG_INFO.send_priv(ctx, player=p)
 
+    @player_admin.command(name='find')
+    async def player_find(self, ctx: discord.ApplicationContext,
+                          query: discord.Option(str, "Player or character name to search for", required=True,
+                                                autocomplete=player_search_autocomplete)):
+        """Find a player by player name or character name, and provide info on them"""
+        p = Player.get(int(query)) if query.isdigit() else None
+        if not p and (results := Player.search(query, k=1)):
+            p = results[0][1]
+        if not p:
+            await disp.NOT_PLAYER_2.send_priv(ctx, query)
+            return
+
+        await disp.REG_INFO.send_priv(ctx, player=p)
+
     @commands.user_command(name="Player Info", **common_kwargs)
     async def user_player_info(self, ctx: discord.ApplicationContext, user: discord.User):
         """
@@ -796,7 +853,7 @@ class AdminCog(commands.Cog):
             except Exception as e:
                 log.error(f"Failed to close WSS: {e}")
             self.census_watchtower.cancel()
-        self.census_watchtower = self.bot.loop.create_task(census.online_status_updater(Player.map_chars_to_players))
+        self.census_watchtower = self.bot.loop.create_task(census.online_status_updater(Player.map_chars_to_players()))
 
     # @census_watchtower.after_loop
     # async def after_census_watchtower(self):
@@ -12,7 +12,7 @@ import datetime
 import time
 
 # Internal Imports
-from modules import discord_obj as d_obj, tools, database as db, config as cfg, tools
+from modules import discord_obj as d_obj, tools, database as db, config as cfg, tools, census
 from display import AllStrings as disp, views, embeds
 
 log = getLogger('fs_bot')
@@ -552,16 +552,9 @@ class AnomalyCog(commands.Cog, name="AnomalyCog"):
             log.debug('Requested character ids are already cached')
             return True
 
-        # Fetch the character data from the API
-        query = auraxium.census.Query(collection='character', service_id=cfg.general['api_key']).limit(10000)
-        query.add_term(field='character_id', value=','.join(char_ids))
-
-        async with aiohttp.ClientSession() as session:
-            async with session.get(query.url()) as resp:
-                data = await resp.json()
-
-        chars_list = data.get('character_list')
-        if not chars_list:
+        # Fetch the character data, through the shared census cache
+        chars_info = await census.get_chars_by_ids(char_ids)
+        if not chars_info:
             log.warning('No character data returned from API name cache population')
             return False
 
@@ -585,13 +578,12 @@ class AnomalyCog(commands.Cog, name="AnomalyCog"):
         log.debug(f'HONU session data: {honu_sesh_data}')
 
         # Update dict of {character id : [factionemoji:name](honu_session_url)}
-        for character in chars_list:
-            char_id = int(character['character_id'])
-            fac_emoji = cfg.emojis[cfg.factions[int(character['faction_id'])]]
+        for char_id, (char_name, _, faction_id, _) in chars_info.items():
+            fac_emoji = cfg.emojis[cfg.factions[faction_id]]
             if char_id in honu_sesh_data:
-                name_hyperlink = f"[{character['name']['first']}](https://wt.honu.pw/s/{honu_sesh_data.get(char_id)})"
+                name_hyperlink = f"[{char_name}](https://wt.honu.pw/s/{honu_sesh_data.get(char_id)})"
             else:
-                name_hyperlink = character['name']['first']
+                name_hyperlink = char_name
             self.char_id_to_name[char_id] = f"{fac_emoji}{name_hyperlink}"
             log.debug(f'Added {char_id} to name cache')
         return True
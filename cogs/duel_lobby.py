@@ -41,7 +41,22 @@ class DuelLobbyCog(commands.Cog, name="DuelLobbyCog"):
         casual_lobby = await Lobby.create_lobby("casual", d_obj.channels['casual_lobby'], timeout_minutes=30)
 
         ranked_lobby = await Lobby.create_lobby("ranked", d_obj.channels['ranked_lobby'],
-                                                timeout_minutes=30, match_type=RankedMatch)
+                                                timeout_minutes=30, match_type=RankedMatch, matchmaking=True)
+
+    @commands.Cog.listener('on_presence_update')
+    async def lobby_presence_update(self, before: discord.Member, after: discord.Member):
+        """Reset a lobbied players timeout when they become active or inactive on Discord"""
+        if not (p := Player.get(after.id)) or not p.lobby:
+            return
+        active = (Status.online, Status.streaming, Status.do_not_disturb)
+        if (before.status in active) != (after.status in active):
+            await p.lobby.on_presence_change(p)
+
+    @commands.Cog.listener('on_message')
+    async def lobby_channel_message(self, message: discord.Message):
+        """Schedule purging of messages posted in lobby channels"""
+        if lobby := Lobby.channel_to_lobby(message.channel):
+            lobby.on_channel_message(message)
 
     @commands.user_command(name="Invite To Match", guild_id=[cfg.general['guild_id']])
     async def user_match_invite(self, ctx: discord.ApplicationContext, user: discord.Member):
@@ -78,12 +93,10 @@ class DuelLobbyCog(commands.Cog, name="DuelLobbyCog"):
         sent = await lobby.send_invite(owner, invited)
         if sent and owner.match:  # if sent, and invited to an existing match
             await disp.LOBBY_INVITED_MATCH.send_priv(ctx, owner.mention, invited.mention, owner.match.id_str)
-            lobby.lobby_log(lobby.lobby_log(f'{owner.name} invited {invited.name} to Match: {owner.match.id_str}'))
-            await lobby.update_dashboard()
+            lobby.lobby_log(f'{owner.name} invited {invited.name} to Match: {owner.match.id_str}')
         elif sent:  # if sent, and invited to a new match
             await disp.LOBBY_INVITED.send_priv(ctx, owner.mention, invited.mention)
-            lobby.lobby_log(lobby.lobby_log(f'{owner.name} invited {invited.name} to a match.'))
-            await lobby.update_dashboard()
+            lobby.lobby_log(f'{owner.name} invited {invited.name} to a match.')
         else:  # if couldn't send an invite to the player
             await disp.LOBBY_NO_DM.send_priv(ctx, invited.mention)
 
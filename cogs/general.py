@@ -10,6 +10,7 @@ import asyncio
 import display.embeds
 # Internal Imports
 from modules import discord_obj as d_obj, tools, bot_status, trello, account_usage, loader, elo_ranks_handler as elo
+from modules import match_summary
 from modules.spam_detector import is_spam
 from display import AllStrings as disp, views
 from classes import Player, PlayerStats
@@ -102,74 +103,23 @@ class GeneralCog(commands.Cog, name="GeneralCog"):
 
         await ctx.defer(ephemeral=True)
 
-        # Use an aggregation pipeline to find all matches where the player is a current or previous player
-        player_match_aggregate = await db.async_db_call(db.aggregate,
-                                                        "matches",
-                                                        [
-                                                            {"$match":
-                                                                {"$or":
-                                                                    [
-                                                                        {"current_players": player.id},
-                                                                        {"previous_players": player.id}
-                                                                    ]
-                                                                }
-                                                            },
-                                                            {"$group": {
-                                                                "_id": None,
-                                                                "totalDuration": {"$sum":
-                                                                                      {"$subtract": ["$end_stamp",
-                                                                                                     "$start_stamp"]}},
-                                                                "totalMatches": {"$sum": 1},
-
-                                                            }},
-                                                            {"$project": {
-                                                                "_id": 0,
-                                                                "totalDuration": 1,
-                                                                "totalMatches": 1,
-                                                            }}
-                                                        ])
-
-        # Use an aggregation pipeline to find the top 3 players the player dueled, and time dueled against
-        player_match_partners_aggregate = \
-            await db.async_db_call(db.aggregate,
-                                   "matches",
-                                   [
-                                       {"$project": {
-                                           "players": {"$setUnion": ["$current_players", "$previous_players"]},
-                                           "matchDuration": {"$subtract": ["$end_stamp", "$start_stamp"]}
-                                       }},
-                                       {"$match":
-                                            {"players": player.id}},
-                                       {"$unwind": "$players"},
-                                       {"$match": {"players": {"$ne": player.id}}},
-                                       {"$group": {"_id": "$players",
-                                                   "count": {"$sum": 1},
-                                                   "totalDuration": {"$sum": "$matchDuration"}}
-                                        },
-                                       {"$project": {"_id": 0, "player_id": "$_id", "count": 1, "totalDuration": 1}},
-                                       {"$sort": {"count": -1}},
-                                       {"$limit": 3}
-                                   ]
-                                   )
-        # Convert the aggregate cursor to a list
-        match_info = list(player_match_aggregate)
-        partner_info = list(player_match_partners_aggregate)
+        # Single read of the players match summary, kept up to date as matches end
+        summary = await match_summary.get_summary(player.id)
 
         # If the player has no matches, return a message saying so
-        if not match_info:
+        if not summary or not summary.get('total_matches'):
             return await disp.STAT_NO_MATCHES.send_priv(ctx, player.mention)
 
-        # If the player has matches, retrieve the data from the aggregate
-        player_match_count = match_info[0]['totalMatches']
-        total_duel_sec = match_info[0]['totalDuration']
+        player_match_count = summary['total_matches']
+        total_duel_sec = summary['total_duration']
 
         # Create a list of the top 3 players the player has dueled against
         duel_partners_list = []
-        for partner in partner_info:
-            if (partner_p := Player.get(partner['player_id'])) is None:
-                duel_partners_list.append((f"PID:{partner['player_id']}", partner['count'], partner['totalDuration']))
+        for partner_id, count, duration in match_summary.top_partners(summary):
+            if (partner_p := Player.get(partner_id)) is None:
+                duel_partners_list.append((f"PID:{partner_id}", count, duration))
             else:
-                duel_partners_list.append((partner_p.mention, partner['count'], partner['totalDuration']))
+                duel_partners_list.append((partner_p.mention, count, duration))
 
         duel_partners = ""
         for p, c, d in duel_partners_list:
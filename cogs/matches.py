@@ -53,7 +53,7 @@ class MatchesCog(commands.Cog, name="MatchesCog",
         if message.author == self.bot.user:
             return
 
-        if not (match := BaseMatch.active_match_thread_ids().get(message.channel.id)):
+        if not (match := BaseMatch.get_by_thread(message.channel.id)):
             return
 
         image = ''
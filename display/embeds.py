@@ -5,6 +5,7 @@ import discord
 from discord import Embed, Colour
 
 from datetime import timedelta, datetime as dt
+from functools import cache
 import pytz
 
 # Internal Imports
@@ -330,6 +331,18 @@ def player_info(player) -> Embed:
     return fs_author(embed)
 
 
+@cache
+def _skill_level_legend() -> str:
+    """Skill level legend for the duel dashboard, static so only built once"""
+    skill_level_shorthands = [f'**{level.rank}**: {str(level)}' for level in list(SkillLevel)]
+    string = ''
+    for i in skill_level_shorthands:
+        string += f'[{i}] '
+        if i == 4:
+            string += '\n'
+    return string
+
+
 def duel_dashboard(lobby) -> Embed:
     """Player visible duel dashboard, shows currently looking duelers, their requested skill Levels."""
 
@@ -343,15 +356,9 @@ def duel_dashboard(lobby) -> Embed:
     )
 
     # Dashboard Description
-    skill_level_shorthands = [f'**{level.rank}**: {str(level)}' for level in list(SkillLevel)]
-    string = ''
-    for i in skill_level_shorthands:
-        string += f'[{i}] '
-        if i == 4:
-            string += '\n'
     embed.add_field(
         name='Skill Level Ranks',
-        value=string,
+        value=_skill_level_legend(),
         inline=False
     )
 
@@ -367,6 +374,7 @@ def duel_dashboard(lobby) -> Embed:
         players_string = ''
         for p in lobby.lobbied:
             timeout_warn = '⏳' if p in lobby.warned else ''
+            timeout_warn += '🔎' if p in lobby.queued else ''
             preferred_facs = ''.join([cfg.emojis[fac] for fac in p.pref_factions]) if p.pref_factions else 'Any'
             req_skill_levels = ' '.join([str(level.rank) for level in p.req_skill_levels]) \
                 if p.req_skill_levels else 'Any'
@@ -421,6 +429,7 @@ def ranked_duel_dashboard(lobby) -> Embed:
         players_string = ''
         for p in lobby.lobbied:
             timeout_warn = '⏳' if p in lobby.warned else ''
+            timeout_warn += '🔎' if p in lobby.queued else ''
             f_lobbied_stamp = format_stamp(p.lobbied_stamp)
             string = f'{p.mention}({p.name}) [{p.elo}][{f_lobbied_stamp}]\n '
             players_string += timeout_warn + string
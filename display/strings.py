@@ -153,6 +153,8 @@ class AllStrings(Enum):
     LOBBY_DASHBOARD = ''
     LOBBY_LONGER_HISTORY = '{}', longer_lobby_logs
     LOBBY_NO_HISTORY = '{} there is no extended activity to display!'
+    LOBBY_QUEUE_JOIN = "{} you have joined the matchmaking queue, you will be matched with a player of similar ELO!"
+    LOBBY_QUEUE_LEAVE = "{} you have left the matchmaking queue."
     LOBBY_PING = "A player who matches one of your requested skill levels [{}] has joined the {} lobby!"
 
     INVITE_WRONG_USER = "This invite isn\'t for you!"
@@ -75,7 +75,7 @@ class InviteView(FSBotView):
     """View to handle accepting or declining match invites"""
 
     def __init__(self, lobby, owner, player):
-        super().__init__(timeout=300)
+        super().__init__(timeout=None)  # Expired by the lobbies invite registry
         self.lobby = lobby
         self.owner: Player = owner  # Player doing the inviting
         self.player = player  # Player getting invited
@@ -87,6 +87,9 @@ class InviteView(FSBotView):
             return
 
         self.stop()
+        if not self.lobby.can_accept(self.owner, p):
+            self.lobby.decline_invite(self.owner, p)
+            return await disp.DM_INVITE_INVALID.edit(inter, view=False)
         await disp.LOADING.edit(inter, view=False)
         match = await self.lobby.accept_invite(self.owner, p)
 
@@ -156,13 +159,12 @@ class InviteView(FSBotView):
             await disp.INVITE_DECLINE_INFO_REASON.send(owner_mem, self.invite_view.player.mention, reason)
             await disp.INVITE_DECLINE_REASON.send(inter, reason)
 
-    async def on_timeout(self) -> None:
+    async def expire(self) -> None:
+        """Called by the lobby when the invite expires, the invite has already been withdrawn"""
+        self.stop()
         # Show owner invite expired
         await disp.DM_INVITE_EXPIRED_INFO.send(self.owner.member, self.player.mention)
 
-        # Decline Invite
-        self.lobby.decline_invite(self.owner, self.player)
-
         # Disable invite buttons
         self.disable_all_items()
 
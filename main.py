@@ -22,10 +22,13 @@ import modules.config as cfg
 import modules.accounts_handler
 import modules.discord_obj as d_obj
 import modules.database
+import modules.executors
 import modules.loader as loader
 import modules.signal
+import modules.timeouts
 import modules.elo_ranks_handler as elo_ranks
 import classes
+from classes.match import BaseMatch
 import display
 import modules.spam_detector as spam
 
@@ -127,8 +130,12 @@ async def on_ready():
         return
 
     log.info(f"Logged in as {bot.user} (ID: {bot.user.id})")
+    await players_loaded
+    log.info("Loaded Players from Database: %s", len(classes.Player.get_all_players()))
+    await BaseMatch.match_ids.init(block_size=int(cfg.database['match_id_block']))
     modules.signal.init(bot)
     d_obj.init(bot)
+    modules.timeouts.init()
     bot.loop.create_task(modules.accounts_handler.init(cfg.GAPI_SERVICE, cfg.TEST), name="Accounts Handler Init")
     # loader.load_secondary(bot)
     await loader.load_all(bot)
@@ -140,6 +147,8 @@ async def on_ready():
 #  Global Bot Interaction Check
 @bot.check
 async def global_interaction_check(ctx):
+    if not players_loaded.done():  # Registry is partial until the players load, even for admins
+        raise AllLocked
     if loader.is_all_locked():
         memb = d_obj.guild.get_member(ctx.user.id)
         if d_obj.is_admin(memb):
@@ -204,6 +213,7 @@ async def on_application_command_error(context, exception):
 @bot.event
 async def on_member_join(member):
     """Ensure proper roles are applied to players on server join and send Join message if Member already verified"""
+    await players_loaded  # role_update looks the member up in the Player registry
     await d_obj.role_update(member)
 
     if member.pending is False:
@@ -218,9 +228,15 @@ async def on_member_update(before: discord.Member, after: discord.Member):
 
 
 # database init
+modules.executors.init({name: cfg.database[f"{name}_workers"] for name in modules.executors.POOL_SIZES})
 modules.database.init(cfg.database)
-modules.database.get_all_elements(classes.Player.new_from_data, 'users')
-log.info("Loaded Players from Database: %s", len(classes.Player.get_all_players()))
+# Players are streamed in while the bot connects to the gateway, on_ready waits for them.
+# Handlers using the Player registry must not run before the load completes: the cogs with on_message / presence
+# listeners are only loaded by on_ready after it, commands are refused by global_interaction_check, and
+# on_member_join waits for it.
+players_loaded = bot.loop.create_task(
+    modules.database.stream_all_elements(classes.Player.new_from_data, 'users', projection=classes.Player.DB_FIELDS),
+    name="Players Load")
 
 loader.init(bot)
 bot.run(cfg.general['token'])
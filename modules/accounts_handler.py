@@ -17,6 +17,7 @@ import modules.config as cfg
 import modules.census as census
 import modules.discord_obj as d_obj
 import modules.database as db
+import modules.executors as executors
 import modules.tools as tools
 from display import AllStrings as disp, views, embeds
 
@@ -51,10 +52,8 @@ async def init(service_account_path: str, test=False):
         UNASSIGNED_ONLINE_WARN = False
 
     # open/store google sheet
-    gc = service_account(service_account_path)
-    sh = gc.open_by_key(cfg.database["accounts_id"])
-    raw_sheet = sh.worksheet(cfg.database["accounts_sheet_name"])
-    sheet_imported = array(raw_sheet.get_all_values())
+    raw_sheet = await executors.run("gspread", _open_worksheet, service_account_path)
+    sheet_imported = array(await executors.run("gspread", raw_sheet.get_all_values))
 
     # TODO fix account # check
     # get number of accounts
@@ -301,6 +300,30 @@ async def send_account(acc: classes.Account = None, player: classes.Player = Non
         return acc.message
 
 
+def _open_worksheet(service_account_path: str):
+    """Open the accounts worksheet.  Blocking, run in the gspread executor"""
+    gc = service_account(service_account_path)  # connection
+    sh = gc.open_by_key(cfg.database["accounts_id"])  # sheet
+    return sh.worksheet(cfg.database["accounts_sheet_name"])  # worksheet
+
+
+def _log_usage_to_sheet(ws, acc: classes.Account, player: classes.Player):
+    """Log an account usage in the next free column of the accounts row.  Blocking, run in the gspread executor"""
+    row = acc.id * Y_SKIP  # row of the account to be updated
+    column = len(ws.row_values(row)) + 1  # updates via counting row values, instead of below counting nb_uniques
+    # column = acc.nb_unique_usages + USAGE_OFFSET # column of the account to be updated
+
+    cells_list = ws.range(row, column, row + 2, column)
+    date = datetime.now().astimezone(eastern).date().strftime('%m/%d/%Y')
+    cells_list[0].value = date
+    cells_list[1].value = player.name
+    cells_list[2].value = str(player.id)
+
+    ws.update_cells(cells_list, 'USER_ENTERED')  # actually update the sheet
+    ws.format(cells_list[0].address,
+              {"numberFormat": {"type": "DATE", "pattern": "mmmm dd"}, "horizontalAlignment": "CENTER"})
+
+
 async def validate_account(acc: classes.Account = None, player: classes.Player = None) -> bool:
     """Player accepted account, track usage and update object.
     Updates account View and Message
@@ -318,28 +341,14 @@ async def validate_account(acc: classes.Account = None, player: classes.Player =
         return False
 
     # Update GSheet with Usage
-    gc = service_account(cfg.GAPI_SERVICE)  # connection
-    sh = gc.open_by_key(cfg.database["accounts_id"])  # sheet
-    ws = sh.worksheet(cfg.database["accounts_sheet_name"])  # worksheet
-    row = acc.id * Y_SKIP  # row of the account to be updated
-    column = len(ws.row_values(row)) + 1  # updates via counting row values, instead of below counting nb_uniques
-    # column = acc.nb_unique_usages + USAGE_OFFSET # column of the account to be updated
-
+    ws = await executors.run("gspread", _open_worksheet, cfg.GAPI_SERVICE)
     try:
-        cells_list = ws.range(row, column, row + 2, column)
-        date = datetime.now().astimezone(eastern).date().strftime('%m/%d/%Y')
-        cells_list[0].value = date
-        cells_list[1].value = player.name
-        cells_list[2].value = str(player.id)
-
-        ws.update_cells(cells_list, 'USER_ENTERED')  # actually update the sheet
-        ws.format(cells_list[0].address,
-                  {"numberFormat": {"type": "DATE", "pattern": "mmmm dd"}, "horizontalAlignment": "CENTER"})
+        await executors.run("gspread", _log_usage_to_sheet, ws, acc, player)
     except gspread.exceptions.APIError as e:
         resp = str(e)
         await disp.NONE.edit(acc.message, clear_content=True)
         if "exceeds grid limits" in resp:  # attempt to resize sheet before retrying
-            ws.add_cols(15)
+            await executors.run("gspread", ws.add_cols, 15)
             return await validate_account(acc, player)
         await d_obj.d_log(f"Error logging usage to GSheet for Account: {acc.id},"
                           f" user: {acc.a_player.id}, ID: {acc.a_player.id}", error=e)
@@ -11,6 +11,7 @@ from logging import getLogger
 # Internal Imports
 import modules.config as cfg
 import modules.accounts_handler as accounts
+from modules.census_cache import chars as chars_cache
 
 log = getLogger('fs_bot')
 
@@ -64,18 +65,69 @@ async def get_chars_list_online_status(chars_list: list):
     return online_dict
 
 
+async def _request_chars(term: str, values: list) -> list[list[str, int, int, int]]:
+    """Request characters from Census by a search term, with their world joined in.  Results are cached."""
+    async with auraxium.Client(service_id=cfg.general['api_key']) as client:
+        # build query
+        query = auraxium.census.Query('character', service_id=cfg.general['api_key'])
+        query.add_term(term, ','.join(str(value) for value in values))
+        query.create_join('characters_world')
+        query.show('character_id', 'name.first', 'faction_id')
+        query.limit(len(values))
+        data = await client.request(query)
+
+    chars_info = list()
+    for a_return in data.get('character_list', []):
+        world = a_return.get('character_id_join_characters_world', {})
+        info = [a_return['name']['first'], int(a_return['character_id']), int(a_return['faction_id']),
+                int(world.get('world_id', 0))]
+        chars_cache.put(info)
+        chars_info.append(info)
+    return chars_info
+
+
+async def get_chars_info(char_names: list[str]) -> dict[str, list[str, int, int, int]]:
+    """
+    Look up several characters, through the shared cache.  Uncached characters are requested in a single query.
+
+    :param char_names: character names to be searched
+    :return: dict of lowercase character name: [Character name, ID, faction and world].  Only found characters
+     are included.
+    """
+    chars_info, to_request = chars_cache.lookup_names([name.lower() for name in char_names])
+    if to_request:
+        for info in await _request_chars('name.first_lower', to_request):
+            chars_info[info[0].lower()] = info
+        for name in to_request:
+            if name not in chars_info:
+                chars_cache.put_missing(name)
+    return chars_info
+
+
+async def get_chars_by_ids(char_ids: list[int]) -> dict[int, list[str, int, int, int]]:
+    """
+    Look up several characters by id, through the shared cache.  Uncached characters are requested in a single query.
+
+    :param char_ids: character ids to be searched
+    :return: dict of character id: [Character name, ID, faction and world].  Only found characters are included.
+    """
+    chars_info, to_request = chars_cache.lookup_ids([int(char_id) for char_id in char_ids])
+    if to_request:
+        for info in await _request_chars('character_id', to_request):
+            chars_info[info[1]] = info
+        for char_id in to_request:
+            if char_id not in chars_info:
+                chars_cache.put_missing(char_id)
+    return chars_info
+
+
 async def get_char_info(char_name) -> list[str, int, int, int] | None:
     """
 
     :param char_name: character name to be searched
-    :return: [Character name, ID, faction and world].  Empty list if no character found
+    :return: [Character name, ID, faction and world].  None if no character found
     """
-    async with auraxium.Client(service_id=cfg.general['api_key']) as client:
-        char = await client.get_by_name(auraxium.ps2.Character, char_name)
-        if not char:
-            return None
-        char_world = await char.world()
-        return [char.name.first, char.id, char.faction_id, char_world.id]
+    return (await get_chars_info([char_name])).get(char_name.lower())
 
 
 async def get_ids_facs_from_chars(chars_list) -> dict[str, tuple[int, int]] | bool:
@@ -84,27 +136,12 @@ async def get_ids_facs_from_chars(chars_list) -> dict[str, tuple[int, int]] | bo
     :param chars_list, list of characters to return ids for
     :return: dict of str(char_name): int(id).  returns only chars that exist
     """
-    names_string = ','.join(chars_list)
-    async with auraxium.Client(service_id=cfg.general['api_key']) as client:
-        # build query
-        query = auraxium.census.Query('character', service_id=cfg.general['api_key'])
-        query.add_term('name.first_lower', names_string.lower())
-        query.show('character_id', 'name.first', 'faction_id')
-        query.limit(100)
-        try:
-            data = await client.request(query)
-        except auraxium.errors.ServiceUnavailableError:
-            log.error('API unreachable during online check')
-            return False
-
-        char_dict = dict()
-        for a_return in data['character_list']:
-            char_name = a_return['name']['first']
-            char_id = int(a_return['character_id'])
-            char_fac_id = int(a_return['faction_id'])
-            char_dict[char_name] = (char_id, char_fac_id)
-
-        return char_dict
+    try:
+        chars_info = await get_chars_info(chars_list)
+    except auraxium.errors.ServiceUnavailableError:
+        log.error('API unreachable during online check')
+        return False
+    return {info[0]: (info[1], info[2]) for info in chars_info.values()}
 
 
 async def login(char_id, acc_char_ids, player_char_ids):
@@ -165,9 +202,9 @@ async def logout(char_id, acc_char_ids, player_char_ids):
         return
 
 
-async def online_status_updater(chars_players_map_func):
+async def online_status_updater(chars_players_map):
     """Responsible for updating player and account objects with their currently
-    online characters"""
+    online characters.  chars_players_map is the live char_id: Player index, read on each event."""
     acc_char_ids = accounts.account_char_ids
 
     client = auraxium.event.EventClient(service_id=cfg.general['api_key'])
@@ -175,12 +212,10 @@ async def online_status_updater(chars_players_map_func):
     EVENT_CLIENT = client
 
     async def login_action(evt: auraxium.event.PlayerLogin):
-        player_char_ids = chars_players_map_func()
-        await login(evt.character_id, acc_char_ids, player_char_ids)
+        await login(evt.character_id, acc_char_ids, chars_players_map)
 
     async def logout_action(evt: auraxium.event.PlayerLogout):
-        player_char_ids = chars_players_map_func()
-        await logout(evt.character_id, acc_char_ids, player_char_ids)
+        await logout(evt.character_id, acc_char_ids, chars_players_map)
 
     # noinspection PyTypeChecker
     login_trigger = auraxium.Trigger(auraxium.event.PlayerLogin, worlds=[WORLD_ID], action=login_action)
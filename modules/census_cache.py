@@ -0,0 +1,134 @@
+"""
+Shared cache of Census character resolutions, by lowercase character name and by character id.
+Entries expire after a TTL, characters the API didn't return are cached as missing for a shorter TTL,
+and the cache is size bounded with least recently used eviction.
+"""
+
+# External Imports
+from collections import OrderedDict
+from logging import getLogger
+from time import monotonic
+
+log = getLogger('fs_bot')
+
+TTL = 6 * 3600  # Seconds a found character is cached for
+NEGATIVE_TTL = 600  # Seconds a missing character is cached for
+MAX_ENTRIES = 5000  # Maximum number of characters cached, found and missing each
+
+# Cached character info: [Character name, ID, faction, world]
+CharInfo = list
+
+
+class CensusCache:
+    """
+    LRU cache of character infos with per-entry TTLs and negative caching.
+
+    :param ttl: Seconds a found character is cached for.
+    :param negative_ttl: Seconds a missing character is cached for.
+    :param max_entries: Maximum number of found characters, and of missing characters, cached.
+    """
+
+    def __init__(self, ttl: float = TTL, negative_ttl: float = NEGATIVE_TTL, max_entries: int = MAX_ENTRIES):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.__by_id: OrderedDict[int, tuple[float, CharInfo]] = OrderedDict()  # id: (expiry, info), LRU ordered
+        self.__name_ids: dict[str, int] = dict()  # lowercase name: id
+        self.__missing: OrderedDict[str | int, float] = OrderedDict()  # lowercase name or id: expiry
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.evictions = 0
+
+    def __get_id(self, char_id: int) -> CharInfo | None:
+        if not (entry := self.__by_id.get(char_id)):
+            return None
+        if entry[0] < monotonic():
+            self.__remove(char_id)
+            return None
+        self.__by_id.move_to_end(char_id)
+        return entry[1]
+
+    def __is_missing(self, key: str | int) -> bool:
+        if (expiry := self.__missing.get(key)) is None:
+            return False
+        if expiry < monotonic():
+            del self.__missing[key]
+            return False
+        return True
+
+    def __remove(self, char_id: int):
+        _, info = self.__by_id.pop(char_id)
+        if self.__name_ids.get(info[0].lower()) == char_id:
+            del self.__name_ids[info[0].lower()]
+
+    def __lookup(self, keys: list, get) -> tuple[dict, list]:
+        found, unresolved = dict(), list()
+        for key in keys:
+            if (info := get(key)) is not None:
+                self.hits += 1
+                found[key] = info
+            elif self.__is_missing(key):
+                self.negative_hits += 1
+            else:
+                self.misses += 1
+                unresolved.append(key)
+        return found, unresolved
+
+    def lookup_names(self, names: list[str]) -> tuple[dict[str, CharInfo], list[str]]:
+        """
+        Look up character names.
+
+        :param names: Lowercase character names.
+        :return: dict of lowercase name: info for cached characters, list of names to request from the API.
+         Names cached as missing are in neither.
+        """
+        return self.__lookup(names, lambda name: self.__get_id(self.__name_ids[name])
+                             if name in self.__name_ids else None)
+
+    def lookup_ids(self, char_ids: list[int]) -> tuple[dict[int, CharInfo], list[int]]:
+        """
+        Look up character ids.
+
+        :param char_ids: Character ids.
+        :return: dict of id: info for cached characters, list of ids to request from the API.
+         Ids cached as missing are in neither.
+        """
+        return self.__lookup(char_ids, self.__get_id)
+
+    def put(self, info: CharInfo):
+        """Cache a character returned by the API"""
+        char_id, name = info[1], info[0].lower()
+        if char_id in self.__by_id:
+            self.__remove(char_id)
+        self.__by_id[char_id] = (monotonic() + self.ttl, info)
+        self.__name_ids[name] = char_id
+        self.__missing.pop(name, None)
+        self.__missing.pop(char_id, None)
+        while len(self.__by_id) > self.max_entries:
+            self.__remove(next(iter(self.__by_id)))
+            self.evictions += 1
+
+    def put_missing(self, key: str | int):
+        """Cache a lowercase character name or character id the API didn't return"""
+        self.__missing[key] = monotonic() + self.negative_ttl
+        self.__missing.move_to_end(key)
+        while len(self.__missing) > self.max_entries:
+            self.__missing.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.__by_id.clear()
+        self.__name_ids.clear()
+        self.__missing.clear()
+
+    def stats(self) -> str:
+        lookups = self.hits + self.misses + self.negative_hits
+        hit_rate = (self.hits + self.negative_hits) / lookups * 100 if lookups else 0
+        return (f"{len(self.__by_id)} characters, {len(self.__missing)} missing cached. "
+                f"Hits: {self.hits}, negative hits: {self.negative_hits}, misses: {self.misses} "
+                f"({hit_rate:.0f}% hit rate), evictions: {self.evictions}")
+
+
+#: Cache shared by all Census character lookups
+chars = CensusCache()
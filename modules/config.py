@@ -109,7 +109,17 @@ _collections = {
     "matches": "",
     "accounts": "",
     "account_usages": "",
-    "restart_data": ""
+    "restart_data": "",
+    "player_match_summary": "",
+    "counters": "",
+    "lobby_logs": ""
+}
+
+# Collections that may be omitted from the .ini, mapped to their default names
+_collections_optional = {
+    "player_match_summary": "player_match_summary",
+    "counters": "counters",
+    "lobby_logs": "lobby_logs"
 }
 
 # Stored Data Config
@@ -118,7 +128,23 @@ database = {
     "accounts_sheet_name": "",
     "url": "",
     "cluster": "",
-    "collections": _collections
+    "collections": _collections,
+    "backend": "executor",
+    "memory_latency": "0",
+    "db_workers": "8",
+    "db_background_workers": "2",
+    "gspread_workers": "2",
+    "match_id_block": "1"
+}
+
+# Database fields that may be omitted from the .ini, mapped to their defaults
+_database_optional = {
+    "backend": "executor",
+    "memory_latency": "0",  # Seconds of latency injected per call with the memory backend
+    "db_workers": "8",  # Threads for interactive database calls
+    "db_background_workers": "2",  # Threads for bulk / periodic database calls
+    "gspread_workers": "2",  # Threads for Google Sheets calls
+    "match_id_block": "1"  # Match ids reserved per counter round trip, unused ids are skipped on restart
 }
 
 TEST = False
@@ -188,16 +214,21 @@ def get_config(config_path, test=False):
         try:
             _collections[key] = config['Collections'][key]
         except KeyError:
-            _error_incorrect(key, 'Collections', file)
+            if key not in _collections_optional:
+                _error_incorrect(key, 'Collections', file)
+            _collections[key] = _collections_optional[key]
 
     # Database Section
     _check_section(config, 'Database', file)
     for key in database:
-        if key != "collections":
-            try:
-                database[key] = config['Database'][key]
-            except KeyError:
+        if key == "collections":
+            continue
+        try:
+            database[key] = config['Database'][key]
+        except KeyError:
+            if key not in _database_optional:
                 _error_incorrect(key, 'Database', file)
+            database[key] = _database_optional[key]
 
 
 def _check_section(config, section, file):
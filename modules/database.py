@@ -3,17 +3,73 @@
 Taken from POGBot, https://github.com/yakMM/POG-bot
 """
 
-# External modules
+# External Modules
 import pymongo.collection
-from pymongo import MongoClient
-from asyncio import get_event_loop
+import pymongo.database
+from pymongo import MongoClient, AsyncMongoClient, ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import PyMongoError
+from pymongo.asynchronous.collection import AsyncCollection
+import copy
+from collections import Counter
+from itertools import islice
 from logging import getLogger
+from time import perf_counter
 from typing import Callable
 
+# Internal Modules
+from modules.memory_db import MemoryCollection, MemoryDBError
+from modules import executors
+
 log = getLogger("fs_bot")
 
+#: Available backends for :func:`async_db_call`.
+#: executor: blocking pymongo calls run in the event loop's default executor.
+#: async: native asyncio calls through pymongo's AsyncMongoClient, no threads involved.
+#: memory: in-process collections from :mod:`modules.memory_db`, run in the executor like the executor backend.
+BACKENDS = ("executor", "async", "memory")
+
 # dict for the collections
-_collections: dict[str, pymongo.collection.Collection] = dict()
+_collections: dict[str, pymongo.collection.Collection | MemoryCollection] = dict()
+# dict for the async collections, only filled when using the async backend
+_async_collections: dict[str, AsyncCollection] = dict()
+# dict of sync db functions to their native async counterpart
+_async_calls: dict[Callable, Callable] = dict()
+_backend = "executor"
+
+# Number of round trips made to the database, by collection name
+_round_trips: Counter[str] = Counter()
+
+#: Indexes required by the bot's queries, by collection name: list of index key specs.
+#: matches: multikey indexes on the player arrays, for lookups of a players matches.
+#: account_usages: compound index for :func:`modules.account_usage.get_usages_period`.
+#: user_stats: elo, for leaderboards.
+#: lobby_logs: compound index for paging a lobbies archived logs, newest first.
+INDEXES: dict[str, list[list[tuple[str, int]]]] = {
+    "matches": [[("current_players", ASCENDING)], [("previous_players", ASCENDING)]],
+    "account_usages": [[("user_id", ASCENDING), ("start_time", ASCENDING)]],
+    "user_stats": [[("elo", DESCENDING)]],
+    "lobby_logs": [[("lobby", ASCENDING), ("stamp", DESCENDING)]],
+}
+
+#: Capped collections, by collection name: maximum size in bytes.  Created if missing on startup.
+#: lobby_logs: lobby log entries archived out of the in memory logs, oldest entries are dropped past the cap.
+CAPPED_COLLECTIONS: dict[str, int] = {
+    "lobby_logs": 16 * 1024 * 1024,
+}
+
+#: Documents the memory backend starts with, by collection name.  A real database already holds these.
+#: restart_data 0: state kept across restarts, eg dashboard message ids, read on startup by the lobbies and cogs.
+MEMORY_SEED_DOCUMENTS: dict[str, list[dict]] = {
+    "restart_data": [{"_id": 0, "dashboard_msg_ids": {}, "dm_threads": {}}],
+}
+
+#: Query patterns the bot runs, checked against their query plan on startup: (collection, filter, sort)
+QUERY_PATTERNS: list[tuple[str, dict, list[tuple[str, int]] | None]] = [
+    ("matches", {"$or": [{"current_players": 0}, {"previous_players": 0}]}, None),
+    ("account_usages", {"user_id": 0, "start_time": {"$gte": 0, "$lte": 0}}, None),
+    ("user_stats", {}, [("elo", DESCENDING)]),
+    ("lobby_logs", {"lobby": ""}, [("stamp", DESCENDING)]),
+]
 
 
 class DatabaseError(Exception):
@@ -28,17 +84,151 @@ class DatabaseError(Exception):
         super().__init__(message)
 
 
+#: Errors a database call can raise with any backend, for callers that handle a failed call
+ERRORS = (PyMongoError, DatabaseError, MemoryDBError)
+
+
 def init(config: dict):
     """
     Initialize the MongoClient and create a dictionary of available collections.
 
     :param config: Dictionary containing database config. Check :data:`modules.config.database`.
-    """
+    :raise DatabaseError: If the configured backend is unknown.
+    """
+    global _backend
+    if config["backend"] not in BACKENDS:
+        raise DatabaseError(f"Unknown backend '{config['backend']}', must be one of {BACKENDS}")
+    _backend = config["backend"]
+
+    if _backend == "memory":
+        # Latency is slept in the executor thread of each call, modelling a network round trip
+        latency = float(config["memory_latency"])
+        for collection in config["collections"]:
+            _collections[collection] = MemoryCollection(config["collections"][collection], latency=latency)
+        for collection, docs in MEMORY_SEED_DOCUMENTS.items():
+            _collections[collection].insert_many(copy.deepcopy(docs))
+        log.info("Initialized database with the 'memory' backend, %sms latency", latency * 1000)
+        return
+
+    # Synchronous client is always available, used on startup / shutdown and by the executor backend
     cluster = MongoClient(config["url"])
     db = cluster[config["cluster"]]
+    create_capped_collections(db, config["collections"])
     for collection in config["collections"]:
         _collections[collection] = db[config["collections"][collection]]
 
+    if _backend == "async":
+        # connect=False, the client connects on first use from inside the running event loop
+        async_cluster = AsyncMongoClient(config["url"], connect=False)
+        async_db = async_cluster[config["cluster"]]
+        for collection in config["collections"]:
+            _async_collections[collection] = async_db[config["collections"][collection]]
+    log.info("Initialized database with the '%s' backend", _backend)
+
+    create_indexes()
+    check_query_plans()
+
+
+def create_capped_collections(db: pymongo.database.Database, collections: dict):
+    """
+    Create the capped collections declared in :data:`CAPPED_COLLECTIONS` that don't exist yet.
+    Existing collections are left as they are.  Failures are logged, the collections are then created uncapped
+    on first insert.
+
+    :param db: Database to create the collections in.
+    :param collections: Configured collection names, by collection.
+    """
+    try:
+        existing = set(db.list_collection_names())
+    except PyMongoError as e:
+        log.error("Could not list collections: %s", e)
+        return
+    for collection, size in CAPPED_COLLECTIONS.items():
+        if collection not in collections or collections[collection] in existing:
+            continue
+        try:
+            db.create_collection(collections[collection], capped=True, size=size)
+            log.info("Created capped collection %s, %s bytes", collections[collection], size)
+        except PyMongoError as e:
+            log.error("Could not create capped collection %s: %s", collections[collection], e)
+
+
+def create_indexes():
+    """
+    Create the indexes declared in :data:`INDEXES`, for the configured collections.
+    Creating an index that already exists is a no-op on the server.
+    Failures are logged, the bot can still run without indexes.
+    """
+    for collection, indexes in INDEXES.items():
+        if collection not in _collections:
+            continue
+        for keys in indexes:
+            try:
+                name = _collections[collection].create_index(keys)
+                _round_trip(collection)
+                log.debug("Ensured index %s on %s", name, collection)
+            except PyMongoError as e:
+                log.error("Could not create index %s on %s: %s", keys, collection, e)
+
+
+def _plan_stages(plan: dict) -> set[str]:
+    """Recursively collect the stage names of an explain() query plan"""
+    stages = {plan.get("stage")}
+    for child in plan.get("inputStages", []) + ([plan["inputStage"]] if "inputStage" in plan else []):
+        stages |= _plan_stages(child)
+    return stages
+
+
+def check_query_plans() -> list[tuple[str, dict]]:
+    """
+    Run explain() on each of :data:`QUERY_PATTERNS`, warn if the winning plan falls back to a collection scan.
+
+    :return: List of (collection, filter) of the patterns using a collection scan.
+    """
+    collscans = list()
+    for collection, query, sort in QUERY_PATTERNS:
+        if collection not in _collections:
+            continue
+        cursor = _collections[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            plan = cursor.explain()["queryPlanner"]["winningPlan"]
+            _round_trip(collection)
+        except (PyMongoError, KeyError) as e:
+            log.error("Could not explain query %s on %s: %s", query, collection, e)
+            continue
+        if "COLLSCAN" in _plan_stages(plan.get("queryPlan", plan)):
+            log.warning("Query %s on %s uses a collection scan, check its indexes", query, collection)
+            collscans.append((collection, query))
+    return collscans
+
+
+def _round_trip(collection: str, count: int = 1):
+    """Record round trip(s) made to the database for a collection"""
+    _round_trips[collection] += count
+
+
+def get_round_trips(collection: str | None = None) -> int | dict[str, int]:
+    """
+    Get the number of round trips made to the database since startup or the last reset.
+
+    :param collection: Collection name.  If not provided, returns counts for all collections.
+    :return: Round trip count for the collection, or dict of collection name: count.
+    """
+    if collection:
+        return _round_trips[collection]
+    return dict(_round_trips)
+
+
+def reset_round_trips():
+    """Reset all round trip counters"""
+    _round_trips.clear()
+
+
+#: Cursor batch size used by :func:`stream_all_elements`
+STREAM_BATCH_SIZE = 1000
+
 
 def get_all_elements(init_class_method: Callable, collection: str):
     """
@@ -48,27 +238,94 @@ def get_all_elements(init_class_method: Callable, collection: str):
     :param collection: Collection name.
     :raise DatabaseError: If an error occurs while passing data.
     """
-    # Get all elements
-    items = _collections[collection].find()
+    # Get all elements, fetched STREAM_BATCH_SIZE at a time so each getMore can be counted as a round trip
+    items = _collections[collection].find(batch_size=STREAM_BATCH_SIZE)
+    _round_trip(collection)
     # Pass them to the method
     try:
-        for result in items:
+        for count, result in enumerate(items, start=1):
+            if count % STREAM_BATCH_SIZE == 0:
+                _round_trip(collection)
             init_class_method(result)
     except KeyError as e:
         raise DatabaseError(f"KeyError when retrieving {collection} from database: {e}")
 
 
+async def stream_all_elements(init_class_method: Callable, collection: str, projection: list | dict | None = None,
+                              batch_size: int = STREAM_BATCH_SIZE, pool: str = "db") -> int:
+    """
+    Stream all elements of a given collection to a method, without blocking the event loop.
+    Elements are fetched in batches, each batch is passed to the method as it arrives.
+
+    :param init_class_method: The data of each element will be passed to this method.
+    :param collection: Collection name.
+    :param projection: Fields to retrieve, all fields if not provided.
+    :param batch_size: Number of elements fetched per round trip.
+    :param pool: Executor pool batches are fetched in, when not using the async backend.
+    :return: Number of elements loaded.
+    :raise DatabaseError: If an error occurs while passing data.
+    """
+    start = perf_counter()
+    count = 0
+    try:
+        if _backend == "async":
+            cursor = _async_collections[collection].find(projection=projection, batch_size=batch_size)
+            async for result in cursor:
+                if count % batch_size == 0:
+                    _round_trip(collection)
+                init_class_method(result)
+                count += 1
+        else:
+            cursor = _collections[collection].find(projection=projection, batch_size=batch_size)
+            while batch := await executors.run(pool, lambda: list(islice(cursor, batch_size)),
+                                               site=f"{__name__}.stream_all_elements:{collection}"):
+                _round_trip(collection)
+                for result in batch:
+                    init_class_method(result)
+                count += len(batch)
+    except KeyError as e:
+        raise DatabaseError(f"KeyError when retrieving {collection} from database: {e}")
+
+    elapsed = perf_counter() - start
+    log.info("Streamed %s elements from %s in %.2fs (%.0f elements/s)",
+             count, collection, elapsed, count / elapsed if elapsed else 0)
+    return count
+
+
 async def async_db_call(call: Callable, *args, **kwargs):
     """
     Call a db function asynchronously.
+    With the async backend, the native async counterpart of the function is awaited if it has one,
+    otherwise the call is run in the 'db' executor pool.
 
     :param call: Function to call.
     :param args: Args to pass to the called function.
     :param kwargs: Kwargs to pass to the called function
     :return: Return the result of the call.
     """
-    loop = get_event_loop()
-    return await loop.run_in_executor(None, lambda: call(*args, **kwargs))
+    if _backend == "async" and (async_call := _async_calls.get(call)):
+        return await async_call(*args, **kwargs)
+    return await executors.run("db", call, *args, **kwargs)
+
+
+async def async_db_background_call(call: Callable, *args, **kwargs):
+    """
+    Same as :func:`async_db_call`, for bulk or periodic work.  Runs in the 'db_background' executor pool,
+    so it can't starve interactive calls of workers.
+    """
+    if _backend == "async" and (async_call := _async_calls.get(call)):
+        return await async_call(*args, **kwargs)
+    return await executors.run("db_background", call, *args, **kwargs)
+
+
+def _async_counterpart(sync_call: Callable):
+    """Register the decorated coroutine function as the native async version of sync_call"""
+
+    def decorator(async_call: Callable):
+        _async_calls[sync_call] = async_call
+        return async_call
+
+    return decorator
 
 
 def force_update(collection: str, elements):
@@ -81,6 +338,23 @@ def force_update(collection: str, elements):
     """
     _collections[collection].delete_many({})
     _collections[collection].insert_many(elements)
+    _round_trip(collection, 2)
+
+
+def _update_existing(collection: str, e_id: int, update: dict, caller: str):
+    """
+    Apply an update to an existing element, in a single round trip.
+
+    :param collection: Collection name.
+    :param e_id: Element id.
+    :param update: Update document, eg {"$set": doc}.
+    :param caller: Name of the calling function, for error messages.
+    :raise DatabaseError: If the element is not in the collection.
+    """
+    result = _collections[collection].update_one({"_id": e_id}, update)
+    _round_trip(collection)
+    if result.matched_count == 0:
+        raise DatabaseError(f"{caller}: Element {e_id} doesn't exist in collection {collection}")
 
 
 def set_field(collection: str, e_id: int, doc: dict):
@@ -92,10 +366,8 @@ def set_field(collection: str, e_id: int, doc: dict):
     :param doc: Data to set.
     :raise DatabaseError: If the element is not in the collection.
     """
-    if _collections[collection].count_documents({"_id": e_id}) != 0:
-        _collections[collection].update_one({"_id": e_id}, {"$set": doc})
-    else:
-        raise DatabaseError(f"set_field: Element {e_id} doesn't exist in collection {collection}")
+    _update_existing(collection, e_id, {"$set": doc}, "set_field")
+
 
 def unset_field(collection: str, e_id: int, doc: dict):
     """
@@ -106,10 +378,7 @@ def unset_field(collection: str, e_id: int, doc: dict):
     :param doc: Data to unset.
     :raise DatabaseError: If the element is not in the collection.
     """
-    if _collections[collection].count_documents({"_id": e_id}) != 0:
-        _collections[collection].update_one({"_id": e_id}, {"$unset": doc})
-    else:
-        raise DatabaseError(f"set_field: Element {e_id} doesn't exist in collection {collection}")
+    _update_existing(collection, e_id, {"$unset": doc}, "unset_field")
 
 
 def push_element(collection: str, e_id: int, doc: dict):
@@ -121,10 +390,7 @@ def push_element(collection: str, e_id: int, doc: dict):
     :param doc: Data to push. The key should be the field to push to.
     :raise DatabaseError: If the element is not in the collection.
     """
-    if _collections[collection].count_documents({"_id": e_id}) != 0:
-        _collections[collection].update_one({"_id": e_id}, {"$push": doc})
-    else:
-        raise DatabaseError(f"set_field: Element {e_id} doesn't exist in collection {collection}")
+    _update_existing(collection, e_id, {"$push": doc}, "push_element")
 
 
 def upsert_push_element(collection: str, e_id: int, doc: dict):
@@ -136,6 +402,7 @@ def upsert_push_element(collection: str, e_id: int, doc: dict):
     :param doc: Data to push. The key should be the field to push to.
     """
     _collections[collection].update_one({"_id": e_id}, {"$push": doc}, upsert=True)
+    _round_trip(collection)
 
 
 def get_element(collection: str, item_id: int) -> (dict, None):
@@ -146,17 +413,21 @@ def get_element(collection: str, item_id: int) -> (dict, None):
     :param item_id: Element id.
     :return: Element found, or None if not found.
     """
-    if _collections[collection].count_documents({"_id": item_id}) == 0:
-        return
     item = _collections[collection].find_one({"_id": item_id})
+    _round_trip(collection)
     return item
 
 
 def get_last_element(collection: str) -> (dict, None):
-    if _collections[collection].count_documents({}) == 0:
-        return
-    items = _collections[collection].find(filter={}, limit=1, sort=[('_id', -1)])
-    return items[0]
+    """
+    Get the element with the highest id.
+
+    :param collection: Collection name.
+    :return: Element found, or None if the collection is empty.
+    """
+    item = _collections[collection].find_one(filter={}, sort=[('_id', -1)])
+    _round_trip(collection)
+    return item
 
 
 def get_field(collection: str, e_id: int, specific: str):
@@ -167,11 +438,13 @@ def get_field(collection: str, e_id: int, specific: str):
     :param e_id: Element id.
     :param specific: Field name.
     :return: Element found, or None if not found.
+    :raise KeyError: If the element exists but doesn't have the field.
     """
-    if _collections[collection].count_documents({"_id": e_id}) == 0:
+    item = _collections[collection].find_one({"_id": e_id}, {"_id": False, specific: True})
+    _round_trip(collection)
+    if item is None:
         return
-    item = _collections[collection].find_one({"_id": e_id}, {"_id": False, specific: True})[specific]
-    return item
+    return item[specific]
 
 
 def set_element(collection: str, e_id: id, data: dict):
@@ -182,10 +455,8 @@ def set_element(collection: str, e_id: id, data: dict):
     :param e_id: Element id.
     :param data: Element data.
     """
-    if _collections[collection].count_documents({"_id": e_id}) != 0:
-        _collections[collection].replace_one({"_id": e_id}, data)
-    else:
-        _collections[collection].insert_one(data)
+    _collections[collection].replace_one({"_id": e_id}, data, upsert=True)
+    _round_trip(collection)
 
 
 def remove_element(collection: str, e_id: int):
@@ -196,9 +467,9 @@ def remove_element(collection: str, e_id: int):
     :param e_id: Element id.
     :raise DatabaseError: If the element is not in the collection.
     """
-    if _collections[collection].count_documents({"_id": e_id}) != 0:
-        _collections[collection].delete_one({"_id": e_id})
-    else:
+    result = _collections[collection].delete_one({"_id": e_id})
+    _round_trip(collection)
+    if result.deleted_count == 0:
         raise DatabaseError(f"Element {e_id} doesn't exist in collection {collection}")
 
 
@@ -207,15 +478,34 @@ def find_elements(collection: str, query: dict, projection=None):
     Query a collection via selection_criteria query
 
     """
+    _round_trip(collection)
     if projection:
         return _collections[collection].find(query, projection)
     return _collections[collection].find(query)
 
 
+def find_page(collection: str, query: dict, sort: list[tuple[str, int]], skip: int, limit: int,
+              projection=None) -> list:
+    """
+    Retrieve a page of sorted query results
+
+    :param collection: Collection name.
+    :param query: Query filter.
+    :param sort: Sort key specs.
+    :param skip: Number of results to skip.
+    :param limit: Maximum number of results, the page size.
+    :param projection: Optional projection.
+    :return: List of documents.
+    """
+    _round_trip(collection)
+    return list(_collections[collection].find(query, projection).sort(sort).skip(skip).limit(limit))
+
+
 def aggregate(collection: str, query: list):
     """
     Aggregate a collection via query list, using keywords for $match, $group, $project dicts etc
     """
+    _round_trip(collection)
     return _collections[collection].aggregate(query)
 
 
@@ -224,4 +514,173 @@ def add_element(collection: str, doc):
     Add an element to a collection, with an unspecified object ID
     """
     _collections[collection].insert_one(doc)
+    _round_trip(collection)
+
+
+def bulk_write(collection: str, requests: list):
+    """
+    Send a list of write operations to a collection in a single round trip.  Operations are unordered.
+
+    :param collection: Collection name.
+    :param requests: List of pymongo write operations, eg UpdateOne, ReplaceOne.
+    :return: The pymongo BulkWriteResult.
+    """
+    result = _collections[collection].bulk_write(requests, ordered=False)
+    _round_trip(collection)
+    return result
+
+
+def increment_counter(collection: str, counter: str, count: int = 1) -> int:
+    """
+    Atomically increment a counter document, creating it if it doesn't exist.
+
+    :param collection: Collection name.
+    :param counter: Counter name, the _id of the counter document.
+    :param count: Amount to increment by.
+    :return: The counter value after the increment.
+    """
+    doc = _collections[collection].find_one_and_update({"_id": counter}, {"$inc": {"value": count}},
+                                                       upsert=True, return_document=ReturnDocument.AFTER)
+    _round_trip(collection)
+    return doc["value"]
+
+
+def seed_counter(collection: str, counter: str, value: int):
+    """
+    Raise a counter to at least value, creating it if it doesn't exist.  Never lowers the counter.
+
+    :param collection: Collection name.
+    :param counter: Counter name, the _id of the counter document.
+    :param value: Minimum counter value.
+    """
+    _collections[collection].update_one({"_id": counter}, {"$max": {"value": value}}, upsert=True)
+    _round_trip(collection)
+
+
+# Native async counterparts, used by async_db_call with the async backend.
+# Cursors are returned as lists, as callers iterate / list() the results synchronously.
+
+@_async_counterpart(get_all_elements)
+async def _async_get_all_elements(init_class_method: Callable, collection: str):
+    _round_trip(collection)
+    try:
+        async for result in _async_collections[collection].find():
+            init_class_method(result)
+    except KeyError as e:
+        raise DatabaseError(f"KeyError when retrieving {collection} from database: {e}")
+
+
+async def _async_update_existing(collection: str, e_id: int, update: dict, caller: str):
+    result = await _async_collections[collection].update_one({"_id": e_id}, update)
+    _round_trip(collection)
+    if result.matched_count == 0:
+        raise DatabaseError(f"{caller}: Element {e_id} doesn't exist in collection {collection}")
+
+
+@_async_counterpart(set_field)
+async def _async_set_field(collection: str, e_id: int, doc: dict):
+    await _async_update_existing(collection, e_id, {"$set": doc}, "set_field")
+
+
+@_async_counterpart(unset_field)
+async def _async_unset_field(collection: str, e_id: int, doc: dict):
+    await _async_update_existing(collection, e_id, {"$unset": doc}, "unset_field")
+
+
+@_async_counterpart(push_element)
+async def _async_push_element(collection: str, e_id: int, doc: dict):
+    await _async_update_existing(collection, e_id, {"$push": doc}, "push_element")
+
+
+@_async_counterpart(upsert_push_element)
+async def _async_upsert_push_element(collection: str, e_id: int, doc: dict):
+    await _async_collections[collection].update_one({"_id": e_id}, {"$push": doc}, upsert=True)
+    _round_trip(collection)
+
+
+@_async_counterpart(get_element)
+async def _async_get_element(collection: str, item_id: int) -> (dict, None):
+    item = await _async_collections[collection].find_one({"_id": item_id})
+    _round_trip(collection)
+    return item
+
+
+@_async_counterpart(get_last_element)
+async def _async_get_last_element(collection: str) -> (dict, None):
+    item = await _async_collections[collection].find_one(filter={}, sort=[('_id', -1)])
+    _round_trip(collection)
+    return item
+
+
+@_async_counterpart(get_field)
+async def _async_get_field(collection: str, e_id: int, specific: str):
+    item = await _async_collections[collection].find_one({"_id": e_id}, {"_id": False, specific: True})
+    _round_trip(collection)
+    if item is None:
+        return
+    return item[specific]
+
+
+@_async_counterpart(set_element)
+async def _async_set_element(collection: str, e_id: id, data: dict):
+    await _async_collections[collection].replace_one({"_id": e_id}, data, upsert=True)
+    _round_trip(collection)
+
+
+@_async_counterpart(remove_element)
+async def _async_remove_element(collection: str, e_id: int):
+    result = await _async_collections[collection].delete_one({"_id": e_id})
+    _round_trip(collection)
+    if result.deleted_count == 0:
+        raise DatabaseError(f"Element {e_id} doesn't exist in collection {collection}")
+
+
+@_async_counterpart(find_elements)
+async def _async_find_elements(collection: str, query: dict, projection=None) -> list:
+    _round_trip(collection)
+    if projection:
+        return await _async_collections[collection].find(query, projection).to_list(None)
+    return await _async_collections[collection].find(query).to_list(None)
+
+
+@_async_counterpart(find_page)
+async def _async_find_page(collection: str, query: dict, sort: list[tuple[str, int]], skip: int, limit: int,
+                           projection=None) -> list:
+    _round_trip(collection)
+    cursor = _async_collections[collection].find(query, projection).sort(sort).skip(skip).limit(limit)
+    return await cursor.to_list(None)
+
+
+@_async_counterpart(aggregate)
+async def _async_aggregate(collection: str, query: list) -> list:
+    _round_trip(collection)
+    cursor = await _async_collections[collection].aggregate(query)
+    return await cursor.to_list(None)
+
+
+@_async_counterpart(add_element)
+async def _async_add_element(collection: str, doc):
+    await _async_collections[collection].insert_one(doc)
+    _round_trip(collection)
+
+
+@_async_counterpart(bulk_write)
+async def _async_bulk_write(collection: str, requests: list):
+    result = await _async_collections[collection].bulk_write(requests, ordered=False)
+    _round_trip(collection)
+    return result
+
+
+@_async_counterpart(increment_counter)
+async def _async_increment_counter(collection: str, counter: str, count: int = 1) -> int:
+    doc = await _async_collections[collection].find_one_and_update({"_id": counter}, {"$inc": {"value": count}},
+                                                                   upsert=True,
+                                                                   return_document=ReturnDocument.AFTER)
+    _round_trip(collection)
+    return doc["value"]
+
 
+@_async_counterpart(seed_counter)
+async def _async_seed_counter(collection: str, counter: str, value: int):
+    await _async_collections[collection].update_one({"_id": counter}, {"$max": {"value": value}}, upsert=True)
+    _round_trip(collection)
@@ -16,7 +16,7 @@ import discord
 import modules.config as cfg
 import classes.players
 from classes import Player
-from modules import tools, accounts_handler as accounts
+from modules import tools, accounts_handler as accounts, timeouts
 from display import AllStrings as disp, views
 
 log = getLogger('fs_bot')
@@ -221,7 +221,8 @@ async def role_update(member: discord.Member = None, player: classes.Player = No
 
 # Maybe this should be in the Player class
 async def timeout_player(p: Player, stamp: int, mod: discord.Member = None, reason: str = ''):
-    """Timeout a player until a given timestamp, by a certain mod, with a reason"""
+    """Timeout a player until a given timestamp, by a certain mod, with a reason.
+    With stamp 0 the timeout is removed, reason is then the role update reason."""
     p_memb = guild.get_member(p.id)
     update_stamp = tools.format_time_from_stamp(tools.timestamp_now(), "f")
     formatted_stamp = tools.format_time_from_stamp(stamp, 'f')
@@ -231,16 +232,18 @@ async def timeout_player(p: Player, stamp: int, mod: discord.Member = None, reas
         await asyncio.gather(
             p.set_timeout(stamp),
             disp.TIMEOUT_DM_UPDATE_R.edit(old_msg, old_msg.content, update_stamp, view=False),
-            role_update(p_memb, p, reason='Player requested freedom' if not mod else f'Timeout removed by {mod.name}'),
+            role_update(p_memb, p, reason=reason or ('Player requested freedom' if not mod
+                                                     else f'Timeout removed by {mod.name}')),
         )
         if mod:
             await disp.TIMEOUT_DM_REMOVED.send(p_memb, mod.mention)
         await d_log(message=disp.TIMEOUT_CLEAR(p.mention, p.name), source=mod.name if mod else None)
         return True
 
-    elif p.timeout_msg_id:
+    elif p.timeout_msg_id and p.timeout_until > tools.timestamp_now():  # Update running timeout
         old_msg = await p_memb.fetch_message(p.timeout_msg_id)
         await p.set_timeout(stamp, timeout_msg_id=p.timeout_msg_id, reason=reason, mod_id=mod.id)
+        timeouts.schedule(p)
         await disp.TIMEOUT_DM_UPDATED.edit(old_msg,
                                            disp.TIMEOUT_DM(formatted_stamp, mod.mention, p.timeout_reason),
                                            update_stamp),
@@ -249,6 +252,7 @@ async def timeout_player(p: Player, stamp: int, mod: discord.Member = None, reas
     else:  # Set new timeout
         msg = await disp.TIMEOUT_DM.send(p_memb, formatted_stamp, mod.mention, reason, view=views.RemoveTimeoutView())
         await p.set_timeout(stamp, msg.id, reason, mod.id)
+        timeouts.schedule(p)
         await role_update(p_memb, p, reason=f'Player timed out by {mod.name} for reason: {reason}')
         await d_log(message=disp.TIMEOUT_LOG(p.name, formatted_stamp, mod.name, reason))
         if p.account:
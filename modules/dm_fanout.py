@@ -0,0 +1,175 @@
+"""
+Rate limited sending of direct messages.
+Sends are capped in concurrency and paced by a token bucket, so bursts of DMs (eg lobby pings) don't run into Discord's
+DM rate limits and global 429s.  Users with closed DMs are remembered for a cooldown instead of being retried,
+transient failures are retried with exponential backoff, and each batch logs its delivery latency.
+"""
+
+# External Imports
+import asyncio
+import random
+import statistics
+from dataclasses import dataclass, field
+from logging import getLogger
+from time import monotonic
+
+import discord
+
+log = getLogger('fs_bot')
+
+MAX_CONCURRENT = 5  # DMs in flight at once
+RATE = 5  # DMs per second, sustained
+BURST = 10  # DMs that can be sent at once after an idle period
+CLOSED_DM_COOLDOWN = 6 * 3600  # Seconds a user with closed DMs is skipped for
+MAX_ATTEMPTS = 3  # Attempts per DM, for rate limited or server errors
+BACKOFF_BASE = 1  # Seconds before the first retry, doubled per attempt
+
+
+class TokenBucket:
+    """
+    Token bucket, acquire() waits until a token is available.  Waiters are served in order.
+
+    :param rate: Tokens added per second.
+    :param capacity: Maximum tokens held.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.__tokens = capacity
+        self.__updated = monotonic()
+        self.__lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.__lock:
+            while True:
+                now = monotonic()
+                self.__tokens = min(self.capacity, self.__tokens + (now - self.__updated) * self.rate)
+                self.__updated = now
+                if self.__tokens >= 1:
+                    self.__tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.__tokens) / self.rate)
+
+
+@dataclass
+class BatchReport:
+    """Delivery report of a batch of DMs"""
+    label: str
+    sent: int = 0
+    closed: int = 0  # Skipped, or found to have closed DMs
+    failed: int = 0
+    latencies: list[float] = field(default_factory=list)  # Seconds from batch start to each delivery
+
+    def __str__(self):
+        text = f"DM batch [{self.label}]: {self.sent} sent, {self.closed} closed DMs, {self.failed} failed"
+        if self.latencies:
+            median = statistics.median(self.latencies)
+            text += f", latency median {median:.2f}s, max {max(self.latencies):.2f}s"
+        return text
+
+
+class DMFanout:
+    """
+    Sends DMs through a concurrency cap and a token bucket.
+
+    :param max_concurrent: DMs in flight at once.
+    :param rate: DMs per second, sustained.
+    :param burst: DMs that can be sent at once after an idle period.
+    :param closed_cooldown: Seconds a user with closed DMs is skipped for.
+    """
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT, rate: float = RATE, burst: float = BURST,
+                 closed_cooldown: float = CLOSED_DM_COOLDOWN):
+        self.closed_cooldown = closed_cooldown
+        self.__semaphore = asyncio.Semaphore(max_concurrent)
+        self.__bucket = TokenBucket(rate, burst)
+        self.__closed: dict[int, float] = dict()  # user id: monotonic time DMs are retried at
+        self.sent = 0
+        self.closed_skips = 0
+        self.retries = 0
+        self.failed = 0
+
+    def is_closed(self, user_id: int) -> bool:
+        """Whether a user was found to have closed DMs within the cooldown"""
+        if (retry_at := self.__closed.get(user_id)) is None:
+            return False
+        if retry_at < monotonic():
+            del self.__closed[user_id]
+            return False
+        return True
+
+    async def send(self, target, string, *args, **kwargs) -> discord.Message | None:
+        """
+        Send a DM, waiting for the concurrency cap and rate limit.
+
+        :param target: User, Member or Player to DM.
+        :param string: AllStrings member to send.
+        :param args: Format args for the string.
+        :param kwargs: Send kwargs for the string, eg view.
+        :return: The sent message, None if the user has closed DMs or sending failed.
+        """
+        message, _ = await self.__send(target, string, args, kwargs)
+        return message
+
+    async def __send(self, target, string, args, kwargs) -> tuple[discord.Message | None, str]:
+        if self.is_closed(target.id):
+            self.closed_skips += 1
+            return None, "closed"
+        async with self.__semaphore:
+            for attempt in range(MAX_ATTEMPTS):
+                await self.__bucket.acquire()
+                try:
+                    message = await string.send(target, *args, **kwargs)
+                    self.sent += 1
+                    return message, "sent"
+                except discord.Forbidden:
+                    self.__closed[target.id] = monotonic() + self.closed_cooldown
+                    return None, "closed"
+                except discord.HTTPException as e:
+                    if e.status != 429 and e.status < 500 or attempt == MAX_ATTEMPTS - 1:
+                        log.info("Failed to DM %s: %s", target.id, e)
+                        break
+                    self.retries += 1
+                    await asyncio.sleep(BACKOFF_BASE * 2 ** attempt + random.random())
+                except Exception as e:
+                    log.error("Unexpected error sending DM to %s", target.id, exc_info=e)
+                    break
+        self.failed += 1
+        return None, "failed"
+
+    async def fan_out(self, label: str, sends: list[tuple]) -> list[discord.Message | None]:
+        """
+        Send a batch of DMs concurrently, within the rate limits, and log the batch delivery report.
+
+        :param label: Name of the batch for the report, eg "casual lobby pings".
+        :param sends: List of (target, string, args, kwargs) tuples, args and kwargs are optional.
+        :return: Sent messages, or None for each DM not delivered, in the order of sends.
+        """
+        report = BatchReport(label)
+        start = monotonic()
+
+        async def send_one(target, string, args=(), kwargs=None):
+            message, outcome = await self.__send(target, string, args, kwargs or {})
+            match outcome:
+                case "sent":
+                    report.sent += 1
+                    report.latencies.append(monotonic() - start)
+                case "closed":
+                    report.closed += 1
+                case _:
+                    report.failed += 1
+            return message
+
+        messages = await asyncio.gather(*[send_one(*send) for send in sends])
+        if sends:
+            log.info(str(report))
+        return list(messages)
+
+    def stats(self) -> str:
+        return (f"Sent: {self.sent}, closed DMs skipped: {self.closed_skips} ({len(self.__closed)} users cached), "
+                f"retries: {self.retries}, failed: {self.failed}")
+
+
+#: Service shared by all DM senders
+dms = DMFanout()
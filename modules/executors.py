@@ -0,0 +1,160 @@
+"""
+Named, bounded thread pools for blocking I/O, with queue metrics.
+db: interactive database calls, eg command reads.
+db_background: bulk / periodic database work, eg ranks updates and write buffer flushes, so it can't starve db.
+gspread: Google Sheets calls.
+Each pool tracks queue depth, and wait / execution time per call site.
+"""
+
+# External Imports
+import asyncio
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from logging import getLogger
+from time import perf_counter
+from typing import Callable
+
+log = getLogger('fs_bot')
+
+#: Default number of worker threads per pool, overridable through :func:`init`
+POOL_SIZES = {
+    "db": 8,
+    "db_background": 2,
+    "gspread": 2
+}
+WAIT_WARN = 1.0  # Seconds a call can wait for a worker before a warning is logged
+SATURATION_LOG_INTERVAL = 60  # Minimum seconds between saturation warnings, per pool
+
+_pools: dict[str, 'MonitoredExecutor'] = dict()
+
+
+@dataclass
+class SiteStats:
+    """Timings of the calls made from a call site, in seconds"""
+    calls: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+    exec_total: float = 0.0
+    exec_max: float = 0.0
+
+    def add(self, wait: float, execution: float):
+        self.calls += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.exec_total += execution
+        self.exec_max = max(self.exec_max, execution)
+
+
+class MonitoredExecutor:
+    """
+    ThreadPoolExecutor wrapper recording queue depth, and wait / execution times per call site.
+
+    :param name: Pool name, used for thread names and logs.
+    :param max_workers: Number of worker threads.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.__executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"fs_{name}")
+        self.__lock = threading.Lock()
+        self.queued = 0  # Calls waiting for a worker
+        self.active = 0  # Calls running
+        self.peak_queued = 0
+        self.saturations = 0  # Number of calls submitted while every worker was busy
+        self.__last_saturation_log = 0.0
+        self.sites: dict[str, SiteStats] = dict()
+
+    async def run(self, call: Callable, *args, site: str | None = None, **kwargs):
+        """
+        Run a blocking call in the pool.
+
+        :param call: Function to call.
+        :param site: Call site name for metrics, defaults to the calling function.
+        :return: Return the result of the call.
+        """
+        site = site or _caller_site(call)
+        submitted = perf_counter()
+        with self.__lock:
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+            saturated = self.active + self.queued > self.max_workers
+            if saturated:
+                self.saturations += 1
+        if saturated and submitted - self.__last_saturation_log > SATURATION_LOG_INTERVAL:
+            self.__last_saturation_log = submitted
+            log.warning("Executor '%s' saturated: %s active, %s queued (%s workers)",
+                        self.name, self.active, self.queued, self.max_workers)
+
+        def timed_call():
+            started = perf_counter()
+            with self.__lock:
+                self.queued -= 1
+                self.active += 1
+            try:
+                return call(*args, **kwargs)
+            finally:
+                ended = perf_counter()
+                with self.__lock:
+                    self.active -= 1
+                    self.sites.setdefault(site, SiteStats()).add(started - submitted, ended - started)
+                if started - submitted > WAIT_WARN:
+                    log.warning("Executor '%s': %s waited %.2fs for a worker", self.name, site, started - submitted)
+
+        return await asyncio.get_event_loop().run_in_executor(self.__executor, timed_call)
+
+    def reset(self):
+        """Reset call site stats and peaks"""
+        with self.__lock:
+            self.sites.clear()
+            self.peak_queued = self.queued
+            self.saturations = 0
+
+    def shutdown(self):
+        self.__executor.shutdown(wait=False)
+
+
+def _caller_site(call: Callable) -> str:
+    """Name the call site as the function calling into the executor module, plus the called function"""
+    frame = sys._getframe(2)
+    while frame and frame.f_globals.get('__name__') in (__name__, 'modules.database'):
+        frame = frame.f_back
+    caller = f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}" if frame else '?'
+    return f"{caller}:{getattr(call, '__name__', repr(call))}"
+
+
+def init(sizes: dict[str, int | str]):
+    """
+    Set pool sizes, pools already created are replaced.
+
+    :param sizes: Dict of pool name: number of workers.
+    """
+    for name, size in sizes.items():
+        POOL_SIZES[name] = int(size)
+        if old_pool := _pools.pop(name, None):
+            old_pool.shutdown()
+
+
+def get(name: str) -> MonitoredExecutor:
+    """Get a pool by name, creating it on first use"""
+    if name not in _pools:
+        if name not in POOL_SIZES:
+            raise ValueError(f"Unknown executor '{name}', must be one of {tuple(POOL_SIZES)}")
+        _pools[name] = MonitoredExecutor(name, POOL_SIZES[name])
+    return _pools[name]
+
+
+async def run(name: str, call: Callable, *args, **kwargs):
+    """Run a blocking call in the named pool, see :meth:`MonitoredExecutor.run`"""
+    return await get(name).run(call, *args, **kwargs)
+
+
+def get_all() -> list[MonitoredExecutor]:
+    return list(_pools.values())
+
+
+def reset_all():
+    for pool in _pools.values():
+        pool.reset()
@@ -0,0 +1,67 @@
+"""
+Allocates unique, increasing ids from counter documents in the database.
+Allocation is a single atomic $inc, so ids stay unique even with several bot processes.
+"""
+
+# External Imports
+import asyncio
+from logging import getLogger
+
+# Internal Imports
+import modules.database as db
+
+log = getLogger('fs_bot')
+
+COLLECTION = 'counters'
+
+
+class IdAllocator:
+    """
+    Hands out ids from a counter document, optionally reserving them in blocks to save a round trip per id.
+    Unused ids of a reserved block are skipped when the bot restarts.
+
+    :param counter: Counter name, the _id of the counter document.
+    :param seed_collection: Collection whose highest _id the counter is raised to on :meth:`init`,
+     so a new counter continues from existing elements.
+    :param block_size: Number of ids reserved per round trip.
+    """
+
+    def __init__(self, counter: str, seed_collection: str | None = None, block_size: int = 1):
+        self.counter = counter
+        self.block_size = block_size
+        self.__seed_collection = seed_collection
+        self.__seeded = False
+        self.__next = 1  # Next id to hand out
+        self.__end = 0  # Last id of the reserved block
+        self.__lock = asyncio.Lock()
+        self.last_id = 0  # Last id handed out
+
+    async def init(self, block_size: int | None = None):
+        """Seed the counter and reserve the first block, so the first allocation doesn't wait on the database"""
+        async with self.__lock:
+            self.block_size = block_size or self.block_size
+            await self.__seed()
+            if self.__next > self.__end:
+                await self.__reserve()
+
+    async def __seed(self):
+        if self.__seeded or not self.__seed_collection:
+            return
+        last = await db.async_db_call(db.get_last_element, self.__seed_collection)
+        await db.async_db_call(db.seed_counter, COLLECTION, self.counter, last['_id'] if last else 0)
+        self.__seeded = True
+
+    async def __reserve(self):
+        end = await db.async_db_call(db.increment_counter, COLLECTION, self.counter, self.block_size)
+        self.__next, self.__end = end - self.block_size + 1, end
+        log.debug("Reserved %s ids %s-%s", self.counter, self.__next, self.__end)
+
+    async def next_id(self) -> int:
+        """Allocate the next id"""
+        async with self.__lock:
+            if self.__next > self.__end:
+                await self.__seed()
+                await self.__reserve()
+            self.last_id = self.__next
+            self.__next += 1
+            return self.last_id
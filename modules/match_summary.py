@@ -0,0 +1,81 @@
+"""
+Per-player match summary, kept up to date as matches end.
+Holds total matches, total duration and per-partner counts / durations, so /stats is a single document read
+instead of aggregations over the whole matches collection.
+"""
+
+# External Imports
+from logging import getLogger
+from pymongo import UpdateOne, ReplaceOne
+
+# Internal Imports
+from modules import database as db
+
+log = getLogger('fs_bot')
+
+COLLECTION = 'player_match_summary'
+MATCH_FIELDS = ['start_stamp', 'end_stamp', 'current_players', 'previous_players']  # Fields read from match data
+
+
+def _match_players_duration(match_data: dict) -> tuple[set[int], int]:
+    """Return the set of players who took part in a match, and the match duration"""
+    players = {*match_data.get('current_players', []), *match_data.get('previous_players', [])}
+    return players, match_data['end_stamp'] - match_data['start_stamp']
+
+
+def summary_updates(match_data: dict) -> list[UpdateOne]:
+    """Build the summary upserts for the players of an ended match, from its end data"""
+    players, duration = _match_players_duration(match_data)
+    requests = []
+    for p_id in players:
+        inc = {'total_matches': 1, 'total_duration': duration}
+        for partner_id in players - {p_id}:
+            inc[f'partners.{partner_id}.count'] = 1
+            inc[f'partners.{partner_id}.duration'] = duration
+        requests.append(UpdateOne({'_id': p_id}, {'$inc': inc}, upsert=True))
+    return requests
+
+
+async def record_match(match_data: dict):
+    """Add an ended match to the summaries of its players, as a single bulk write"""
+    if requests := summary_updates(match_data):
+        await db.async_db_call(db.bulk_write, COLLECTION, requests)
+
+
+async def get_summary(player_id: int) -> dict | None:
+    """Retrieve a players match summary, None if the player has no matches"""
+    return await db.async_db_call(db.get_element, COLLECTION, player_id)
+
+
+def top_partners(summary: dict, count: int = 3) -> list[tuple[int, int, int]]:
+    """Return the top partners of a summary by match count, as a list of (player_id, match_count, duration)"""
+    partners = [(int(p_id), data['count'], data['duration']) for p_id, data in summary.get('partners', {}).items()]
+    return sorted(partners, key=lambda x: x[1], reverse=True)[:count]
+
+
+async def rebuild() -> tuple[int, int]:
+    """
+    Rebuild all summaries from the matches collection, replacing existing summaries.
+    Matches ending while the rebuild runs may not be counted, so should be run while no matches are active.
+
+    :return: Number of matches processed, number of player summaries written.
+    """
+    summaries: dict[int, dict] = dict()
+
+    def add_match(match_data: dict):
+        players, duration = _match_players_duration(match_data)
+        for p_id in players:
+            summary = summaries.setdefault(p_id, {'total_matches': 0, 'total_duration': 0, 'partners': dict()})
+            summary['total_matches'] += 1
+            summary['total_duration'] += duration
+            for partner_id in players - {p_id}:
+                partner = summary['partners'].setdefault(str(partner_id), {'count': 0, 'duration': 0})
+                partner['count'] += 1
+                partner['duration'] += duration
+
+    match_count = await db.stream_all_elements(add_match, 'matches', projection=MATCH_FIELDS, pool='db_background')
+    if summaries:
+        requests = [ReplaceOne({'_id': p_id}, summary, upsert=True) for p_id, summary in summaries.items()]
+        await db.async_db_background_call(db.bulk_write, COLLECTION, requests)
+    log.info("Rebuilt match summaries for %s players from %s matches", len(summaries), match_count)
+    return match_count, len(summaries)
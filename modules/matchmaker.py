@@ -0,0 +1,150 @@
+"""
+ELO matchmaking queue.
+Queued players are kept sorted by ELO, and each pairing pass pairs players with the nearest compatible player in ELO.
+The ELO difference a player accepts widens the longer they wait.
+"""
+
+# External Imports
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Hashable
+
+BASE_WINDOW = 50  # ELO difference accepted on joining the queue
+WIDEN_PER_MINUTE = 25  # ELO added to the accepted difference per minute in queue
+MAX_WINDOW = 400  # Maximum ELO difference accepted
+LOOKAHEAD = 8  # Unpaired neighbours checked on each side of a player, bounds the cost of a pass
+
+
+@dataclass(eq=False)
+class QueueEntry:
+    """
+    A queued player.
+
+    :param key: Queued player, hashable and unique in the queue.
+    :param elo: ELO of the player on joining the queue.
+    :param queued_at: Timestamp the player joined the queue.
+    :param skill_level: Skill level of the player.
+    :param req_levels: Skill levels the player accepts opponents of, empty for any.
+    :param factions: Factions the player is willing to play, must not be empty.
+    """
+    key: Hashable
+    elo: float
+    queued_at: float
+    skill_level: Hashable = None
+    req_levels: frozenset = field(default_factory=frozenset)
+    factions: frozenset = field(default_factory=frozenset)
+    order: int = 0  # Tiebreaker for equal ELO, set by the queue
+
+
+def compatible(a: QueueEntry, b: QueueEntry) -> bool:
+    """Whether two players accept each others skill level, and can play different factions"""
+    if a.req_levels and b.skill_level not in a.req_levels:
+        return False
+    if b.req_levels and a.skill_level not in b.req_levels:
+        return False
+    return len(a.factions | b.factions) >= 2
+
+
+class Matchmaker:
+    """
+    Queue of players waiting for a match, sorted by ELO.
+
+    :param base_window: ELO difference accepted on joining the queue.
+    :param widen_per_minute: ELO added to the accepted difference per minute in queue.
+    :param max_window: Maximum ELO difference accepted.
+    """
+
+    def __init__(self, base_window: float = BASE_WINDOW, widen_per_minute: float = WIDEN_PER_MINUTE,
+                 max_window: float = MAX_WINDOW):
+        self.base_window = base_window
+        self.widen_per_minute = widen_per_minute
+        self.max_window = max_window
+        self.__sort_keys: list[tuple[float, int]] = []  # (elo, order), sorted
+        self.__entries: list[QueueEntry] = []  # entries, in the same order as __sort_keys
+        self.__by_key: dict[Hashable, QueueEntry] = dict()
+        self.__counter = 0
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, key: Hashable):
+        return key in self.__by_key
+
+    @property
+    def queued(self):
+        """Keys of all queued players"""
+        return self.__by_key.keys()
+
+    def add(self, entry: QueueEntry):
+        """Queue a player, replacing their previous entry if already queued"""
+        self.remove(entry.key)
+        self.__counter += 1
+        entry.order = self.__counter
+        sort_key = (entry.elo, entry.order)
+        index = bisect_left(self.__sort_keys, sort_key)
+        self.__sort_keys.insert(index, sort_key)
+        self.__entries.insert(index, entry)
+        self.__by_key[entry.key] = entry
+
+    def remove(self, key: Hashable) -> QueueEntry | None:
+        """Remove a player from the queue, returns their entry if they were queued"""
+        if not (entry := self.__by_key.pop(key, None)):
+            return None
+        index = bisect_left(self.__sort_keys, (entry.elo, entry.order))
+        del self.__sort_keys[index]
+        del self.__entries[index]
+        return entry
+
+    def window(self, entry: QueueEntry, now: float) -> float:
+        """ELO difference a player accepts, after their time in queue"""
+        return min(self.base_window + self.widen_per_minute * (now - entry.queued_at) / 60, self.max_window)
+
+    def pair(self, now: float) -> list[tuple[QueueEntry, QueueEntry]]:
+        """
+        Run a pairing pass, removing paired players from the queue.
+        Players are considered longest waiting first, and paired with the nearest compatible unpaired player in ELO
+        whose difference both players accept.  O(n log n), with at most LOOKAHEAD neighbours checked per side.
+
+        :param now: Current timestamp.
+        :return: List of pairs, the longest waiting player first in each pair.
+        """
+        entries = self.__entries
+        n = len(entries)
+        windows = [self.window(entry, now) for entry in entries]
+        # Doubly linked list over unpaired entries in ELO order, so paired entries are skipped in O(1)
+        prev_unpaired = list(range(-1, n - 1))
+        next_unpaired = list(range(1, n + 1))
+        paired = [False] * n
+        pairs = []
+
+        for i in sorted(range(n), key=lambda x: entries[x].queued_at):
+            if paired[i]:
+                continue
+            a, best, best_diff = entries[i], None, None
+            for links in (prev_unpaired, next_unpaired):
+                j, steps = links[i], 0
+                while 0 <= j < n and steps < LOOKAHEAD:
+                    diff = abs(entries[j].elo - a.elo)
+                    if diff > windows[i]:
+                        break
+                    if diff <= windows[j] and compatible(a, entries[j]):
+                        if best is None or diff < best_diff:
+                            best, best_diff = j, diff
+                        break
+                    j, steps = links[j], steps + 1
+            if best is None:
+                continue
+            for k in (i, best):
+                paired[k] = True
+                if prev_unpaired[k] >= 0:
+                    next_unpaired[prev_unpaired[k]] = next_unpaired[k]
+                if next_unpaired[k] < n:
+                    prev_unpaired[next_unpaired[k]] = prev_unpaired[k]
+            pairs.append((a, entries[best]))
+
+        if pairs:
+            self.__sort_keys = [key for key, is_paired in zip(self.__sort_keys, paired) if not is_paired]
+            self.__entries = [entry for entry, is_paired in zip(entries, paired) if not is_paired]
+            for a, b in pairs:
+                del self.__by_key[a.key], self.__by_key[b.key]
+        return pairs
@@ -0,0 +1,557 @@
+"""
+In-process database backend, implementing the subset of the pymongo Collection API used by :mod:`modules.database`.
+Selected with backend = memory in the Database section of the config, allowing the bot's persistence, lobby and match
+flows to run and be benchmarked without a MongoDB server.
+Latency can be injected per operation to model network round trips.
+"""
+
+# External Imports
+import copy
+import threading
+import time
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Iterator
+from pymongo import InsertOne, UpdateOne, ReplaceOne, DeleteOne, DeleteMany, ReturnDocument
+from pymongo.errors import BulkWriteError
+
+log = getLogger('fs_bot')
+
+_MISSING = object()  # Sentinel for fields missing from a document
+
+
+class MemoryDBError(Exception):
+    """Raised on unsupported queries, or writes that would fail on a real server"""
+
+    def __init__(self, msg: str, code: int = 2):
+        message = "Error in memory database: " + msg
+        super().__init__(message)
+        self.code = code  # Server error code, reported in bulk write errors
+
+
+# Results, mirroring the attributes of the pymongo result classes
+@dataclass
+class InsertResult:
+    inserted_id: object
+
+
+@dataclass
+class UpdateResult:
+    matched_count: int
+    modified_count: int
+    upserted_id: object = None
+
+
+@dataclass
+class DeleteResult:
+    deleted_count: int
+
+
+@dataclass
+class BulkWriteResult:
+    inserted_count: int = 0
+    matched_count: int = 0
+    modified_count: int = 0
+    deleted_count: int = 0
+    upserted_count: int = 0
+
+
+# Document helpers
+def _get_path(doc, path: str):
+    """Get a dotted path from a document, _MISSING if absent"""
+    for key in path.split('.'):
+        if isinstance(doc, dict) and key in doc:
+            doc = doc[key]
+        elif isinstance(doc, list) and key.isdigit() and int(key) < len(doc):
+            doc = doc[int(key)]
+        else:
+            return _MISSING
+    return doc
+
+
+def _set_path(doc: dict, path: str, value):
+    """Set a dotted path in a document, creating embedded documents as needed"""
+    *parents, last = path.split('.')
+    for key in parents:
+        doc = doc.setdefault(key, dict())
+    doc[last] = value
+
+
+def _unset_path(doc: dict, path: str):
+    *parents, last = path.split('.')
+    for key in parents:
+        if not isinstance(doc := doc.get(key), dict):
+            return
+    doc.pop(last, None)
+
+
+def _compare(value, op: str, target) -> bool:
+    """Evaluate a single query operator against a field value"""
+    values = value if isinstance(value, list) else [value]
+    match op:
+        case '$eq':
+            return value == target or target in values
+        case '$ne':
+            return not _compare(value, '$eq', target)
+        case '$gt' | '$gte' | '$lt' | '$lte':
+            fn = {'$gt': lambda a: a > target, '$gte': lambda a: a >= target,
+                  '$lt': lambda a: a < target, '$lte': lambda a: a <= target}[op]
+            return any(v is not _MISSING and v is not None and fn(v) for v in values)
+        case '$in':
+            return any(_compare(value, '$eq', t) for t in target)
+        case '$nin':
+            return not _compare(value, '$in', target)
+        case '$exists':
+            return (value is not _MISSING) == bool(target)
+        case _:
+            raise MemoryDBError(f"Unsupported query operator {op}")
+
+
+def matches(doc: dict, query: dict | None) -> bool:
+    """Whether a document matches a query filter"""
+    for key, condition in (query or {}).items():
+        if key == '$or':
+            if not any(matches(doc, q) for q in condition):
+                return False
+        elif key == '$and':
+            if not all(matches(doc, q) for q in condition):
+                return False
+        elif isinstance(condition, dict) and condition and all(k.startswith('$') for k in condition):
+            if not all(_compare(_get_path(doc, key), op, target) for op, target in condition.items()):
+                return False
+        elif not _compare(_get_path(doc, key), '$eq', condition):
+            return False
+    return True
+
+
+def _project(doc: dict, projection: list | tuple | dict | None) -> dict:
+    if not projection:
+        return copy.deepcopy(doc)
+    if not isinstance(projection, dict):
+        projection = {field: True for field in projection}
+    include_id = projection.get('_id', True)
+    fields = {k: v for k, v in projection.items() if k != '_id'}
+    if fields and all(fields.values()):
+        result = dict()
+        for field in fields:
+            if (value := _get_path(doc, field)) is not _MISSING:
+                _set_path(result, field, copy.deepcopy(value))
+    else:
+        result = copy.deepcopy(doc)
+        for field in fields:
+            _unset_path(result, field)
+    if include_id and '_id' in doc:
+        result['_id'] = doc['_id']
+    else:
+        result.pop('_id', None)
+    return result
+
+
+def _sort_key(value):
+    """Sort key tolerating missing fields and mixed None values, which sort first as on the server"""
+    return (0, 0) if value is _MISSING or value is None else (1, value)
+
+
+def _sort(docs: list, sort) -> list:
+    if isinstance(sort, dict):
+        sort = list(sort.items())
+    for field, direction in reversed(sort):
+        docs.sort(key=lambda d: _sort_key(_get_path(d, field)), reverse=direction < 0)
+    return docs
+
+
+def _check_conflicts(update: dict):
+    """Raise if two operators of an update target the same path, or a path and one of its parents, as the server
+    rejects the whole update"""
+    paths = [(path, operator) for operator, fields in update.items() for path in fields]
+    for i, (path, operator) in enumerate(paths):
+        for other, other_operator in paths[i + 1:]:
+            if operator != other_operator and (path == other or other.startswith(path + '.')
+                                               or path.startswith(other + '.')):
+                raise MemoryDBError(f"Updating the path '{other}' would create a conflict at '{path}'", code=40)
+
+
+def _apply_update(doc: dict, update: dict, inserting: bool = False):
+    """Apply an update document in place"""
+    _check_conflicts(update)
+    for operator, fields in update.items():
+        for path, value in fields.items():
+            current = _get_path(doc, path)
+            match operator:
+                case '$set':
+                    _set_path(doc, path, copy.deepcopy(value))
+                case '$setOnInsert':
+                    if inserting:
+                        _set_path(doc, path, copy.deepcopy(value))
+                case '$unset':
+                    _unset_path(doc, path)
+                case '$inc':
+                    _set_path(doc, path, (0 if current is _MISSING else current) + value)
+                case '$max':
+                    if current is _MISSING or value > current:
+                        _set_path(doc, path, value)
+                case '$min':
+                    if current is _MISSING or value < current:
+                        _set_path(doc, path, value)
+                case '$push':
+                    if current is _MISSING:
+                        current = list()
+                        _set_path(doc, path, current)
+                    elif not isinstance(current, list):
+                        raise MemoryDBError(f"Cannot $push to non-array field {path}")
+                    values = value['$each'] if isinstance(value, dict) and '$each' in value else [value]
+                    current.extend(copy.deepcopy(values))
+                case '$addToSet':
+                    if current is _MISSING:
+                        current = list()
+                        _set_path(doc, path, current)
+                    elif not isinstance(current, list):
+                        raise MemoryDBError(f"Cannot $addToSet to non-array field {path}")
+                    values = value['$each'] if isinstance(value, dict) and '$each' in value else [value]
+                    current.extend(copy.deepcopy(v) for v in values if v not in current)
+                case _:
+                    raise MemoryDBError(f"Unsupported update operator {operator}")
+
+
+# Aggregation
+def _expr(doc: dict, expr):
+    """Evaluate an aggregation expression against a document"""
+    if isinstance(expr, str) and expr.startswith('$'):
+        value = _get_path(doc, expr[1:])
+        return None if value is _MISSING else value
+    if isinstance(expr, dict) and len(expr) == 1 and next(iter(expr)).startswith('$'):
+        op, args = next(iter(expr.items()))
+        args = [_expr(doc, a) for a in args] if isinstance(args, list) else [_expr(doc, args)]
+        match op:
+            case '$subtract':
+                return args[0] - args[1]
+            case '$add':
+                return sum(args)
+            case '$setUnion':
+                union = list()
+                for arg in args:
+                    union.extend(v for v in arg or [] if v not in union)
+                return union
+            case '$size':
+                return len(args[0])
+            case _:
+                raise MemoryDBError(f"Unsupported aggregation operator {op}")
+    return expr
+
+
+def _group(docs: list, spec: dict) -> list:
+    groups: dict = dict()
+    for doc in docs:
+        key = _expr(doc, spec['_id'])
+        group = groups.setdefault(repr(key), {'_id': key, '_count': 0})
+        group['_count'] += 1
+        for field, accumulator in spec.items():
+            if field == '_id':
+                continue
+            (op, arg), = accumulator.items()
+            value = _expr(doc, arg)
+            match op:
+                case '$sum':
+                    group[field] = group.get(field, 0) + (value if isinstance(value, (int, float)) else 0)
+                case '$avg':
+                    group[field] = group.get(field, 0) + value
+                case '$min':
+                    group[field] = value if field not in group else min(group[field], value)
+                case '$max':
+                    group[field] = value if field not in group else max(group[field], value)
+                case '$first':
+                    group.setdefault(field, value)
+                case '$push':
+                    group.setdefault(field, list()).append(value)
+                case _:
+                    raise MemoryDBError(f"Unsupported group accumulator {op}")
+    results = list()
+    for group in groups.values():
+        count = group.pop('_count')
+        for field, accumulator in spec.items():
+            if '$avg' in accumulator:
+                group[field] = group[field] / count
+        results.append(group)
+    return results
+
+
+def aggregate_docs(docs: list, pipeline: list) -> list:
+    """Run an aggregation pipeline over a list of documents.
+    Supports $match, $project, $unwind, $group, $sort, $skip, $limit and $count"""
+    docs = copy.deepcopy(docs)
+    for stage in pipeline:
+        (name, spec), = stage.items()
+        match name:
+            case '$match':
+                docs = [d for d in docs if matches(d, spec)]
+            case '$project':
+                projected = list()
+                for doc in docs:
+                    result = {'_id': doc['_id']} if spec.get('_id', 1) and '_id' in doc else dict()
+                    for field, value in spec.items():
+                        if field == '_id' and value in (0, 1, True, False):
+                            continue
+                        if value is True or value == 1:
+                            if (v := _get_path(doc, field)) is not _MISSING:
+                                _set_path(result, field, v)
+                        elif value is not False and value != 0:
+                            _set_path(result, field, _expr(doc, value))
+                    projected.append(result)
+                docs = projected
+            case '$unwind':
+                path = spec['path'] if isinstance(spec, dict) else spec
+                unwound = list()
+                for doc in docs:
+                    for value in _get_path(doc, path[1:]) or []:
+                        new_doc = copy.deepcopy(doc)
+                        _set_path(new_doc, path[1:], value)
+                        unwound.append(new_doc)
+                docs = unwound
+            case '$group':
+                docs = _group(docs, spec)
+            case '$sort':
+                docs = _sort(docs, spec)
+            case '$skip':
+                docs = docs[spec:]
+            case '$limit':
+                docs = docs[:spec]
+            case '$count':
+                docs = [{spec: len(docs)}]
+            case _:
+                raise MemoryDBError(f"Unsupported aggregation stage {name}")
+    return docs
+
+
+class MemoryCursor:
+    """Iterable results of a find, supporting sort / limit chaining before iteration"""
+
+    def __init__(self, collection: 'MemoryCollection', query, projection, sort=None):
+        self.__collection = collection
+        self.__query = query
+        self.__projection = projection
+        self.__sort = sort
+        self.__skip = 0
+        self.__limit = 0
+        self.__results = None
+
+    def sort(self, key_or_list, direction=None):
+        self.__sort = [(key_or_list, direction or 1)] if isinstance(key_or_list, str) else key_or_list
+        return self
+
+    def skip(self, skip: int):
+        self.__skip = skip
+        return self
+
+    def limit(self, limit: int):
+        self.__limit = limit
+        return self
+
+    def explain(self) -> dict:
+        return {'queryPlanner': {'winningPlan': {'stage': 'MEMORY'}}}
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.__results is None:
+            docs = self.__collection._find_docs(self.__query, self.__sort)[self.__skip:]
+            if self.__limit:
+                docs = docs[:self.__limit]
+            self.__results = iter([_project(d, self.__projection) for d in docs])
+        return next(self.__results)
+
+    def to_list(self, length=None) -> list:
+        results = list(self)
+        return results[:length] if length else results
+
+
+class MemoryCollection:
+    """
+    In-memory stand-in for a pymongo Collection, documents are stored by _id.
+    Thread safe, as calls are made from executor threads.
+
+    :param name: Collection name.
+    :param latency: Seconds slept on every operation, to model a network round trip.
+    """
+
+    def __init__(self, name: str, latency: float = 0.0):
+        self.name = name
+        self.latency = latency
+        self.__docs: dict = dict()
+        self.__lock = threading.RLock()
+        self.__next_id = 0
+
+    def __round_trip(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _find_docs(self, query, sort=None) -> list:
+        """Documents matching a query, sorted if requested.  Documents are not copied."""
+        with self.__lock:
+            if query and set(query) == {'_id'} and not isinstance(query['_id'], dict):
+                docs = [self.__docs[query['_id']]] if query['_id'] in self.__docs else []
+            else:
+                docs = [d for d in self.__docs.values() if matches(d, query)]
+        return _sort(docs, sort) if sort else docs
+
+    def __new_id(self):
+        self.__next_id += 1
+        return self.__next_id
+
+    # Reads
+    def find(self, filter=None, projection=None, sort=None, **kwargs) -> MemoryCursor:
+        self.__round_trip()
+        return MemoryCursor(self, filter, projection, sort)
+
+    def find_one(self, filter=None, projection=None, sort=None, **kwargs) -> dict | None:
+        self.__round_trip()
+        docs = self._find_docs(filter, sort)
+        return _project(docs[0], projection) if docs else None
+
+    def count_documents(self, filter: dict, **kwargs) -> int:
+        self.__round_trip()
+        return len(self._find_docs(filter))
+
+    def aggregate(self, pipeline: list, **kwargs) -> Iterator[dict]:
+        self.__round_trip()
+        with self.__lock:
+            docs = list(self.__docs.values())
+        return iter(aggregate_docs(docs, pipeline))
+
+    def create_index(self, keys, **kwargs) -> str:
+        """Indexes are not needed in memory, returns the index name pymongo would use"""
+        keys = [(keys, 1)] if isinstance(keys, str) else keys
+        return '_'.join(f'{field}_{direction}' for field, direction in keys)
+
+    # Writes, without latency so they can be reused in bulk_write
+    def _insert(self, doc: dict):
+        with self.__lock:
+            doc = copy.deepcopy(doc)
+            if '_id' not in doc:
+                doc['_id'] = self.__new_id()
+            if doc['_id'] in self.__docs:
+                raise MemoryDBError(f"Duplicate key {doc['_id']} in collection {self.name}", code=11000)
+            self.__docs[doc['_id']] = doc
+            return doc['_id']
+
+    def _update(self, filter: dict, update: dict, upsert: bool, replace: bool, many: bool = False) -> UpdateResult:
+        with self.__lock:
+            docs = self._find_docs(filter)
+            if not many:
+                docs = docs[:1]
+            for doc in docs:
+                if replace:
+                    new_doc = copy.deepcopy(update)
+                    new_doc['_id'] = doc['_id']
+                    self.__docs[doc['_id']] = new_doc
+                else:
+                    # Applied to a copy, so a failing update leaves the document unchanged
+                    new_doc = copy.deepcopy(doc)
+                    _apply_update(new_doc, update)
+                    self.__docs[doc['_id']] = new_doc
+            if docs or not upsert:
+                return UpdateResult(matched_count=len(docs), modified_count=len(docs))
+
+            # Upsert, seed the new document with the equality fields of the filter
+            new_doc = {k: v for k, v in filter.items() if not k.startswith('$') and not isinstance(v, dict)}
+            if replace:
+                new_doc.update(copy.deepcopy(update))
+            else:
+                _apply_update(new_doc, update, inserting=True)
+            return UpdateResult(matched_count=0, modified_count=0, upserted_id=self._insert(new_doc))
+
+    def _delete(self, filter: dict, many: bool) -> DeleteResult:
+        with self.__lock:
+            docs = self._find_docs(filter)
+            if not many:
+                docs = docs[:1]
+            for doc in docs:
+                del self.__docs[doc['_id']]
+            return DeleteResult(deleted_count=len(docs))
+
+    def insert_one(self, document: dict, **kwargs) -> InsertResult:
+        self.__round_trip()
+        return InsertResult(inserted_id=self._insert(document))
+
+    def insert_many(self, documents: list, **kwargs):
+        self.__round_trip()
+        for doc in documents:
+            self._insert(doc)
+
+    def update_one(self, filter: dict, update: dict, upsert: bool = False, **kwargs) -> UpdateResult:
+        self.__round_trip()
+        return self._update(filter, update, upsert, replace=False)
+
+    def update_many(self, filter: dict, update: dict, upsert: bool = False, **kwargs) -> UpdateResult:
+        self.__round_trip()
+        return self._update(filter, update, upsert, replace=False, many=True)
+
+    def replace_one(self, filter: dict, replacement: dict, upsert: bool = False, **kwargs) -> UpdateResult:
+        self.__round_trip()
+        return self._update(filter, replacement, upsert, replace=True)
+
+    def delete_one(self, filter: dict, **kwargs) -> DeleteResult:
+        self.__round_trip()
+        return self._delete(filter, many=False)
+
+    def delete_many(self, filter: dict, **kwargs) -> DeleteResult:
+        self.__round_trip()
+        return self._delete(filter, many=True)
+
+    def find_one_and_update(self, filter: dict, update: dict, projection=None, sort=None, upsert: bool = False,
+                            return_document=ReturnDocument.BEFORE, **kwargs) -> dict | None:
+        self.__round_trip()
+        with self.__lock:
+            docs = self._find_docs(filter, sort)
+            before = copy.deepcopy(docs[0]) if docs else None
+            e_id = docs[0]['_id'] if docs else None
+            if docs:
+                new_doc = copy.deepcopy(before)
+                _apply_update(new_doc, update)
+                self.__docs[e_id] = new_doc
+            elif upsert:
+                e_id = self._update(filter, update, upsert=True, replace=False).upserted_id
+            else:
+                return None
+            if return_document == ReturnDocument.AFTER:
+                return _project(self.__docs[e_id], projection)
+            return _project(before, projection) if before else None
+
+    def bulk_write(self, requests: list, ordered: bool = True, **kwargs) -> BulkWriteResult:
+        """
+        Apply pymongo write operations, in a single round trip.
+        As on a server, an ordered bulk write stops at the first failing operation, an unordered one applies every
+        other operation.  Failures are raised together as a BulkWriteError once the operations have been applied.
+        """
+        self.__round_trip()
+        result = BulkWriteResult()
+        write_errors = []
+        with self.__lock:
+            for index, request in enumerate(requests):
+                try:
+                    self._bulk_write_one(request, result)
+                except MemoryDBError as e:
+                    write_errors.append({'index': index, 'code': e.code, 'errmsg': str(e), 'op': request})
+                    if ordered:
+                        break
+        if write_errors:
+            raise BulkWriteError({'writeErrors': write_errors, 'writeConcernErrors': [],
+                                  'nInserted': result.inserted_count, 'nUpserted': result.upserted_count,
+                                  'nMatched': result.matched_count, 'nModified': result.modified_count,
+                                  'nRemoved': result.deleted_count, 'upserted': []})
+        return result
+
+    def _bulk_write_one(self, request, result: BulkWriteResult):
+        # pymongo operations don't expose their contents publicly
+        if isinstance(request, InsertOne):
+            self._insert(request._doc)
+            result.inserted_count += 1
+        elif isinstance(request, (UpdateOne, ReplaceOne)):
+            res = self._update(request._filter, request._doc, request._upsert, replace=isinstance(request, ReplaceOne))
+            result.matched_count += res.matched_count
+            result.modified_count += res.modified_count
+            result.upserted_count += res.upserted_id is not None
+        elif isinstance(request, (DeleteOne, DeleteMany)):
+            result.deleted_count += self._delete(request._filter, many=isinstance(request, DeleteMany)).deleted_count
+        else:
+            raise MemoryDBError(f"Unsupported bulk write operation {type(request).__name__}")
@@ -0,0 +1,30 @@
+"""
+Routing of Discord channels and threads to the lobby or match using them.
+Lobbies register their channel when created, matches register their thread when it is made and unregister it when
+they end, so routing a message is a single dict lookup.
+"""
+
+# External Imports
+from logging import getLogger
+
+log = getLogger('fs_bot')
+
+_routes: dict[int, object] = {}  # channel / thread id: lobby or match
+
+
+def register(channel_id: int, target):
+    """Route a channel or thread to target, replacing any previous route"""
+    if (previous := _routes.get(channel_id)) is not None and previous is not target:
+        log.warning("Channel [%s] rerouted from %s to %s", channel_id, previous, target)
+    _routes[channel_id] = target
+
+
+def unregister(channel_id: int, target=None):
+    """Remove the route of a channel or thread.  If target is given, only removes the route if it is to target."""
+    if target is None or _routes.get(channel_id) is target:
+        _routes.pop(channel_id, None)
+
+
+def get(channel_id: int):
+    """The lobby or match a channel or thread id is routed to, or None"""
+    return _routes.get(channel_id)
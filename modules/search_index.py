@@ -0,0 +1,73 @@
+"""
+In-memory n-gram index for case-insensitive substring search, used for autocomplete.
+Every 1 to N character gram of each indexed text is mapped to the entries containing it, so a query only verifies
+entries sharing its grams instead of scanning every text.
+"""
+
+# External Imports
+import heapq
+from typing import Hashable
+
+GRAM_SIZE = 3
+
+
+class NGramIndex:
+    """
+    Substring search index over (text, key) entries.  A key can be indexed under several texts,
+    eg a player under their name and character names.
+
+    :param n: Maximum gram length.  Queries shorter than n use grams of their own length.
+    """
+
+    def __init__(self, n: int = GRAM_SIZE):
+        self.n = n
+        self.__postings: dict[str, set[tuple[str, str, Hashable]]] = dict()  # gram: {(lowercase text, text, key)}
+        self.__counts: dict[tuple[str, str, Hashable], int] = dict()  # entry: times added, eg name equal to a char
+
+    def __grams(self, text: str):
+        return {text[i:i + size] for size in range(1, self.n + 1) for i in range(len(text) - size + 1)}
+
+    def add(self, key: Hashable, text: str):
+        """Index a text for a key.  Adding the same text for a key again only counts it, it is returned once."""
+        entry = (text.lower(), text, key)
+        self.__counts[entry] = self.__counts.get(entry, 0) + 1
+        if self.__counts[entry] > 1:
+            return
+        for gram in self.__grams(entry[0]):
+            self.__postings.setdefault(gram, set()).add(entry)
+
+    def remove(self, key: Hashable, text: str):
+        """Remove a text indexed for a key, it stays indexed until removed as many times as it was added"""
+        entry = (text.lower(), text, key)
+        if (count := self.__counts.get(entry)) is None:
+            return
+        if count > 1:
+            self.__counts[entry] = count - 1
+            return
+        del self.__counts[entry]
+        for gram in self.__grams(entry[0]):
+            if (posting := self.__postings.get(gram)) is not None:
+                posting.discard(entry)
+                if not posting:
+                    del self.__postings[gram]
+
+    def __len__(self):
+        return len(self.__counts)
+
+    def search(self, query: str, k: int = 25) -> list[tuple[str, Hashable]]:
+        """
+        Find indexed texts containing the query, case-insensitive.
+
+        :param query: Text to search for.
+        :param k: Maximum number of results.
+        :return: Up to k (text, key) results.  Prefix matches first, then shorter texts, then alphabetical.
+        """
+        query = query.lower()
+        if not query:
+            return []
+        size = min(len(query), self.n)
+        postings = [self.__postings.get(query[i:i + size], set()) for i in range(len(query) - size + 1)]
+        candidates = set.intersection(*sorted(postings, key=len))
+        results = ((not lower.startswith(query), len(lower), lower, text, key) for lower, text, key in candidates
+                   if query in lower)
+        return [(text, key) for *_, text, key in heapq.nsmallest(k, results, key=lambda x: x[:3])]
@@ -10,6 +10,7 @@ import discord
 
 # Internal Imports
 import modules.database as db
+import modules.write_buffer as write_buffer
 import cogs.direct_messages
 import cogs.private_voice_channels
 import modules.accounts_handler as accounts
@@ -29,6 +30,12 @@ async def save_state(loop):
     # Terminate all active account sessions
     await accounts.terminate_all()
 
+    # Write any buffered database updates
+    try:
+        await write_buffer.flush()
+    except Exception as e:
+        log.error('Error flushing write buffer %s', e)
+
     # Ensure Auraxium event client's session is closed
     if census.EVENT_CLIENT and census.EVENT_CLIENT.websocket:
         try:
@@ -0,0 +1,91 @@
+"""
+Scheduler for moderation timeouts.
+Keeps a heap of timeout deadlines, and lifts each timeout when it expires, releasing the timeout role and updating
+the timeout DM, instead of waiting for the player to use /freeme.
+"""
+
+# External Imports
+import asyncio
+import heapq
+from logging import getLogger
+
+# Internal Imports
+from classes import Player
+import modules.discord_obj as d_obj
+from modules import tools
+
+log = getLogger('fs_bot')
+
+# Heap of (timeout stamp, player id).  Entries whose stamp no longer matches the players timeout are stale.
+_deadlines: list[tuple[int, int]] = []
+_wake: asyncio.Event = asyncio.Event()
+_task: asyncio.Task | None = None
+
+
+def schedule(p: Player):
+    """Schedule a players current timeout to be lifted when it expires"""
+    if p.timeout_until:
+        heapq.heappush(_deadlines, (p.timeout_until, p.id))
+        _wake.set()
+
+
+def init():
+    """Load the deadlines of all players timeouts still running and start the scheduler.
+    Timeouts that expired while the bot was down are cleared quietly, without the DM edit and log of a lift."""
+    global _task
+    now = tools.timestamp_now()
+    _deadlines.clear()
+    expired = []
+    for p in Player.get_all_players().values():
+        if p.timeout_until > now:
+            _deadlines.append((p.timeout_until, p.id))
+        elif p.timeout_until:
+            expired.append(p)
+    heapq.heapify(_deadlines)
+    log.info("Loaded %s timeout deadlines, clearing %s expired timeouts", len(_deadlines), len(expired))
+    if expired:
+        d_obj.bot.loop.create_task(_clear_expired(expired), name="Timeout Expired Clear")
+    if not _task or _task.done():
+        _task = d_obj.bot.loop.create_task(_run(), name="Timeout Scheduler")
+
+
+async def _clear_expired(players: list[Player]):
+    """Reset expired timeout stamps, only touching roles of members that still have the timeout role"""
+    for p in players:
+        try:
+            await p.set_timeout(0)
+            if (memb := d_obj.guild.get_member(p.id)) and d_obj.roles['timeout'] in memb.roles:
+                await d_obj.role_update(memb, p, reason='Timeout expired')
+        except Exception as e:
+            log.error("Error clearing expired timeout for player [%s]", p.id, exc_info=e)
+
+
+async def _lift(p: Player):
+    """Lift an expired timeout, as if the player had used /freeme"""
+    log.info("Timeout expired for player [%s], lifting", p.id)
+    try:
+        if d_obj.guild.get_member(p.id) and p.timeout_msg_id:
+            await d_obj.timeout_player(p=p, stamp=0, reason='Timeout expired')
+        else:
+            await p.set_timeout(0)
+    except Exception as e:
+        log.error("Error lifting timeout for player [%s]", p.id, exc_info=e)
+        if p.timeout_until:
+            await p.set_timeout(0)
+        if memb := d_obj.guild.get_member(p.id):
+            await d_obj.role_update(memb, p, reason='Timeout expired')
+
+
+async def _run():
+    while True:
+        _wake.clear()
+        now = tools.timestamp_now()
+        while _deadlines and _deadlines[0][0] <= now:
+            stamp, p_id = heapq.heappop(_deadlines)
+            if (p := Player.get(p_id)) and p.timeout_until == stamp:
+                await _lift(p)
+        delay = _deadlines[0][0] - tools.timestamp_now() if _deadlines else None
+        try:
+            await asyncio.wait_for(_wake.wait(), timeout=max(delay, 0) if delay is not None else None)
+        except asyncio.TimeoutError:
+            pass
@@ -1,7 +1,8 @@
 """utility functions, some from pogbot"""
 
 from datetime import datetime as dt
-from typing import Literal
+from typing import Literal, Callable
+import asyncio
 from enum import Enum
 import aiohttp
 import re
@@ -64,6 +65,15 @@ def timestamp_now():
     return int(dt.timestamp(dt.now()))
 
 
+def call_at_stamp(timestamp: int, callback: Callable, *args) -> asyncio.TimerHandle:
+    """Schedule callback(*args) on the running loop at a timestamp, immediately if it has passed.
+    Coroutine functions are run as a task.  Returns the TimerHandle, to cancel the call."""
+    loop = asyncio.get_running_loop()
+    if asyncio.iscoroutinefunction(callback):
+        return loop.call_later(max(timestamp - timestamp_now(), 0), lambda: loop.create_task(callback(*args)))
+    return loop.call_later(max(timestamp - timestamp_now(), 0), callback, *args)
+
+
 def compare_embeds(embed1, embed2) -> bool:
     """Compares embeds (after removing timestamps).  Returns True if Embeds are identical"""
     try:
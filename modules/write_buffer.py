@@ -0,0 +1,199 @@
+"""
+Write-behind buffer for database updates.
+Updates queued for the same element are merged together, and flushed as a single bulk write per collection
+once no new updates have arrived for FLUSH_DELAY seconds, or at most MAX_STALENESS seconds after the oldest
+unflushed update.
+Updates the database rejects are dropped with an error log, and updates failing for other reasons are retried up to
+MAX_ATTEMPTS flushes before being dropped.
+A failed bulk write may still have been applied (eg a network error after the server received it), so only
+idempotent updates ($set, $unset, $addToSet) are retried after such an error.  Updates with $inc or $push are only
+retried if the bulk write never reached the server, and are dropped otherwise, as applying them twice would corrupt
+counters and lists.
+"""
+
+# External Imports
+import asyncio
+from logging import getLogger
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, ServerSelectionTimeoutError
+
+# Internal Imports
+import modules.database as db
+
+log = getLogger('fs_bot')
+
+FLUSH_DELAY = 2  # Seconds to wait for further updates before flushing
+MAX_STALENESS = 10  # Maximum seconds an update can stay buffered
+MAX_ATTEMPTS = 5  # Flushes an update is attempted in before it is dropped
+IDEMPOTENT_OPERATORS = {"$set", "$unset", "$addToSet"}  # Operators safe to apply twice
+# Errors raised before a bulk write reaches the server, so none of its updates were applied
+NOT_SENT_ERRORS = (ServerSelectionTimeoutError, )
+
+# Pending updates, by collection: {element id: update document}
+_pending: dict[str, dict[int, dict]] = dict()
+# Element ids to be upserted, by collection
+_upserts: dict[str, set[int]] = dict()
+# Failed flush attempts of re-queued updates, by collection: {element id: attempts}
+_attempts: dict[str, dict[int, int]] = dict()
+_oldest_stamp: float | None = None  # loop time of the oldest unflushed update
+_flush_handle: asyncio.TimerHandle | None = None
+_flush_lock = asyncio.Lock()
+
+
+def merge_update(pending: dict, update: dict):
+    """Merge an update document into a pending update document, the newer update wins on conflicting fields"""
+    for operator, fields in update.items():
+        match operator:
+            case "$set":
+                for key in fields:
+                    pending.get("$unset", {}).pop(key, None)
+                    pending.get("$inc", {}).pop(key, None)
+                    pending.get("$push", {}).pop(key, None)
+                    pending.get("$addToSet", {}).pop(key, None)
+                pending.setdefault("$set", {}).update(fields)
+            case "$unset":
+                for key in fields:
+                    pending.get("$set", {}).pop(key, None)
+                    pending.get("$inc", {}).pop(key, None)
+                    pending.get("$push", {}).pop(key, None)
+                    pending.get("$addToSet", {}).pop(key, None)
+                pending.setdefault("$unset", {}).update(fields)
+            case "$inc":
+                for key, value in fields.items():
+                    if key in pending.get("$set", {}):
+                        pending["$set"][key] += value
+                    elif key in pending.get("$unset", {}):  # Incrementing a missing field sets it
+                        del pending["$unset"][key]
+                        pending.setdefault("$set", {})[key] = value
+                    else:
+                        pending.setdefault("$inc", {})
+                        pending["$inc"][key] = pending["$inc"].get(key, 0) + value
+            case "$push" | "$addToSet":
+                for key, value in fields.items():
+                    values = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+                    other = "$addToSet" if operator == "$push" else "$push"
+                    if key in pending.get(other, {}):
+                        raise db.DatabaseError(f"write_buffer: Can't merge {operator} with a pending {other} on {key}")
+                    if key in pending.get("$set", {}) or key in pending.get("$unset", {}):
+                        # Adding to a field set or unset by a pending update sets it
+                        current = list(pending["$set"][key]) if key in pending.get("$set", {}) else []
+                        pending.get("$unset", {}).pop(key, None)
+                        pending.setdefault("$set", {})[key] = current
+                    else:
+                        current = pending.setdefault(operator, {}).setdefault(key, {"$each": []})["$each"]
+                    if operator == "$addToSet":
+                        values = [v for i, v in enumerate(values) if v not in current and v not in values[:i]]
+                    current.extend(values)
+            case _:
+                raise db.DatabaseError(f"write_buffer: Unsupported update operator {operator}")
+
+    # Drop operators left empty by conflicts
+    for operator in [op for op, fields in pending.items() if not fields]:
+        del pending[operator]
+
+
+def queue_update(collection: str, e_id: int, update: dict, upsert: bool = False):
+    """
+    Queue an update for an element.  The update is merged with any other pending update for the element.
+
+    :param collection: Collection name.
+    :param e_id: Element id.
+    :param update: Update document, eg {"$set": {"name": "Colin"}}.  Supports $set, $unset, $inc, $push and
+        $addToSet.  Prefer idempotent operators, see the module docstring.
+    :param upsert: Whether the element should be created if it doesn't exist.
+    """
+    merge_update(_pending.setdefault(collection, dict()).setdefault(e_id, dict()), update)
+    if upsert:
+        _upserts.setdefault(collection, set()).add(e_id)
+    _schedule_flush()
+
+
+def _schedule_flush():
+    """Schedule the next flush, pushing it back by FLUSH_DELAY without exceeding MAX_STALENESS"""
+    global _oldest_stamp, _flush_handle
+    loop = asyncio.get_event_loop()
+    now = loop.time()
+    if _oldest_stamp is None:
+        _oldest_stamp = now
+    if _flush_handle:
+        _flush_handle.cancel()
+    flush_at = min(now + FLUSH_DELAY, _oldest_stamp + MAX_STALENESS)
+    _flush_handle = loop.call_at(flush_at, lambda: loop.create_task(flush(), name="Write Buffer Flush"))
+
+
+def pending_count() -> int:
+    """Number of elements with buffered updates"""
+    return sum(len(elements) for elements in _pending.values())
+
+
+async def flush():
+    """Send all pending updates to the database, as one bulk write per collection.
+    Updates rejected by the database are dropped, updates that fail to be written otherwise are re-queued
+    until they have been attempted MAX_ATTEMPTS times, unless retrying them could apply them twice."""
+    global _pending, _upserts, _attempts, _oldest_stamp, _flush_handle
+    async with _flush_lock:
+        if _flush_handle:
+            _flush_handle.cancel()
+            _flush_handle = None
+        if not _pending:
+            return
+        pending, upserts, attempts = _pending, _upserts, _attempts
+        _pending, _upserts, _attempts, _oldest_stamp = dict(), dict(), dict(), None
+
+        collections = list(pending)
+        results = await asyncio.gather(
+            *[_flush_collection(collection, pending[collection], upserts.get(collection, set()))
+              for collection in collections],
+            return_exceptions=True)
+
+        for collection, result in zip(collections, results):
+            if not isinstance(result, Exception):
+                continue
+            log.error("Error flushing %s buffered updates to %s, re-queueing...", len(pending[collection]),
+                      collection, exc_info=result)
+            failed = pending[collection]
+            failed_attempts = attempts.get(collection, dict())
+            not_sent = isinstance(result, NOT_SENT_ERRORS)
+            for e_id in list(failed):
+                failed_attempts[e_id] = failed_attempts.get(e_id, 0) + 1
+                if not not_sent and not failed[e_id].keys() <= IDEMPOTENT_OPERATORS:
+                    _dead_letter(collection, e_id, failed.pop(e_id), f"may have been applied, not retried: {result!r}")
+                    del failed_attempts[e_id]
+                elif failed_attempts[e_id] >= MAX_ATTEMPTS:
+                    _dead_letter(collection, e_id, failed.pop(e_id), f"failed {MAX_ATTEMPTS} flushes")
+                    del failed_attempts[e_id]
+            if not failed:
+                continue
+            # Re-apply failed updates underneath any updates queued since
+            newer = _pending.get(collection, dict())
+            _pending[collection] = failed
+            for e_id, update in newer.items():
+                merge_update(_pending[collection].setdefault(e_id, dict()), update)
+            _upserts.setdefault(collection, set()).update(upserts.get(collection, set()) & failed.keys())
+            _attempts.setdefault(collection, dict()).update(failed_attempts)
+            _schedule_flush()
+
+
+def _dead_letter(collection: str, e_id: int, update: dict, reason: str):
+    """Drop an update that can't be written, logging it so it can be recovered by hand"""
+    log.error("Write buffer: dropping update to %s [%s], %s: %s", collection, e_id, reason, update)
+
+
+async def _flush_collection(collection: str, elements: dict[int, dict], upserts: set[int]):
+    """Bulk write the pending updates of one collection"""
+    e_ids = list(elements)
+    requests = [UpdateOne({"_id": e_id}, elements[e_id], upsert=e_id in upserts) for e_id in e_ids]
+    try:
+        result = await db.async_db_background_call(db.bulk_write, collection, requests)
+    except BulkWriteError as e:
+        # Writes are unordered, so only the rejected updates weren't applied.  Retrying them would fail again.
+        for error in e.details.get('writeErrors', []):
+            e_id = e_ids[error['index']]
+            _dead_letter(collection, e_id, elements[e_id], f"rejected: {error.get('errmsg')}")
+        if e.details.get('writeConcernErrors'):
+            log.error("Write buffer: write concern errors flushing %s: %s", collection, e.details['writeConcernErrors'])
+        return
+    if (written := result.matched_count + result.upserted_count) < len(requests):
+        log.warning("Write buffer: %s of %s buffered updates to %s matched no element",
+                    len(requests) - written, len(requests), collection)
+    log.debug("Flushed %s buffered updates to %s", len(requests), collection)
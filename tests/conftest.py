@@ -0,0 +1,20 @@
+"""Shared fixtures.  Run from the repository root with: python -m pytest"""
+
+# External Imports
+import pytest
+
+# Internal Imports
+import modules.config as cfg
+import modules.database as db
+
+
+@pytest.fixture
+def memory_db():
+    """modules.database initialised with an empty memory backend, with every configured collection"""
+    db._collections.clear()
+    db.init({"backend": "memory", "memory_latency": "0",
+             "collections": {collection: collection for collection in cfg._collections}})
+    db.reset_round_trips()
+    yield db
+    db._collections.clear()
+    db.reset_round_trips()
@@ -0,0 +1,94 @@
+# External Imports
+import pytest
+
+# Internal Imports
+import modules.census_cache as census_cache
+from modules.census_cache import CensusCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(census_cache, 'monotonic', clock)
+    return clock
+
+
+def info(name: str, char_id: int) -> list:
+    return [name, char_id, 1, 19]
+
+
+def test_lookup_by_name_and_id(clock):
+    cache = CensusCache()
+    cache.put(info('PilotVS', 1))
+    assert cache.lookup_names(['pilotvs', 'othervs']) == ({'pilotvs': info('PilotVS', 1)}, ['othervs'])
+    assert cache.lookup_ids([1, 2]) == ({1: info('PilotVS', 1)}, [2])
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_ttl_expiry(clock):
+    cache = CensusCache(ttl=60)
+    cache.put(info('PilotVS', 1))
+    clock.now += 59
+    assert cache.lookup_ids([1])[0]
+    clock.now += 2
+    assert cache.lookup_ids([1]) == ({}, [1])
+    assert cache.lookup_names(['pilotvs']) == ({}, ['pilotvs'])
+
+
+def test_negative_cache(clock):
+    cache = CensusCache(negative_ttl=10)
+    cache.put_missing('ghostvs')
+    assert cache.lookup_names(['ghostvs']) == ({}, [])  # neither found nor to request
+    assert cache.negative_hits == 1
+    clock.now += 11
+    assert cache.lookup_names(['ghostvs']) == ({}, ['ghostvs'])
+
+
+def test_put_clears_missing(clock):
+    cache = CensusCache()
+    cache.put_missing('pilotvs')
+    cache.put_missing(1)
+    cache.put(info('PilotVS', 1))
+    assert cache.lookup_names(['pilotvs'])[0] and cache.lookup_ids([1])[0]
+
+
+def test_rename_replaces_name(clock):
+    cache = CensusCache()
+    cache.put(info('OldVS', 1))
+    cache.put(info('NewVS', 1))
+    assert cache.lookup_names(['oldvs']) == ({}, ['oldvs'])
+    assert cache.lookup_names(['newvs'])[0] == {'newvs': info('NewVS', 1)}
+
+
+def test_lru_eviction(clock):
+    cache = CensusCache(max_entries=2)
+    cache.put(info('AVS', 1))
+    cache.put(info('BVS', 2))
+    cache.lookup_ids([1])  # 1 is now most recently used
+    cache.put(info('CVS', 3))
+    assert cache.lookup_ids([1, 2, 3])[1] == [2]
+    assert cache.lookup_names(['bvs'])[1] == ['bvs']
+    assert cache.evictions == 1
+
+
+def test_missing_entries_bounded(clock):
+    cache = CensusCache(max_entries=2)
+    for name in ('a', 'b', 'c'):
+        cache.put_missing(name)
+    assert cache.lookup_names(['a', 'b', 'c']) == ({}, ['a'])
+
+
+def test_clear(clock):
+    cache = CensusCache()
+    cache.put(info('PilotVS', 1))
+    cache.put_missing('ghostvs')
+    cache.clear()
+    assert cache.lookup_names(['pilotvs', 'ghostvs']) == ({}, ['pilotvs', 'ghostvs'])
@@ -0,0 +1,139 @@
+# External Imports
+import asyncio
+from time import monotonic
+from types import SimpleNamespace
+
+import discord
+import pytest
+
+# Internal Imports
+import modules.dm_fanout as dm_fanout
+from modules.dm_fanout import DMFanout, TokenBucket
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(dm_fanout, 'BACKOFF_BASE', 0)
+    monkeypatch.setattr(dm_fanout, 'random', SimpleNamespace(random=lambda: 0))
+
+
+def http_error(cls, status: int):
+    return cls(SimpleNamespace(status=status, reason="error"), "error")
+
+
+class FakeString:
+    """Stands in for an AllStrings member, raising the queued errors before sending"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def send(self, target, *args, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return f"message to {target.id}"
+
+
+def user(u_id: int):
+    return SimpleNamespace(id=u_id)
+
+
+def test_token_bucket_paces():
+    async def run():
+        bucket = TokenBucket(rate=100, capacity=2)
+        start = monotonic()
+        for _ in range(6):
+            await bucket.acquire()
+        return monotonic() - start
+    # Two tokens at once, then 4 at 100/s
+    assert 0.035 <= asyncio.run(run()) < 0.5
+
+
+def test_send():
+    async def run():
+        fanout = DMFanout()
+        assert await fanout.send(user(1), FakeString()) == "message to 1"
+        assert fanout.sent == 1
+    asyncio.run(run())
+
+
+def test_closed_dms_cached():
+    async def run():
+        fanout = DMFanout(closed_cooldown=60)
+        string = FakeString(http_error(discord.Forbidden, 403))
+        assert await fanout.send(user(1), string) is None
+        assert fanout.is_closed(1)
+        assert await fanout.send(user(1), string) is None
+        assert string.calls == 1 and fanout.closed_skips == 1
+        assert await fanout.send(user(2), string) == "message to 2"
+    asyncio.run(run())
+
+
+def test_closed_dms_cooldown_expires():
+    async def run():
+        fanout = DMFanout(closed_cooldown=0)
+        await fanout.send(user(1), FakeString(http_error(discord.Forbidden, 403)))
+        await asyncio.sleep(0.01)
+        assert not fanout.is_closed(1)
+    asyncio.run(run())
+
+
+def test_retries_rate_limited_and_server_errors():
+    async def run():
+        fanout = DMFanout()
+        string = FakeString(http_error(discord.HTTPException, 429), http_error(discord.HTTPException, 503))
+        assert await fanout.send(user(1), string) == "message to 1"
+        assert string.calls == 3 and fanout.retries == 2
+    asyncio.run(run())
+
+
+def test_gives_up_after_max_attempts():
+    async def run():
+        fanout = DMFanout()
+        string = FakeString(*[http_error(discord.HTTPException, 500) for _ in range(dm_fanout.MAX_ATTEMPTS)])
+        assert await fanout.send(user(1), string) is None
+        assert string.calls == dm_fanout.MAX_ATTEMPTS and fanout.failed == 1
+    asyncio.run(run())
+
+
+def test_no_retry_on_client_error():
+    async def run():
+        fanout = DMFanout()
+        string = FakeString(http_error(discord.HTTPException, 400))
+        assert await fanout.send(user(1), string) is None
+        assert string.calls == 1 and fanout.retries == 0 and fanout.failed == 1
+        assert not fanout.is_closed(1)
+    asyncio.run(run())
+
+
+def test_fan_out_report(caplog):
+    async def run():
+        fanout = DMFanout()
+        sends = [(user(1), FakeString()),
+                 (user(2), FakeString(http_error(discord.Forbidden, 403))),
+                 (user(3), FakeString(http_error(discord.HTTPException, 400)), (), {}),
+                 (user(4), FakeString())]
+        return await fanout.fan_out("test pings", sends)
+    caplog.set_level('INFO', logger='fs_bot')
+    assert asyncio.run(run()) == ["message to 1", None, None, "message to 4"]
+    assert "DM batch [test pings]: 2 sent, 1 closed DMs, 1 failed, latency median" in caplog.text
+
+
+def test_fan_out_limits_concurrency():
+    async def run():
+        in_flight = peak = 0
+
+        class SlowString:
+            @staticmethod
+            async def send(target, *args, **kwargs):
+                nonlocal in_flight, peak
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0.01)
+                in_flight -= 1
+
+        fanout = DMFanout(max_concurrent=2, rate=1000, burst=1000)
+        await fanout.fan_out("slow", [(user(i), SlowString) for i in range(6)])
+        return peak
+    assert asyncio.run(run()) == 2
@@ -0,0 +1,53 @@
+# External Imports
+import asyncio
+
+# Internal Imports
+from modules.id_allocator import IdAllocator
+
+
+def allocate(allocator: IdAllocator, count: int, init_block: int | None = None) -> list[int]:
+    async def run():
+        if init_block is not None:
+            await allocator.init(init_block)
+        return await asyncio.gather(*[allocator.next_id() for _ in range(count)])
+
+    return asyncio.run(run())
+
+
+def test_sequential_ids(memory_db):
+    assert allocate(IdAllocator('matches'), 5) == [1, 2, 3, 4, 5]
+    assert memory_db.get_field('counters', 'matches', 'value') == 5
+
+
+def test_seeded_from_collection(memory_db):
+    memory_db.set_element('matches', 41, {})
+    memory_db.set_element('matches', 7, {})
+    assert allocate(IdAllocator('matches', seed_collection='matches'), 2) == [42, 43]
+
+
+def test_seed_never_lowers_counter(memory_db):
+    memory_db.set_element('counters', 'matches', {'value': 100})
+    memory_db.set_element('matches', 41, {})
+    assert allocate(IdAllocator('matches', seed_collection='matches'), 1) == [101]
+
+
+def test_blocks_save_round_trips(memory_db):
+    allocator = IdAllocator('matches', block_size=10)
+    assert allocate(allocator, 25, init_block=10) == list(range(1, 26))
+    assert memory_db.get_round_trips('counters') == 3  # one $inc per block of 10
+    assert memory_db.get_field('counters', 'matches', 'value') == 30
+
+
+def test_restart_skips_unused_block_ids(memory_db):
+    allocate(IdAllocator('matches', block_size=10), 3, init_block=10)
+    assert allocate(IdAllocator('matches', block_size=10), 1, init_block=10) == [11]
+
+
+def test_allocators_sharing_a_counter_never_collide(memory_db):
+    first, second = IdAllocator('matches', block_size=3), IdAllocator('matches', block_size=3)
+
+    async def run():
+        return await asyncio.gather(*[allocator.next_id() for _ in range(10) for allocator in (first, second)])
+
+    allocated = asyncio.run(run())
+    assert len(set(allocated)) == 20
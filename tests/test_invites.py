@@ -0,0 +1,92 @@
+# External Imports
+import asyncio
+from types import SimpleNamespace
+
+# Internal Imports
+import modules.accounts_handler  # noqa: F401, imported before classes to resolve the import cycle
+from classes.invites import InviteRegistry
+
+
+def player(p_id: int):
+    return SimpleNamespace(id=p_id)
+
+
+def test_indexed_both_ways():
+    async def run():
+        registry = InviteRegistry()
+        a, b, c = player(1), player(2), player(3)
+        ab = registry.add(a, b)
+        ac = registry.add(a, c)
+        cb = registry.add(c, b)
+        assert registry.get(a, b) is ab and registry.get(b, a) is None
+        assert registry.from_owner(a) == [ab, ac]
+        assert registry.for_invited(b) == [ab, cb]
+        assert len(registry) == 3
+
+        assert registry.remove(a, b) is ab and ab.timer.cancelled()
+        assert registry.remove(a, b) is None
+        assert registry.from_owner(a) == [ac] and registry.for_invited(b) == [cb]
+        assert len(registry) == 2
+    asyncio.run(run())
+
+
+def test_add_replaces():
+    async def run():
+        registry = InviteRegistry()
+        a, b = player(1), player(2)
+        first = registry.add(a, b)
+        second = registry.add(a, b, match='match')
+        assert first.timer.cancelled()
+        assert registry.get(a, b) is second and second.match == 'match'
+        assert len(registry) == 1
+    asyncio.run(run())
+
+
+def test_expiry():
+    async def run():
+        expired = []
+
+        async def on_expire(invite):
+            expired.append(invite)
+
+        registry = InviteRegistry(on_expire)
+        a, b, c = player(1), player(2), player(3)
+        ab = registry.add(a, b, timeout=0)
+        registry.add(a, c)
+        for _ in range(3):
+            await asyncio.sleep(0)
+        assert expired == [ab]
+        assert registry.get(a, b) is None and registry.for_invited(b) == []
+        assert len(registry) == 1
+    asyncio.run(run())
+
+
+def test_expiry_after_remove():
+    async def run():
+        expired = []
+
+        async def on_expire(invite):
+            expired.append(invite)
+
+        registry = InviteRegistry(on_expire)
+        a, b = player(1), player(2)
+        registry.add(a, b, timeout=0)
+        registry.remove(a, b)
+        for _ in range(3):
+            await asyncio.sleep(0)
+        assert expired == []
+    asyncio.run(run())
+
+
+def test_expire_callback_error_logged(caplog):
+    async def run():
+        async def on_expire(invite):
+            raise RuntimeError("boom")
+
+        registry = InviteRegistry(on_expire)
+        registry.add(player(1), player(2), timeout=0)
+        for _ in range(3):
+            await asyncio.sleep(0)
+        assert len(registry) == 0
+    asyncio.run(run())
+    assert "Error expiring invite from 1 to 2" in caplog.text
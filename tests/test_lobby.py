@@ -0,0 +1,99 @@
+# External Imports
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+# Internal Imports
+import modules.accounts_handler  # noqa: F401, imported before classes to resolve the import cycle
+import modules.routing as routing
+import modules.tools as tools
+import classes.lobby as lobby_module
+from classes.lobby import Lobby
+from classes.match import BaseMatch
+from modules.matchmaker import QueueEntry
+
+
+@pytest.fixture
+def lobby(monkeypatch):
+    lobby = Lobby('test', SimpleNamespace(id=1), BaseMatch, 30, matchmaking=True)
+    changes = []
+    monkeypatch.setattr(lobby, 'state_changed', lambda: changes.append(lobby.version))
+    lobby.changes = changes
+    yield lobby
+    Lobby.all_lobbies.pop('test', None)
+    routing.unregister(1, lobby)
+
+
+class FakePlayer:
+    def __init__(self, p_id: int, lobby):
+        self.id = p_id
+        self.name = f'p{p_id}'
+        self.lobby = lobby
+        self.match = None
+        self.is_registered = True
+        self.is_timeout = False
+
+
+def queued_player(lobby, p_id: int, elo: float, queued_at: int = 0):
+    player = FakePlayer(p_id, lobby)
+    lobby._Lobby__matchmaker.add(QueueEntry(player, elo, queued_at, factions=frozenset(('VS', 'NC'))))
+    return player
+
+
+class TestMatchmakingPass:
+    def test_ineligible_players_removed_before_pairing(self, lobby, monkeypatch):
+        a, b, c = queued_player(lobby, 1, 1000), queued_player(lobby, 2, 1010), queued_player(lobby, 3, 1005)
+        b.is_timeout = True
+        accepted = []
+
+        async def accept_invite(owner, player):
+            accepted.append((owner, player))
+
+        monkeypatch.setattr(lobby, 'accept_invite', accept_invite)
+        asyncio.run(lobby._matchmaking_pass())
+        assert accepted == [(a, c)]
+        assert list(lobby.queued) == []
+        assert lobby.changes
+
+    def test_still_eligible_player_requeued(self, lobby, monkeypatch):
+        a, b = queued_player(lobby, 1, 1000, queued_at=0), queued_player(lobby, 2, 1010, queued_at=1)
+        c, d = queued_player(lobby, 3, 1500, queued_at=2), queued_player(lobby, 4, 1510, queued_at=3)
+        accepted = []
+
+        async def accept_invite(owner, player):
+            accepted.append((owner, player))
+            c.match = 'other match'  # c joins a match while the pass creates a's
+
+        monkeypatch.setattr(lobby, 'accept_invite', accept_invite)
+        asyncio.run(lobby._matchmaking_pass())
+        assert accepted == [(a, b)]
+        assert list(lobby.queued) == [d]
+        assert lobby.changes
+
+
+class TestTimeoutDeadline:
+    def test_warning_recorded_before_dashboard_update(self, lobby, monkeypatch):
+        player = FakePlayer(1, lobby)
+        player.mention = '<@1>'
+        player.lobby_timeout_stamp = tools.timestamp_now() + 60
+        lobby._Lobby__lobbied_players.append(player)
+        shown_warned = []
+        monkeypatch.setattr(lobby, 'state_changed', lambda: shown_warned.append(player in lobby.warned))
+
+        async def check_player_timeout_status(p):
+            return False
+
+        async def send(channel, *args):
+            return SimpleNamespace(id=10)
+
+        monkeypatch.setattr(lobby, 'check_player_timeout_status', check_player_timeout_status)
+        monkeypatch.setattr(lobby_module, 'disp', SimpleNamespace(LOBBY_TIMEOUT_SOON=SimpleNamespace(send=send)))
+
+        async def run():
+            await lobby._timeout_deadline(player)
+            lobby._cancel_timeout(player)
+
+        asyncio.run(run())
+        assert shown_warned == [True]
+        assert lobby.warned[player].id == 10
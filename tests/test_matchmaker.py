@@ -0,0 +1,85 @@
+# Internal Imports
+from modules.matchmaker import Matchmaker, QueueEntry, compatible
+
+ALL = frozenset(("VS", "NC", "TR"))
+
+
+def entry(key, elo, queued_at=0, skill_level=1, req_levels=frozenset(), factions=ALL):
+    return QueueEntry(key, elo, queued_at, skill_level, frozenset(req_levels), frozenset(factions))
+
+
+def test_compatible():
+    assert compatible(entry(1, 0), entry(2, 0))
+    assert not compatible(entry(1, 0, factions={"VS"}), entry(2, 0, factions={"VS"}))
+    assert compatible(entry(1, 0, factions={"VS"}), entry(2, 0, factions={"VS", "NC"}))
+    assert not compatible(entry(1, 0, req_levels={2}), entry(2, 0, skill_level=1))
+    assert not compatible(entry(1, 0, skill_level=3), entry(2, 0, req_levels={1, 2}))
+    assert compatible(entry(1, 0, skill_level=2, req_levels={1}), entry(2, 0, skill_level=1, req_levels={2}))
+
+
+def test_add_remove():
+    mm = Matchmaker()
+    mm.add(entry(1, 1000))
+    mm.add(entry(2, 1000))
+    mm.add(entry(1, 1200))  # replaces the first entry
+    assert len(mm) == 2 and 1 in mm and set(mm.queued) == {1, 2}
+    assert mm.remove(1).elo == 1200
+    assert mm.remove(1) is None
+    assert len(mm) == 1 and 1 not in mm
+
+
+def test_window_widens():
+    mm = Matchmaker(base_window=50, widen_per_minute=25, max_window=100)
+    e = entry(1, 1000, queued_at=0)
+    assert mm.window(e, 0) == 50
+    assert mm.window(e, 120) == 100
+    assert mm.window(e, 600) == 100
+
+
+def test_pair_within_window():
+    mm = Matchmaker(base_window=50, widen_per_minute=25)
+    mm.add(entry(1, 1000))
+    mm.add(entry(2, 1080))
+    assert mm.pair(now=0) == []
+    assert len(mm) == 2
+    # After two minutes both accept a difference of 100
+    pairs = mm.pair(now=120)
+    assert [(a.key, b.key) for a, b in pairs] == [(1, 2)]
+    assert len(mm) == 0 and 1 not in mm
+
+
+def test_window_of_both_players():
+    mm = Matchmaker(base_window=50, widen_per_minute=25)
+    mm.add(entry(1, 1000, queued_at=0))
+    mm.add(entry(2, 1080, queued_at=120))  # only just queued, accepts 50
+    assert mm.pair(now=120) == []
+
+
+def test_pairs_nearest_longest_waiting_first():
+    mm = Matchmaker(base_window=200)
+    mm.add(entry(1, 1000, queued_at=30))
+    mm.add(entry(2, 1040, queued_at=0))  # waited longest, pairs with its nearest: 3
+    mm.add(entry(3, 1050, queued_at=20))
+    mm.add(entry(4, 1100, queued_at=10))
+    pairs = mm.pair(now=60)
+    assert [(a.key, b.key) for a, b in pairs] == [(2, 3), (4, 1)]
+
+
+def test_skips_incompatible_neighbour():
+    mm = Matchmaker(base_window=200)
+    mm.add(entry(1, 1000, queued_at=0, factions={"VS"}))
+    mm.add(entry(2, 1010, queued_at=10, factions={"VS"}))
+    mm.add(entry(3, 1050, queued_at=20, factions={"TR"}))
+    pairs = mm.pair(now=60)
+    assert [(a.key, b.key) for a, b in pairs] == [(1, 3)]
+    assert set(mm.queued) == {2}
+
+
+def test_equal_elo():
+    mm = Matchmaker()
+    for key in range(4):
+        mm.add(entry(key, 1000, queued_at=key))
+    pairs = mm.pair(now=10)
+    assert len(pairs) == 2 and len(mm) == 0
+    mm.add(entry(5, 1000))
+    assert mm.remove(5) is not None and len(mm) == 0
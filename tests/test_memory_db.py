@@ -0,0 +1,175 @@
+# External Imports
+import pytest
+from pymongo import InsertOne, UpdateOne, ReplaceOne, DeleteOne, ReturnDocument
+from pymongo.errors import BulkWriteError
+
+# Internal Imports
+from modules.memory_db import MemoryCollection, MemoryDBError, matches, aggregate_docs
+
+
+@pytest.fixture
+def users():
+    collection = MemoryCollection('users')
+    collection.insert_many([
+        {'_id': 1, 'name': 'Alpha', 'elo': 1100, 'tags': ['a', 'b'], 'stats': {'wins': 3}},
+        {'_id': 2, 'name': 'Bravo', 'elo': 900, 'tags': ['b']},
+        {'_id': 3, 'name': 'Charlie', 'elo': 1000, 'tags': []},
+    ])
+    return collection
+
+
+def ids(docs):
+    return [doc['_id'] for doc in docs]
+
+
+class TestQuery:
+    @pytest.mark.parametrize('query, expected', [
+        ({}, [1, 2, 3]),
+        ({'name': 'Bravo'}, [2]),
+        ({'tags': 'b'}, [1, 2]),  # equality matches array elements
+        ({'stats.wins': 3}, [1]),
+        ({'elo': {'$gt': 900, '$lte': 1100}}, [1, 3]),
+        ({'elo': {'$in': [900, 1000]}}, [2, 3]),
+        ({'elo': {'$nin': [900, 1000]}}, [1]),
+        ({'name': {'$ne': 'Alpha'}}, [2, 3]),
+        ({'stats': {'$exists': False}}, [2, 3]),
+        ({'$or': [{'_id': 1}, {'elo': 900}]}, [1, 2]),
+        ({'$and': [{'tags': 'b'}, {'elo': {'$lt': 1000}}]}, [2]),
+    ])
+    def test_find(self, users, query, expected):
+        assert ids(users.find(query)) == expected
+
+    def test_unsupported_operator(self):
+        with pytest.raises(MemoryDBError):
+            matches({'a': 1}, {'a': {'$regex': 'x'}})
+
+    def test_sort_skip_limit(self, users):
+        assert ids(users.find({}).sort('elo', -1).skip(1).limit(1)) == [3]
+        assert ids(users.find({}, sort=[('elo', 1)])) == [2, 3, 1]
+
+    def test_projection(self, users):
+        assert users.find_one({'_id': 1}, {'name': True}) == {'_id': 1, 'name': 'Alpha'}
+        assert users.find_one({'_id': 1}, {'_id': False, 'stats.wins': True}) == {'stats': {'wins': 3}}
+        assert users.find_one({'_id': 2}, {'tags': False}) == {'_id': 2, 'name': 'Bravo', 'elo': 900}
+
+    def test_results_are_copies(self, users):
+        users.find_one({'_id': 1})['stats']['wins'] = 100
+        assert users.find_one({'_id': 1})['stats']['wins'] == 3
+
+    def test_count(self, users):
+        assert users.count_documents({'tags': 'b'}) == 2
+
+
+class TestUpdate:
+    def test_operators(self, users):
+        users.update_one({'_id': 1}, {'$set': {'name': 'A', 'stats.losses': 1}, '$inc': {'elo': 5, 'stats.wins': 1},
+                                      '$push': {'tags': {'$each': ['c', 'd']}}, '$unset': {'missing': ''}})
+        assert users.find_one({'_id': 1}) == {'_id': 1, 'name': 'A', 'elo': 1105, 'tags': ['a', 'b', 'c', 'd'],
+                                              'stats': {'wins': 4, 'losses': 1}}
+
+    def test_max_min(self, users):
+        users.update_one({'_id': 2}, {'$max': {'elo': 950}, '$min': {'low': 5}})
+        users.update_one({'_id': 2}, {'$max': {'elo': 920}})
+        assert users.find_one({'_id': 2}, ['elo', 'low']) == {'_id': 2, 'elo': 950, 'low': 5}
+
+    def test_no_match(self, users):
+        result = users.update_one({'_id': 404}, {'$set': {'name': 'x'}})
+        assert (result.matched_count, result.upserted_id) == (0, None)
+
+    def test_upsert_seeds_filter_fields(self, users):
+        result = users.update_one({'_id': 4, 'name': 'Delta'}, {'$inc': {'elo': 10}, '$setOnInsert': {'new': True}},
+                                  upsert=True)
+        assert result.upserted_id == 4
+        assert users.find_one({'_id': 4}) == {'_id': 4, 'name': 'Delta', 'elo': 10, 'new': True}
+
+    def test_update_many(self, users):
+        assert users.update_many({'tags': 'b'}, {'$inc': {'elo': 1}}).matched_count == 2
+        assert ids(users.find({'elo': {'$in': [1101, 901]}})) == [1, 2]
+
+    def test_conflicting_paths_rejected(self, users):
+        with pytest.raises(MemoryDBError):
+            users.update_one({'_id': 1}, {'$unset': {'elo': ''}, '$inc': {'elo': 1}})
+        with pytest.raises(MemoryDBError):
+            users.update_one({'_id': 1}, {'$set': {'stats': {}}, '$inc': {'stats.wins': 1}})
+        assert users.find_one({'_id': 1})['elo'] == 1100  # nothing applied
+
+    def test_add_to_set(self, users):
+        users.update_one({'_id': 1}, {'$addToSet': {'tags': {'$each': ['b', 'c', 'c']}}})
+        users.update_one({'_id': 2}, {'$addToSet': {'new': 'x'}})
+        assert users.find_one({'_id': 1})['tags'] == ['a', 'b', 'c']
+        assert users.find_one({'_id': 2})['new'] == ['x']
+
+    def test_push_to_non_array(self, users):
+        with pytest.raises(MemoryDBError):
+            users.update_one({'_id': 1}, {'$push': {'name': 'x'}})
+
+    def test_duplicate_insert(self, users):
+        with pytest.raises(MemoryDBError):
+            users.insert_one({'_id': 1})
+
+    def test_find_one_and_update(self, users):
+        before = users.find_one_and_update({'_id': 'counter'}, {'$inc': {'value': 5}}, upsert=True,
+                                           return_document=ReturnDocument.BEFORE)
+        assert before is None
+        after = users.find_one_and_update({'_id': 'counter'}, {'$inc': {'value': 5}},
+                                          return_document=ReturnDocument.AFTER)
+        assert after == {'_id': 'counter', 'value': 10}
+
+    def test_bulk_write(self, users):
+        result = users.bulk_write([InsertOne({'_id': 5}), UpdateOne({'_id': 1}, {'$inc': {'elo': 1}}),
+                                   UpdateOne({'_id': 6}, {'$set': {'a': 1}}, upsert=True),
+                                   ReplaceOne({'_id': 2}, {'name': 'B'}), DeleteOne({'_id': 3})])
+        assert (result.inserted_count, result.matched_count, result.upserted_count, result.deleted_count) == \
+               (1, 2, 1, 1)
+        assert ids(users.find({})) == [1, 2, 5, 6]
+        assert users.find_one({'_id': 2}) == {'_id': 2, 'name': 'B'}
+
+    def test_unordered_bulk_write_error(self, users):
+        with pytest.raises(BulkWriteError) as error:
+            users.bulk_write([UpdateOne({'_id': 2}, {'$set': {'elo': 0}, '$push': {'name': 'x'}}),
+                              UpdateOne({'_id': 1}, {'$inc': {'elo': 1}}),
+                              InsertOne({'_id': 3})], ordered=False)
+        details = error.value.details
+        assert [(e['index'], e['code']) for e in details['writeErrors']] == [(0, 2), (2, 11000)]
+        assert details['writeErrors'][1]['op'] == InsertOne({'_id': 3})
+        assert details['nMatched'] == 1
+        assert users.find_one({'_id': 1})['elo'] == 1101  # applied once, past the failing operation
+        assert users.find_one({'_id': 2})['elo'] == 900  # failing update left unchanged
+
+    def test_ordered_bulk_write_stops_at_error(self, users):
+        with pytest.raises(BulkWriteError) as error:
+            users.bulk_write([UpdateOne({'_id': 2}, {'$push': {'name': 'x'}}),
+                              UpdateOne({'_id': 1}, {'$inc': {'elo': 1}})])
+        assert [e['index'] for e in error.value.details['writeErrors']] == [0]
+        assert users.find_one({'_id': 1})['elo'] == 1100
+
+
+class TestAggregate:
+    def test_group_sort(self):
+        docs = [{'_id': 1, 'p': [1, 2], 'd': 10}, {'_id': 2, 'p': [2], 'd': 5}]
+        result = aggregate_docs(docs, [{'$unwind': '$p'}, {'$group': {'_id': '$p', 'n': {'$sum': 1},
+                                                                      'total': {'$sum': '$d'}}},
+                                       {'$sort': {'n': -1}}])
+        assert result == [{'_id': 2, 'n': 2, 'total': 15}, {'_id': 1, 'n': 1, 'total': 10}]
+
+    def test_count(self):
+        assert aggregate_docs([{'_id': 1}, {'_id': 2}], [{'$match': {'_id': 2}}, {'$count': 'n'}]) == [{'n': 1}]
+
+
+class TestDatabaseHelpers:
+    def test_restart_data_seeded(self, memory_db):
+        assert memory_db.get_field('restart_data', 0, 'dashboard_msg_ids') == {}
+        memory_db.set_field('restart_data', 0, {'dashboard_msg_ids.casual': 10})
+        assert memory_db.get_field('restart_data', 0, 'dashboard_msg_ids') == {'casual': 10}
+
+    def test_set_field_missing_element(self, memory_db):
+        with pytest.raises(memory_db.DatabaseError):
+            memory_db.set_field('users', 404, {'name': 'x'})
+
+    def test_get_all_elements_counts_batches(self, memory_db, monkeypatch):
+        monkeypatch.setattr(memory_db, 'STREAM_BATCH_SIZE', 10)
+        memory_db._collections['users'].insert_many([{'_id': i} for i in range(25)])
+        loaded = []
+        memory_db.get_all_elements(loaded.append, 'users')
+        assert len(loaded) == 25
+        assert memory_db.get_round_trips('users') == 3
@@ -0,0 +1,57 @@
+# Internal Imports
+from modules.search_index import NGramIndex
+
+
+def test_substring_case_insensitive():
+    index = NGramIndex()
+    index.add(1, 'SkyPilot')
+    index.add(2, 'Groundcrew')
+    assert index.search('PIL') == [('SkyPilot', 1)]
+    assert index.search('o') == [('SkyPilot', 1), ('Groundcrew', 2)]  # shorter text first
+    assert index.search('xyz') == []
+    assert index.search('') == []
+
+
+def test_long_query_verified_against_text():
+    index = NGramIndex(n=2)
+    index.add(1, 'abcab')
+    assert index.search('abca') == [('abcab', 1)]
+    assert index.search('abab') == []  # shares every bigram, but isn't a substring
+
+
+def test_ranking_and_limit():
+    index = NGramIndex()
+    for key, text in enumerate(['xace', 'acez', 'ace', 'bace']):
+        index.add(key, text)
+    assert index.search('ace') == [('ace', 2), ('acez', 1), ('bace', 3), ('xace', 0)]  # prefix matches first
+    assert len(index.search('ace', k=2)) == 2
+
+
+def test_several_texts_per_key():
+    index = NGramIndex()
+    index.add(1, 'Pilot')
+    index.add(1, 'PilotVS')
+    assert index.search('pilot') == [('Pilot', 1), ('PilotVS', 1)]
+    index.remove(1, 'PilotVS')
+    assert index.search('pilot') == [('Pilot', 1)]
+
+
+def test_remove():
+    index = NGramIndex()
+    index.add(1, 'Pilot')
+    index.remove(1, 'Pilot')
+    index.remove(1, 'Pilot')  # removing a missing entry is a no-op
+    assert index.search('p') == []
+    assert len(index) == 0
+
+
+def test_shared_entry_refcounted():
+    # A player's name equal to one of their character names is added twice
+    index = NGramIndex()
+    index.add(1, 'Pilot')
+    index.add(1, 'Pilot')
+    assert index.search('pil') == [('Pilot', 1)]
+    index.remove(1, 'Pilot')
+    assert index.search('pil') == [('Pilot', 1)]
+    index.remove(1, 'Pilot')
+    assert index.search('pil') == []
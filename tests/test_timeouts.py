@@ -0,0 +1,59 @@
+# External Imports
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+# Internal Imports
+import modules.accounts_handler  # noqa: F401, imported before classes to resolve the import cycle
+import modules.timeouts as timeouts
+import modules.tools as tools
+import modules.write_buffer as write_buffer
+from classes import Player
+
+
+@pytest.fixture
+def player(monkeypatch):
+    monkeypatch.setattr(write_buffer, 'queue_update', lambda *args, **kwargs: None)
+    p = Player(900001, 'TimeoutTest')
+    yield p
+    p.remove()
+
+
+def test_new_timeout_replaces_expired_timeout(player):
+    async def run():
+        await player.set_timeout(tools.timestamp_now() + 100, 5, 'old', 1)
+        player._Player__timeout['stamp'] = tools.timestamp_now() - 10  # expired, not lifted yet
+        await player.set_timeout(tools.timestamp_now() + 100, 6, 'new', 2)
+
+    asyncio.run(run())
+    assert (player.timeout_msg_id, player.timeout_reason, player.timeout_mod_id) == (6, 'new', 2)
+    assert player.is_timeout
+
+
+def test_running_timeout_extended(player):
+    stamp = tools.timestamp_now() + 100
+
+    async def run():
+        await player.set_timeout(stamp, 5, 'old', 1)
+        await player.set_timeout(stamp + 100, 6, 'new', 2)
+
+    asyncio.run(run())
+    assert (player.timeout_until, player.timeout_msg_id, player.timeout_reason) == (stamp + 100, 5, 'old')
+
+
+def test_lift_reason(player, monkeypatch):
+    calls = []
+
+    async def timeout_player(**kwargs):
+        calls.append(kwargs)
+
+    monkeypatch.setattr(timeouts, 'd_obj', SimpleNamespace(guild=SimpleNamespace(get_member=lambda p_id: object()),
+                                                           timeout_player=timeout_player))
+
+    async def run():
+        await player.set_timeout(tools.timestamp_now() + 100, 5, 'reason', 1)
+        await timeouts._lift(player)
+
+    asyncio.run(run())
+    assert calls == [{'p': player, 'stamp': 0, 'reason': 'Timeout expired'}]
@@ -0,0 +1,224 @@
+# External Imports
+import asyncio
+import logging
+
+import pytest
+from pymongo.errors import AutoReconnect, BulkWriteError, ServerSelectionTimeoutError
+
+# Internal Imports
+import modules.write_buffer as write_buffer
+
+
+@pytest.fixture(autouse=True)
+def empty_buffer(monkeypatch):
+    monkeypatch.setattr(write_buffer, '_pending', dict())
+    monkeypatch.setattr(write_buffer, '_upserts', dict())
+    monkeypatch.setattr(write_buffer, '_attempts', dict())
+    monkeypatch.setattr(write_buffer, '_oldest_stamp', None)
+    monkeypatch.setattr(write_buffer, '_flush_handle', None)
+    monkeypatch.setattr(write_buffer, '_flush_lock', asyncio.Lock())
+
+
+def merged(*updates):
+    pending = dict()
+    for update in updates:
+        write_buffer.merge_update(pending, update)
+    return pending
+
+
+class TestMergeUpdate:
+    def test_set_newest_wins(self):
+        assert merged({'$set': {'a': 1}}, {'$set': {'a': 2, 'b': 3}}) == {'$set': {'a': 2, 'b': 3}}
+
+    def test_inc_summed(self):
+        assert merged({'$inc': {'a': 1}}, {'$inc': {'a': 2}}) == {'$inc': {'a': 3}}
+
+    def test_inc_after_set_added_to_set(self):
+        assert merged({'$set': {'a': 5}}, {'$inc': {'a': 2}}) == {'$set': {'a': 7}}
+
+    def test_set_replaces_inc(self):
+        assert merged({'$inc': {'a': 5}}, {'$set': {'a': 1}}) == {'$set': {'a': 1}}
+
+    def test_inc_after_unset_becomes_set(self):
+        assert merged({'$unset': {'a': ''}}, {'$inc': {'a': 2}}) == {'$set': {'a': 2}}
+
+    def test_unset_replaces_set_and_inc(self):
+        assert merged({'$set': {'a': 1}, '$inc': {'b': 1}}, {'$unset': {'a': '', 'b': ''}}) == \
+               {'$unset': {'a': '', 'b': ''}}
+
+    def test_push_appended(self):
+        assert merged({'$push': {'l': 1}}, {'$push': {'l': {'$each': [2, 3]}}}) == \
+               {'$push': {'l': {'$each': [1, 2, 3]}}}
+
+    def test_push_after_set_extends_set(self):
+        assert merged({'$set': {'l': [1]}}, {'$push': {'l': 2}}) == {'$set': {'l': [1, 2]}}
+
+    def test_push_after_unset_becomes_set(self):
+        assert merged({'$unset': {'l': ''}}, {'$push': {'l': 2}}) == {'$set': {'l': [2]}}
+
+    def test_set_replaces_push(self):
+        assert merged({'$push': {'l': 1}}, {'$set': {'l': []}}) == {'$set': {'l': []}}
+
+    def test_add_to_set_deduplicated(self):
+        assert merged({'$addToSet': {'l': 1}}, {'$addToSet': {'l': {'$each': [1, 2, 2]}}}) == \
+               {'$addToSet': {'l': {'$each': [1, 2]}}}
+
+    def test_add_to_set_after_set_extends_set(self):
+        assert merged({'$set': {'l': [1]}}, {'$addToSet': {'l': {'$each': [1, 2]}}}) == {'$set': {'l': [1, 2]}}
+
+    def test_add_to_set_after_unset_becomes_set(self):
+        assert merged({'$unset': {'l': ''}}, {'$addToSet': {'l': 2}}) == {'$set': {'l': [2]}}
+
+    def test_push_and_add_to_set_not_merged(self):
+        with pytest.raises(write_buffer.db.DatabaseError):
+            merged({'$push': {'l': 1}}, {'$addToSet': {'l': 2}})
+
+    def test_unsupported_operator(self):
+        with pytest.raises(write_buffer.db.DatabaseError):
+            merged({'$rename': {'a': 'b'}})
+
+
+class TestFlush:
+    def test_merged_updates_written_in_one_round_trip(self, memory_db):
+        memory_db.set_element('users', 1, {'name': 'a', 'count': 1})
+        memory_db.set_element('users', 2, {'name': 'b'})
+        memory_db.reset_round_trips()
+
+        async def run():
+            write_buffer.queue_update('users', 1, {'$set': {'name': 'c'}})
+            write_buffer.queue_update('users', 1, {'$inc': {'count': 2}})
+            write_buffer.queue_update('users', 2, {'$unset': {'name': ''}})
+            write_buffer.queue_update('users', 2, {'$inc': {'name': 1}})
+            assert write_buffer.pending_count() == 2
+            await write_buffer.flush()
+
+        asyncio.run(run())
+        assert memory_db.get_element('users', 1) == {'_id': 1, 'name': 'c', 'count': 3}
+        assert memory_db.get_element('users', 2) == {'_id': 2, 'name': 1}
+        assert write_buffer.pending_count() == 0
+        assert memory_db.get_round_trips('users') == 3  # bulk write, and the two reads above
+
+    def test_upsert(self, memory_db):
+        async def run():
+            write_buffer.queue_update('user_stats', 5, {'$inc': {'elo': 10}}, upsert=True)
+            await write_buffer.flush()
+
+        asyncio.run(run())
+        assert memory_db.get_element('user_stats', 5) == {'_id': 5, 'elo': 10}
+
+    def test_missing_element_logged(self, memory_db, caplog):
+        async def run():
+            write_buffer.queue_update('users', 404, {'$set': {'name': 'ghost'}})
+            await write_buffer.flush()
+
+        with caplog.at_level(logging.WARNING, logger='fs_bot'):
+            asyncio.run(run())
+        assert "matched no element" in caplog.text
+        assert memory_db.get_element('users', 404) is None
+
+    def test_failed_update_retried_then_dropped(self, memory_db, monkeypatch, caplog):
+        monkeypatch.setattr(write_buffer, 'MAX_ATTEMPTS', 2)
+
+        def failing_bulk_write(collection, requests):
+            raise ConnectionError("database unreachable")
+
+        monkeypatch.setattr(memory_db, 'bulk_write', failing_bulk_write)
+
+        async def run():
+            write_buffer.queue_update('users', 1, {'$set': {'name': 'a'}})
+            await write_buffer.flush()
+            assert write_buffer.pending_count() == 1  # re-queued
+            await write_buffer.flush()
+
+        with caplog.at_level(logging.ERROR, logger='fs_bot'):
+            asyncio.run(run())
+        assert write_buffer.pending_count() == 0
+        assert "dropping update to users [1]" in caplog.text
+
+    def test_retried_update_merged_under_newer_update(self, memory_db, monkeypatch):
+        memory_db.set_element('users', 1, {'count': 0})
+        real_bulk_write = memory_db.bulk_write
+        calls = []
+
+        def flaky_bulk_write(collection, requests):
+            calls.append(len(requests))
+            if len(calls) == 1:
+                raise ServerSelectionTimeoutError("no server available")
+            return real_bulk_write(collection, requests)
+
+        monkeypatch.setattr(memory_db, 'bulk_write', flaky_bulk_write)
+
+        async def run():
+            write_buffer.queue_update('users', 1, {'$inc': {'count': 1}})
+            await write_buffer.flush()
+            write_buffer.queue_update('users', 1, {'$inc': {'count': 2}})
+            await write_buffer.flush()
+
+        asyncio.run(run())
+        assert memory_db.get_field('users', 1, 'count') == 3
+
+    def test_rejected_update_dropped_without_retry(self, memory_db, monkeypatch, caplog):
+        memory_db.set_element('users', 1, {'count': 0})
+        real_bulk_write = memory_db.bulk_write
+
+        def rejecting_bulk_write(collection, requests):
+            real_bulk_write(collection, requests[1:])
+            raise BulkWriteError({'writeErrors': [{'index': 0, 'errmsg': 'conflict'}]})
+
+        monkeypatch.setattr(memory_db, 'bulk_write', rejecting_bulk_write)
+
+        async def run():
+            write_buffer.queue_update('users', 2, {'$set': {'bad': 1}})
+            write_buffer.queue_update('users', 1, {'$inc': {'count': 1}})
+            await write_buffer.flush()
+
+        with caplog.at_level(logging.ERROR, logger='fs_bot'):
+            asyncio.run(run())
+        assert write_buffer.pending_count() == 0
+        assert "rejected: conflict" in caplog.text
+        assert memory_db.get_field('users', 1, 'count') == 1
+
+    def test_possibly_applied_update_only_retried_if_idempotent(self, memory_db, monkeypatch, caplog):
+        memory_db.set_element('users', 1, {'count': 0})
+        memory_db.set_element('users', 2, {'name': 'a'})
+        real_bulk_write = memory_db.bulk_write
+        calls = []
+
+        def timing_out_bulk_write(collection, requests):
+            # Applied by the server, but the reply is lost
+            calls.append(len(requests))
+            real_bulk_write(collection, requests)
+            if len(calls) == 1:
+                raise AutoReconnect("connection reset")
+
+        monkeypatch.setattr(memory_db, 'bulk_write', timing_out_bulk_write)
+
+        async def run():
+            write_buffer.queue_update('users', 1, {'$inc': {'count': 1}})
+            write_buffer.queue_update('users', 2, {'$set': {'name': 'b'}})
+            await write_buffer.flush()
+            assert write_buffer.pending_count() == 1  # only the $set update re-queued
+            await write_buffer.flush()
+
+        with caplog.at_level(logging.ERROR, logger='fs_bot'):
+            asyncio.run(run())
+        assert calls == [2, 1]
+        assert memory_db.get_field('users', 1, 'count') == 1
+        assert memory_db.get_field('users', 2, 'name') == 'b'
+        assert "dropping update to users [1], may have been applied" in caplog.text
+
+    def test_rejected_update_next_to_valid_update(self, memory_db, caplog):
+        memory_db.set_element('users', 1, {'n': 0})
+        memory_db.set_element('users', 2, {'name': 'a'})
+
+        async def run():
+            write_buffer.queue_update('users', 1, {'$inc': {'n': 1}})
+            write_buffer.queue_update('users', 2, {'$push': {'name': 'b'}})  # not an array, rejected
+            for _ in range(write_buffer.MAX_ATTEMPTS + 1):
+                await write_buffer.flush()
+
+        with caplog.at_level(logging.ERROR, logger='fs_bot'):
+            asyncio.run(run())
+        assert memory_db.get_element('users', 1) == {'_id': 1, 'n': 1}
+        assert memory_db.get_element('users', 2) == {'_id': 2, 'name': 'a'}
+        assert "dropping update to users [2], rejected" in caplog.text